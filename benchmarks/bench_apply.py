@@ -0,0 +1,70 @@
+"""Per-key vs batched ``apply_spec`` timings for large specs.
+
+The per-key variant reproduces the previous implementation, which called os.getenv and assigned
+os.environ once per spec entry.
+
+Usage: python benchmarks/bench_apply.py [--keys 1000 10000 50000] [--repeat 5]
+"""
+
+import argparse
+import os
+import time
+
+from generators import make_spec
+
+from checkenv import CheckEnv
+
+
+def per_key_apply(spec: dict) -> None:
+    missing, optional = [], []
+    for name, value in spec.items():
+        if isinstance(value, bool):
+            required, default = value, None
+        else:
+            required, default = value.get("required", True), value.get("default", None)
+        if os.getenv(name, None) is None:
+            if default is not None:
+                os.environ[name] = str(default)
+                optional.append(name)
+            elif required:
+                missing.append(name)
+            else:
+                optional.append(name)
+
+
+def batched_apply(spec: dict, dry_run: bool = False) -> None:
+    instance = CheckEnv()
+    instance._spec = spec
+    instance.apply_spec(dry_run=dry_run)
+
+
+def best_of(func, spec: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(spec)
+        best = min(best, time.perf_counter() - start)
+        for name in spec:
+            os.environ.pop(name, None)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # writing defaults to os.environ still costs one putenv per default, so the dry run column
+    # shows the cost of evaluating the spec on its own
+    print(f"{'keys':>8} {'per-key (ms)':>13} {'batched (ms)':>13} {'dry run (ms)':>13}")
+    for keys in args.keys:
+        spec = make_spec(keys)
+        per_key = best_of(per_key_apply, spec, args.repeat)
+        batched = best_of(batched_apply, spec, args.repeat)
+        dry_run = best_of(lambda s: batched_apply(s, dry_run=True), spec, args.repeat)
+        print(f"{keys:>8} {per_key * 1000:>13.3f} {batched * 1000:>13.3f} {dry_run * 1000:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
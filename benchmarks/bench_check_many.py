@@ -0,0 +1,44 @@
+"""Sequential vs thread pool vs process pool timings for ``evaluate_many_specs``.
+
+Usage: python benchmarks/bench_check_many.py [--specs 400] [--keys 2000] [--workers 1 2 4 8]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from generators import make_spec
+
+from checkenv.many import evaluate_many_specs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--specs", type=int, default=400)
+    parser.add_argument("--keys", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for index in range(args.specs):
+            path = os.path.join(tmp_dir, f"service{index}.json")
+            with open(path, "w", encoding="utf-8") as spec_file:
+                json.dump(make_spec(args.keys), spec_file)
+            paths.append(path)
+
+        print(f"{args.specs} spec files with {args.keys} keys each, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'threads (s)':>12} {'processes (s)':>14}")
+        for workers in args.workers:
+            timings = []
+            for use_processes in (False, True):
+                start = time.perf_counter()
+                evaluate_many_specs(paths, env={}, max_workers=workers, use_processes=use_processes)
+                timings.append(time.perf_counter() - start)
+            print(f"{workers:>8} {timings[0]:>12.3f} {timings[1]:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Throughput of checking many environment mappings against one compiled spec.
+
+Compares building per-mapping result lists with ``CompiledSpec.evaluate`` against streaming
+bitsets with ``CompiledSpec.evaluate_many``. Mappings are drawn round-robin from a pool of
+prebuilt job environments so that generating them does not dominate the measurement.
+
+Usage: python benchmarks/bench_evaluate_many.py [--mappings 1000000] [--keys 20] [--env-size 40]
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+from checkenv.spec import CompiledSpec
+
+
+def make_environments(spec: dict, count: int, env_size: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    names = list(spec)
+    environments = []
+    for index in range(count):
+        env = {f"UNRELATED_{i}": "x" for i in range(env_size - len(names))}
+        for name in names:
+            if rng.random() < 0.9:
+                env[name] = str(index)
+        environments.append(env)
+    return environments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mappings", type=int, default=1_000_000)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--env-size", type=int, default=40)
+    args = parser.parse_args()
+
+    spec = {f"JOB_VAR_{i}": True if i % 2 else {"required": False} for i in range(args.keys)}
+    compiled = CompiledSpec.from_spec(spec)
+    pool = make_environments(spec, 1000, args.env_size)
+
+    def stream():
+        return itertools.islice(itertools.cycle(pool), args.mappings)
+
+    start = time.perf_counter()
+    failed = sum(1 for env in stream() if compiled.evaluate(env).missing)
+    evaluate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    failed_bits = sum(1 for missing, _ in compiled.evaluate_many(stream()) if missing)
+    evaluate_many = time.perf_counter() - start
+    assert failed == failed_bits
+
+    print(f"{args.mappings} mappings, {args.keys} spec keys, {args.env_size} variables each")
+    for label, seconds in (("evaluate", evaluate), ("evaluate_many", evaluate_many)):
+        print(f"{label:>14}: {seconds:7.3f}s  {args.mappings / seconds:>12,.0f} mappings/s")
+
+
+if __name__ == "__main__":
+    main()
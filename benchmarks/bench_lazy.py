@@ -0,0 +1,81 @@
+"""Startup time: an eager ``check()`` vs a lazy config that reads a few variables.
+
+Both load the spec through a warm spec cache, as an app restarting with an unchanged spec file
+would. Half of the generated spec's entries with a default are typed (``int``), so the eager check
+also compiles and runs their validators. The lazy config reads ``--reads`` variables, spread over
+the spec; ``verify_all`` is timed separately, since it is the deferred full check.
+
+Usage: python benchmarks/bench_lazy.py [--keys 1000 100000] [--reads 10] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from functools import partial
+
+from generators import make_env, make_spec
+from run_suite import patched_environ
+
+from checkenv import check, lazy_config
+
+
+def typed_spec(keys: int) -> dict:
+    spec = make_spec(keys)
+    entries = [entry for entry in spec.values() if isinstance(entry, dict) and "default" in entry]
+    for entry in entries[::2]:
+        entry["type"] = "int"
+    return spec
+
+
+def read_lazily(filename: str, cache_dir: str, names: list[str]) -> None:
+    config = lazy_config(filename, cache_dir=cache_dir)
+    for name in names:
+        config[name]  # noqa: B018
+
+
+def verify_lazily(filename: str, cache_dir: str) -> None:
+    lazy_config(filename, cache_dir=cache_dir).verify_all(no_output=True)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--reads", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'check (ms)':>11} {'lazy (ms)':>10} {'verify_all (ms)':>16}")
+    for keys in args.keys:
+        spec = typed_spec(keys)
+        # every variable is set, to an int, so both the check and all reads pass
+        env = {name: "1" for name in make_env(spec, set_ratio=1.0, extra=50)}
+        names = list(spec)[:: max(1, keys // args.reads)][: args.reads]
+        with tempfile.TemporaryDirectory() as tmp_dir, patched_environ(env):
+            filename = os.path.join(tmp_dir, "env.json")
+            with open(filename, "w", encoding="utf-8") as spec_file:
+                json.dump(spec, spec_file)
+            cache_dir = os.path.join(tmp_dir, "cache")
+            check(filename, no_output=True, cache_dir=cache_dir)
+
+            eager = best_of(
+                args.repeat, partial(check, filename, no_output=True, cache_dir=cache_dir)
+            )
+            deferred = best_of(args.repeat, partial(read_lazily, filename, cache_dir, names))
+            full = best_of(args.repeat, partial(verify_lazily, filename, cache_dir))
+        print(f"{keys:>8} {eager * 1000:>11.2f} {deferred * 1000:>10.2f} {full * 1000:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
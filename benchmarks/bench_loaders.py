@@ -0,0 +1,75 @@
+"""``CheckEnv.load_spec_file`` timings per spec format backend: the standard library's json,
+orjson (if installed) and TOML.
+
+The parse phase is timed on its own, as recorded by CheckEnv.stats, and so is the whole load
+(reading, parsing and validating the spec file).
+
+Usage: python benchmarks/bench_loaders.py [--keys 1000 100000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from generators import make_spec
+
+from checkenv import CheckEnv
+from checkenv.loaders import _orjson_loads
+
+
+def toml_spec(spec: dict) -> str:
+    """Writes a generated spec as TOML, which has no general purpose writer in the stdlib"""
+    lines = [f"{name} = {json.dumps(entry)}" for name, entry in spec.items() if entry is True]
+    lines += [f"{name} = false" for name, entry in spec.items() if entry is False]
+    for name, entry in spec.items():
+        if isinstance(entry, dict):
+            lines.append(f"\n[{name}]")
+            lines += [f"{key} = {json.dumps(value)}" for key, value in entry.items()]
+    return "\n".join(lines) + "\n"
+
+
+def time_load(filename: str, repeat: int) -> tuple[float, float]:
+    """Returns the best parse phase and whole load durations, in seconds"""
+    best_parse = best_load = float("inf")
+    for _ in range(repeat):
+        instance = CheckEnv(env_filename=filename)
+        instance.load_spec_file()
+        durations = instance.stats.durations_ns
+        best_parse = min(best_parse, durations["parse"] / 1e9)
+        best_load = min(best_load, instance.stats.total_ns / 1e9)
+    return best_parse, best_load
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    orjson = sys.modules.get("orjson") if _orjson_loads() is not None else None
+    print(f"{'keys':>8} {'backend':>8} {'parse (ms)':>11} {'load (ms)':>10}")
+    for keys in args.keys:
+        spec = make_spec(keys)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_file = os.path.join(tmp_dir, "env.json")
+            with open(json_file, "w", encoding="utf-8") as spec_file:
+                json.dump(spec, spec_file)
+            toml_file = os.path.join(tmp_dir, "env.toml")
+            with open(toml_file, "w", encoding="utf-8") as spec_file:
+                spec_file.write(toml_spec(spec))
+
+            backends = [("json", json_file), ("toml", toml_file)]
+            if orjson is not None:
+                backends.insert(0, ("orjson", json_file))
+            for backend, filename in backends:
+                # hide orjson from all but the orjson backend
+                sys.modules["orjson"] = orjson if backend == "orjson" else None  # type: ignore
+                _orjson_loads.cache_clear()
+                parse, load = time_load(filename, args.repeat)
+                print(f"{keys:>8} {backend:>8} {parse * 1000:>11.3f} {load * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
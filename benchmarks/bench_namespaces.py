@@ -0,0 +1,49 @@
+"""Finding the variables in many namespaces: NamespaceIndex vs testing every prefix.
+
+The naive variant checks each name against each prefix, so it grows with the number of
+namespaces; NamespaceIndex bisects a sorted, prefix-free list once per name.
+
+Usage: python benchmarks/bench_namespaces.py [--names 100000] [--namespaces 10 1000]
+"""
+
+import argparse
+import time
+
+from checkenv.namespaces import NamespaceIndex
+
+
+def naive_match(prefixes: list[str], names: list[str]) -> list[str]:
+    return [name for name in names if any(name.startswith(prefix) for prefix in prefixes)]
+
+
+def best_of(repeat: int, func, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--namespaces", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # ten variables per service, so every namespace holds ten of them
+    names = [f"SVC{index % (args.names // 10)}_VAR_{index}" for index in range(args.names)]
+    print(f"{'namespaces':>10} {'naive (ms)':>11} {'index (ms)':>11} {'build (ms)':>11}")
+    for count in args.namespaces:
+        prefixes = [f"SVC{index}_" for index in range(count)]
+        build = best_of(args.repeat, NamespaceIndex, prefixes)
+        index = NamespaceIndex(prefixes)
+        assert index.match(names) == naive_match(prefixes, names)
+        naive = best_of(args.repeat, naive_match, prefixes, names)
+        indexed = best_of(args.repeat, index.match, names)
+        print(f"{count:>10} {naive * 1000:>11.2f} {indexed * 1000:>11.2f} {build * 1000:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
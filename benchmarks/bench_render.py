@@ -0,0 +1,77 @@
+"""Per-fragment ``print()`` vs buffered renderer timings for large result sections.
+
+The per-fragment variant reproduces the previous ``print_console_color`` implementation.
+
+Usage: python benchmarks/bench_render.py [--rows 100 1000 10000] [--repeat 5]
+"""
+
+import argparse
+import io
+import time
+from functools import partial
+
+from generators import make_spec
+
+from checkenv import EnvCheckResults
+from checkenv.render import ColorConsoleRenderer, JsonRenderer, PlainTextRenderer
+
+
+class TtyStream(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def per_fragment_print(results: EnvCheckResults, stream_class: type) -> None:
+    out = stream_class()
+    colors = ColorConsoleRenderer
+    print(colors.COLORS_HEADER_MANDATORY, file=out)
+    print(results.header, end="", file=out)
+    print(colors.COLORS_RESET, file=out)
+    for row in results.rows:
+        print(colors.COLORS_ENV_NAME_TEXT, end="", file=out)
+        print(row.name, end="", file=out)
+        print(colors.COLORS_RESET, end="", file=out)
+        if row.default is not None:
+            print(colors.COLORS_DEFAULT_TEXT, end="", file=out)
+            print(f" (default={row.default})", end="", file=out)
+            print(colors.COLORS_RESET, end="", file=out)
+        if row.description:
+            print(f" {row.description}", end="", file=out)
+        print(colors.COLORS_RESET, file=out)
+
+
+def render(renderer_class: type, results: EnvCheckResults, stream_class: type) -> None:
+    renderer_class(stream=stream_class()).render([results])
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    header = ("rows", "print (ms)", "color (ms)", "text (ms)", "json (ms)")
+    print("".join(f"{label:>12}" for label in header))
+    for rows in args.rows:
+        spec = make_spec(rows)
+        results = EnvCheckResults(list(spec), spec, EnvCheckResults.MISSING)
+        timings = [
+            best_of(partial(per_fragment_print, results, TtyStream), args.repeat),
+            best_of(partial(render, ColorConsoleRenderer, results, TtyStream), args.repeat),
+            best_of(partial(render, PlainTextRenderer, results, io.StringIO), args.repeat),
+            best_of(partial(render, JsonRenderer, results, io.StringIO), args.repeat),
+        ]
+        print(f"{rows:>12}" + "".join(f"{seconds * 1000:>12.3f}" for seconds in timings))
+
+
+if __name__ == "__main__":
+    main()
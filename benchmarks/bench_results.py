@@ -0,0 +1,79 @@
+"""Memory and time of large result sets: legacy rows vs slotted, cached rows.
+
+The legacy variant reproduces the previous row class (no ``__slots__``) and the previous
+``EnvCheckResults.rows``, which rebuilt every row on each access.
+
+Usage: python benchmarks/bench_results.py [--rows 100000] [--accesses 10]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from generators import make_spec
+
+from checkenv import EnvCheckResults
+
+
+class LegacyRow:
+    def __init__(self, env_name, default=None, description=None):
+        self._env_name = env_name
+        self._default = default
+        self._description = description
+
+
+class LegacyResults(EnvCheckResults):
+    def _single_row(self, name):
+        default = None
+        desc = None
+        if isinstance(self._spec[name], dict):
+            default = self._spec[name].get("default", None)
+            desc = self._spec[name].get("description", None)
+        return LegacyRow(name, default, desc)
+
+    @property
+    def rows(self):
+        return list(map(self._single_row, self._env_var_names))
+
+
+def measure(results: EnvCheckResults, accesses: int) -> tuple[float, float, float]:
+    tracemalloc.start()
+    rows = results.rows
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+
+    start = time.perf_counter()
+    for _ in range(accesses):
+        results.rows  # noqa: B018
+    rows_time = time.perf_counter() - start
+
+    # looking up a single variable's row, as a health endpoint would
+    name = f"BENCH_VAR_{len(results) // 2}"
+    start = time.perf_counter()
+    for _ in range(accesses):
+        if isinstance(results, LegacyResults):
+            next(row for row in results.rows if row._env_name == name)
+        else:
+            results.index[name]  # noqa: B018
+    lookup_time = time.perf_counter() - start
+    return peak / 2**20, rows_time, lookup_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--accesses", type=int, default=10)
+    args = parser.parse_args()
+
+    spec = make_spec(args.rows)
+    print(f"{args.rows} rows, {args.accesses} accesses to .rows and single row lookups")
+    print(f"{'variant':>8} {'rows MiB':>10} {'.rows (ms)':>12} {'lookups (ms)':>14}")
+    for label, results_class in (("legacy", LegacyResults), ("cached", EnvCheckResults)):
+        results = results_class(list(spec), spec, EnvCheckResults.MISSING)
+        memory, rows_time, lookup_time = measure(results, args.accesses)
+        print(f"{label:>8} {memory:>10.2f} {rows_time * 1000:>12.3f} {lookup_time * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
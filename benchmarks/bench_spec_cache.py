@@ -0,0 +1,48 @@
+"""Cold vs warm ``CheckEnv.load_spec_file`` timings with the on-disk spec cache.
+
+Usage: python benchmarks/bench_spec_cache.py [--keys 10 1000 10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from generators import make_spec
+
+from checkenv import CheckEnv
+
+
+def time_load(filename: str, cache_dir: str | None, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        instance = CheckEnv(env_filename=filename, cache_dir=cache_dir)
+        start = time.perf_counter()
+        instance.load_spec_file()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'cold (ms)':>12} {'warm (ms)':>12} {'speedup':>8}")
+    for keys in args.keys:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "env.json")
+            with open(filename, "w", encoding="utf-8") as spec_file:
+                json.dump(make_spec(keys), spec_file)
+            cache_dir = os.path.join(tmp_dir, "cache")
+
+            cold = time_load(filename, None, args.repeat)
+            time_load(filename, cache_dir, 1)  # populate the cache
+            warm = time_load(filename, cache_dir, args.repeat)
+        print(f"{keys:>8} {cold * 1000:>12.3f} {warm * 1000:>12.3f} {cold / warm:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
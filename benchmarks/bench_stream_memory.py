@@ -0,0 +1,86 @@
+"""Peak RSS of ``CheckEnv.load_spec_file`` with and without ``streaming``, for large generated specs
+with long descriptions.
+
+Each load runs in a fresh interpreter, which loads and applies the spec against an environment
+that sets ``--set-ratio`` of its variables, renders the results to a discarded stream, and reports
+its peak RSS (``ru_maxrss``) before and after. The peak before loading, which covers the
+interpreter, importing checkenv and building the environment, is shown as the baseline; since the
+peak never goes down, a loader that stays below it shows no growth at all.
+
+Usage: python benchmarks/bench_stream_memory.py [--keys 10000 100000] [--description 500]
+    [--set-ratio 0.99]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from generators import make_spec
+
+# runs in the child interpreter; prints the peak RSS before and after loading, in KiB
+CHILD = """
+import io, os, resource, sys
+from checkenv import CheckEnv
+from checkenv.render import PlainTextRenderer
+
+keys, set_ratio = int(sys.argv[3]), float(sys.argv[4])
+# a plain dict rather than the real environment, which cannot hold 100k variables
+os.environ = {f"BENCH_VAR_{index}": "value" for index in range(round(keys * set_ratio))}
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+env = CheckEnv(sys.argv[1], streaming=sys.argv[2] == "stream")
+env.load_spec_file()
+env.apply_spec(dry_run=True)
+env.render(PlainTextRenderer(stream=io.StringIO()))
+print(before, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def peak_rss_kib(filename: str, mode: str, keys: int, set_ratio: float) -> tuple[int, int]:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, filename, mode, str(keys), str(set_ratio)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    ).stdout
+    before, after = map(int, output.split())
+    return before, after
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--description", type=int, default=500, help="description length")
+    parser.add_argument("--set-ratio", type=float, default=0.99, help="share of variables set")
+    args = parser.parse_args()
+
+    print(
+        f"{'keys':>8} {'file (MiB)':>11} {'baseline (MiB)':>15} {'load (MiB)':>11}"
+        f" {'stream (MiB)':>13} {'growth saved':>13}"
+    )
+    for keys in args.keys:
+        spec = make_spec(keys)
+        padding = "x" * args.description
+        for entry in spec.values():
+            if isinstance(entry, dict):
+                entry["description"] += padding
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, "env.json")
+            with open(filename, "w", encoding="utf-8") as spec_file:
+                json.dump(spec, spec_file)
+            size = os.path.getsize(filename) / 1024**2
+            del spec
+            baseline, load = peak_rss_kib(filename, "load", keys, args.set_ratio)
+            _, stream = peak_rss_kib(filename, "stream", keys, args.set_ratio)
+        saved = 1 - (stream - baseline) / (load - baseline) if load > baseline else 0.0
+        print(
+            f"{keys:>8} {size:>11.1f} {baseline / 1024:>15.1f} {load / 1024:>11.1f}"
+            f" {stream / 1024:>13.1f} {saved:>13.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
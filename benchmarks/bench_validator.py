@@ -0,0 +1,43 @@
+"""Built-in spec validator vs jsonschema reference validation timings.
+
+Usage: python benchmarks/bench_validator.py [--keys 100 10000 50000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import jsonschema
+from generators import make_spec
+
+from checkenv import CheckEnv
+from checkenv.validator import validate_spec
+
+
+def best_of(func, spec, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(spec)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, nargs="+", default=[100, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'jsonschema (ms)':>16} {'built-in (ms)':>14} {'speedup':>8}")
+    for keys in args.keys:
+        spec = make_spec(keys)
+        reference = best_of(lambda s: jsonschema.validate(s, CheckEnv._schema), spec, args.repeat)
+        builtin = best_of(validate_spec, spec, args.repeat)
+        print(
+            f"{keys:>8} {reference * 1000:>16.3f} {builtin * 1000:>14.3f} "
+            f"{reference / builtin:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Synthetic spec and environment generators shared by the benchmarks.
+
+Generated specs are deterministic: entries are spread evenly over the spec by their ratios
+instead of being drawn at random, so the same arguments always produce the same spec.
+"""
+
+import random
+
+# named spec shapes for the suite: (bool entry ratio, default ratio, required ratio)
+MIXES: dict[str, tuple[float, float, float]] = {
+    "mixed": (1 / 3, 1 / 2, 1 / 2),
+    "bools": (1.0, 0.0, 1 / 2),
+    "defaults": (0.0, 1.0, 1.0),
+}
+
+
+def _picked(index: int, ratio: float) -> bool:
+    """Picks ``ratio`` of all indexes, spread evenly"""
+    return int((index + 1) * ratio) != int(index * ratio)
+
+
+def make_spec(
+    keys: int,
+    bool_ratio: float = 1 / 3,
+    default_ratio: float = 1 / 2,
+    required_ratio: float = 1 / 2,
+    prefix: str = "BENCH_VAR_",
+) -> dict:
+    """Generates a spec with ``keys`` variables named ``{prefix}{index}``.
+
+    ``bool_ratio`` of the entries are plain booleans and the rest are objects with a description.
+    ``default_ratio`` of the object entries have a default, and ``required_ratio`` of the entries
+    without a default are required.
+    """
+    spec: dict = {}
+    objects = 0
+    for index in range(keys):
+        name = f"{prefix}{index}"
+        required = _picked(index, required_ratio)
+        if _picked(index, bool_ratio):
+            spec[name] = required
+            continue
+        entry: dict = {"description": f"description for {name}"}
+        if _picked(objects, default_ratio):
+            entry["default"] = index
+        elif not required:
+            entry["required"] = False
+        spec[name] = entry
+        objects += 1
+    return spec
+
+
+def make_mix(keys: int, mix: str) -> dict:
+    """Generates a spec with one of the named shapes in MIXES"""
+    return make_spec(keys, *MIXES[mix])
+
+
+def make_env(spec: dict, set_ratio: float = 1 / 2, extra: int = 50, seed: int = 0) -> dict:
+    """Generates an environment that sets ``set_ratio`` of the spec's variables, chosen at
+    random, along with ``extra`` unrelated variables like a real environment has.
+    """
+    rng = random.Random(seed)
+    names = list(spec)
+    env = {name: "value" for name in rng.sample(names, round(len(names) * set_ratio))}
+    env.update((f"UNRELATED_VAR_{index}", "value") for index in range(extra))
+    return env
@@ -0,0 +1,229 @@
+"""The checkenv benchmark suite: per-phase, end-to-end and cold-process timings.
+
+For each spec size and shape (see generators.MIXES), the suite times every phase of a check
+separately (read, parse, validate, apply and render, as recorded by CheckEnv.stats), building
+the result rows, and an end-to-end ``check()``. It also times importing checkenv and running a
+whole check in a fresh interpreter. Each benchmark runs ``--repeat`` times; the minimum and median
+are written to a JSON results file.
+
+With ``--compare``, results are compared against a stored baseline and the script exits with 1 if
+any benchmark got slower than the threshold allows.
+
+Usage:
+    python benchmarks/run_suite.py [--keys 10 1000 100000] [--mix mixed bools defaults]
+        [--repeat 5] [--output results.json]
+    python benchmarks/run_suite.py --compare baseline.json [--output results.json]
+    python benchmarks/run_suite.py --compare baseline.json --current results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from functools import partial
+
+from generators import MIXES, make_env, make_mix
+
+from checkenv import CheckEnv, EnvCheckResults, check
+from checkenv.exceptions import CheckEnvException
+from checkenv.render import ColorConsoleRenderer
+
+PHASES = ("read", "parse", "validate", "apply", "render")
+
+
+@contextlib.contextmanager
+def patched_environ(env: dict) -> Iterator[None]:
+    """Swaps os.environ for a copy of ``env`` for the duration of the block.
+
+    A plain dict is used rather than the real environment: glibc's setenv scans the whole
+    environment, so writing 100k variables into it would time libc rather than checkenv.
+    bench_apply.py covers writes to the real os.environ.
+    """
+    saved = os.environ
+    os.environ = dict(env)  # type: ignore[assignment]  # noqa: B003
+    try:
+        yield
+    finally:
+        os.environ = saved  # noqa: B003
+
+
+def summarize(samples_ns: list[int]) -> dict:
+    return {
+        "min_ns": min(samples_ns),
+        "median_ns": int(statistics.median(samples_ns)),
+        "runs": len(samples_ns),
+    }
+
+
+def time_ns(func: Callable[[], object]) -> int:
+    start = time.perf_counter_ns()
+    func()
+    return time.perf_counter_ns() - start
+
+
+def build_rows(names: list[str], spec: dict) -> None:
+    EnvCheckResults(names, spec, EnvCheckResults.MISSING).rows  # noqa: B018
+
+
+def run_check(filename: str) -> None:
+    with contextlib.suppress(CheckEnvException):
+        check(filename, raise_exception=True, no_output=True)
+
+
+def bench_spec(filename: str, env: dict, repeat: int) -> dict[str, dict]:
+    """Times each phase of a check, building the rows and an end-to-end check of one spec file"""
+    phases: dict[str, list[int]] = {phase: [] for phase in PHASES}
+    rows = []
+    end_to_end = []
+    for _ in range(repeat):
+        with patched_environ(env):
+            instance = CheckEnv(env_filename=filename)
+            instance.load_spec_file()
+            instance.apply_spec()
+            instance.render(ColorConsoleRenderer(stream=io.StringIO()))
+        for phase in PHASES:
+            phases[phase].append(instance.stats.durations_ns[phase])
+        names = instance.missing + instance.optional
+        rows.append(time_ns(partial(build_rows, names, instance.spec)))
+        with patched_environ(env):
+            end_to_end.append(time_ns(partial(run_check, filename)))
+    results = {f"phase.{phase}": summarize(samples) for phase, samples in phases.items()}
+    results["rows"] = summarize(rows)
+    results["check"] = summarize(end_to_end)
+    return results
+
+
+def time_process(code: str, repeat: int) -> list[int]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        subprocess.run([sys.executable, "-c", code], check=False, capture_output=True)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+def bench_cold_process(filename: str, repeat: int) -> dict[str, dict]:
+    """Times fresh interpreters, minus the cost of starting a bare interpreter"""
+    bare = min(time_process("pass", repeat))
+    import_samples = time_process("import checkenv", repeat)
+    check_code = f"import checkenv; checkenv.check({filename!r}, no_output=True)"
+    startup_samples = time_process(check_code, repeat)
+    return {
+        "process.import": summarize([max(sample - bare, 0) for sample in import_samples]),
+        "process.check": summarize([max(sample - bare, 0) for sample in startup_samples]),
+    }
+
+
+def run_suite(keys: list[int], mixes: list[str], repeat: int) -> dict:
+    results: dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mix in mixes:
+            for size in keys:
+                spec = make_mix(size, mix)
+                filename = os.path.join(tmp_dir, f"{mix}_{size}.json")
+                with open(filename, "w", encoding="utf-8") as spec_file:
+                    json.dump(spec, spec_file)
+                for name, summary in bench_spec(filename, make_env(spec), repeat).items():
+                    results[f"{name}[{mix},{size}]"] = summary
+                print(f"  {mix:>8} {size:>8} keys done", file=sys.stderr)
+        cold_spec = os.path.join(tmp_dir, "cold.json")
+        with open(cold_spec, "w", encoding="utf-8") as spec_file:
+            json.dump(make_mix(min(keys), "mixed"), spec_file)
+        for name, summary in bench_cold_process(cold_spec, repeat).items():
+            results[f"{name}[mixed,{min(keys)}]"] = summary
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_delta_ns: int) -> list[str]:
+    """Prints the change of every benchmark's minimum and returns the names of regressions.
+
+    A benchmark regressed if it got more than ``threshold`` slower and by more than
+    ``min_delta_ns``, which keeps timer noise on tiny benchmarks from being flagged.
+    """
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline (ms)':>14} {'current (ms)':>13} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<36} {'-':>14} {result['min_ns'] / 1e6:>13.3f} {'new':>8}")
+            continue
+        delta = result["min_ns"] - base["min_ns"]
+        change = delta / base["min_ns"] if base["min_ns"] else 0.0
+        regressed = change > threshold and delta > min_delta_ns
+        flag = "  REGRESSION" if regressed else ""
+        print(
+            f"{name:<36} {base['min_ns'] / 1e6:>14.3f} {result['min_ns'] / 1e6:>13.3f} "
+            f"{change:>+8.1%}{flag}"
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0], formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--mix", nargs="+", choices=list(MIXES), default=list(MIXES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="baseline results file to compare with")
+    parser.add_argument(
+        "--current", default=None, help="compare this results file instead of running the suite"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.10, help="allowed slowdown (default: 0.10)"
+    )
+    parser.add_argument(
+        "--min-delta-us",
+        type=float,
+        default=20.0,
+        help="ignore slowdowns smaller than this many microseconds (default: 20)",
+    )
+    args = parser.parse_args()
+
+    if args.current is not None:
+        with open(args.current, encoding="utf-8") as current_file:
+            current = json.load(current_file)
+    else:
+        current = run_suite(args.keys, args.mix, args.repeat)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(current, output_file, indent=2)
+
+    if args.compare is None:
+        print(f"{'benchmark':<36} {'min (ms)':>10} {'median (ms)':>12}")
+        for name, result in current["results"].items():
+            print(f"{name:<36} {result['min_ns'] / 1e6:>10.3f} {result['median_ns'] / 1e6:>12.3f}")
+        return 0
+
+    with open(args.compare, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(baseline, current, args.threshold, int(args.min_delta_us * 1000))
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
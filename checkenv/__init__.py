@@ -1,43 +1,77 @@
 """This module includes the logic for checkenv functionality."""
 
-import json
 import os
 import sys
-from typing import Any
+from collections.abc import Mapping, Sequence
+from functools import cached_property
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, NoReturn
 
-from colorama import Back, Fore, Style, init
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+from checkenv.exceptions import CheckEnvException, format_suggestions
+from checkenv.include import INCLUDE_KEY
+from checkenv.instrument import (
+    PHASE_APPLY,
+    PHASE_INCLUDE,
+    PHASE_PARSE,
+    PHASE_READ,
+    PHASE_RENDER,
+    PHASE_VALIDATE,
+    CheckStats,
+)
+from checkenv.many import check_many as check_many
+from checkenv.spec import CompiledSpec, is_pattern_key
 
-from checkenv.exceptions import CheckEnvException
+if TYPE_CHECKING:
+    from checkenv.cache import SpecCache
+    from checkenv.lazy import LazyConfig
+    from checkenv.namespaces import NamespaceIndex
+    from checkenv.outcome import Outcome, OutcomeCache
+    from checkenv.overlay import ResolvedConfig
+    from checkenv.render import Renderer
+    from checkenv.spec import SpecEvaluation
 
-init()
+# json, jsonschema, colorama, the spec cache and the renderers are comparatively expensive to
+# import, so they are only imported on the code paths that need them (parsing and validating a
+# spec on a cache miss, using a cache directory, rendering output)
 
-
-_DEFAULT_NOT_PROVIDED = object()
 EnvDefault = str | int | float | bool
 
 
 class EnvCheckResultRow:
     """Utilty class to keep track of environment variable specs.
 
-    It was primarily written to make it easier to print color text to console."""
+    It was primarily written to make it easier to print color text to console. Rows are
+    read-only and slotted, so large result sets stay compact."""
+
+    __slots__ = ("_env_name", "_default", "_description", "_error", "_suggestions", "_source")
 
     def __init__(
         self,
         env_name: str,
         default: EnvDefault | None = None,
         description: str | None = None,
+        error: str | None = None,
+        suggestions: tuple[str, ...] = (),
+        source: str | None = None,
     ) -> None:
         self._env_name = env_name
         self._default = default
         self._description = description
+        self._error = error
+        self._suggestions = suggestions
+        self._source = source
 
     def __repr__(self) -> str:
-        # {name} {(default=...)} {description}
+        # {name} {(default=...)} {(invalid: ...)} {(did you mean ...?)} {(from ...)} {description}
         row_string = self._env_name
         if self._default is not None:
             row_string += f" (default={self._default})"
+        if self._error is not None:
+            row_string += f" (invalid: {self._error})"
+        if self._suggestions:
+            row_string += f" ({format_suggestions(self._suggestions)})"
+        if self._source is not None:
+            row_string += f" (from {self._source})"
         if self._description:
             row_string += f" {self._description}"
         return row_string
@@ -57,33 +91,69 @@ class EnvCheckResultRow:
         """A description of the environment variable, if provided"""
         return self._description
 
+    @property
+    def error(self) -> str | None:
+        """Why the value of the environment variable is invalid, for rows in the INVALID section"""
+        return self._error
+
+    @property
+    def suggestions(self) -> tuple[str, ...]:
+        """Similar names that are set in the environment, for rows in the MISSING section"""
+        return self._suggestions
+
+    @property
+    def source(self) -> str | None:
+        """The included spec file that defined the environment variable, if any"""
+        return self._source
+
 
 class EnvCheckResults:
     """Utility class to encapsulate the objects and properties necessary for
     sharing and customizing the results of the checkenv process.
     """
 
-    # constants for printing messages in color
-    _COLORS_HEADER_MANDATORY = Back.RED + Fore.WHITE
-    _COLORS_HEADER_OPTIONAL = Back.YELLOW + Fore.BLACK
-    _COLORS_ENV_NAME_TEXT = Fore.BLUE
-    _COLORS_DEFAULT_TEXT = Fore.YELLOW
-    _COLORS_RESET = Style.RESET_ALL
-
     # pseudo-enums for class initialization
     MISSING = "missing"
     OPTIONAL = "optional"
+    INVALID = "invalid"
+    UNDECLARED = "undeclared"
 
-    def __init__(self, env_var_names: list[str], spec: dict[str, Any], section: str) -> None:
+    # header suffix per section
+    _SUFFIXES = {
+        MISSING: "required",
+        OPTIONAL: "missing (but optional)",
+        INVALID: "invalid",
+        UNDECLARED: "not declared in the spec",
+    }
+
+    def __init__(
+        self,
+        env_var_names: list[str],
+        spec: dict[str, Any],
+        section: str,
+        errors: Mapping[str, str] | None = None,
+        suggestions: Mapping[str, list[str]] | None = None,
+        sources: Mapping[str, str] | None = None,
+        descriptions: Mapping[str, str] | None = None,
+    ) -> None:
         self._env_var_names = env_var_names
         self._spec = spec
         self._section = section
+        self._errors = errors
+        self._suggestions = suggestions
+        self._sources = sources
+        self._descriptions = descriptions
 
     def __repr__(self) -> str:
-        result = self.header
-        for row in self.rows:
-            result += "\n" + str(row)
-        return result
+        return "\n".join([self.header, *map(str, self.rows)])
+
+    def __len__(self) -> int:
+        return len(self._env_var_names)
+
+    @property
+    def section(self) -> str:
+        """The section these results belong to, MISSING, OPTIONAL, INVALID or UNDECLARED"""
+        return self._section
 
     def _plural_string(self, length: int) -> str:
         """A cheap way to pluralize the header text"""
@@ -92,28 +162,49 @@ class EnvCheckResults:
     @property
     def header(self) -> str:
         """Returns a header string summarizing the environment variables for this section"""
-        suffix = "required" if self._section == self.MISSING else "missing (but optional)"
+        suffix = self._SUFFIXES[self._section]
         length = len(self._env_var_names)
         plural = self._plural_string(length)
         return f"The following {length} environment variable{plural} {suffix}"
 
     def _single_row(self, name: str) -> EnvCheckResultRow:
         """Encapsulates a single row as a EnvCheckResultRow object."""
-        default = None
-        desc = None
-        if isinstance(self._spec[name], dict):
-            default = self._spec[name].get("default", None)
-            desc = self._spec[name].get("description", None)
-        return EnvCheckResultRow(name, default, desc)
+        # undeclared variables have no entry
+        entry = self._spec.get(name)
+        error = None if self._errors is None else self._errors.get(name)
+        suggestions = () if self._suggestions is None else tuple(self._suggestions.get(name, ()))
+        source = None if self._sources is None else self._sources.get(name)
+        if isinstance(entry, dict):
+            description = entry.get("description", None)
+            if description is None and self._descriptions is not None:
+                # streamed specs load descriptions only for the rows that show them
+                description = self._descriptions.get(name)
+            return EnvCheckResultRow(
+                name,
+                entry.get("default", None),
+                description,
+                error,
+                suggestions,
+                source,
+            )
+        return EnvCheckResultRow(name, error=error, suggestions=suggestions, source=source)
 
-    @property
-    def rows(self) -> list[EnvCheckResultRow]:
-        """Returns a list of objects that represent individual rows.
+    @cached_property
+    def rows(self) -> tuple[EnvCheckResultRow, ...]:
+        """Returns a tuple of objects that represent individual rows.
 
         These are returned as objects so they can be used (logged, printed,
-        to the console in color, etc. later)
+        to the console in color, etc. later). The rows are built once, on first access.
         """
-        return list(map(self._single_row, self._env_var_names))
+        return tuple(map(self._single_row, self._env_var_names))
+
+    @cached_property
+    def index(self) -> Mapping[str, EnvCheckResultRow]:
+        """Returns a read-only mapping of environment variable name to row, built once"""
+        return MappingProxyType({row.name: row for row in self.rows})
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.index
 
     def print_console_color(self) -> None:
         """Prints the results of the checkenv process to the console using
@@ -121,26 +212,9 @@ class EnvCheckResults:
 
         This is the classic visual from the npm checkenv module.
         """
-        header_color = None
-        if self._section == self.MISSING:
-            header_color = self._COLORS_HEADER_MANDATORY
-        else:
-            header_color = self._COLORS_HEADER_OPTIONAL
-
-        print(header_color)
-        print(self.header, end="")
-        print(self._COLORS_RESET)
-        for row in self.rows:
-            print(self._COLORS_ENV_NAME_TEXT, end="")
-            print(row.name, end="")
-            print(self._COLORS_RESET, end="")
-            if row.default is not None:
-                print(self._COLORS_DEFAULT_TEXT, end="")
-                print(f" (default={row.default})", end="")
-                print(self._COLORS_RESET, end="")
-            if row.description:
-                print(f" {row.description}", end="")
-            print(self._COLORS_RESET)
+        from checkenv.render import ColorConsoleRenderer
+
+        ColorConsoleRenderer().render([self])
 
 
 class CheckEnv:
@@ -148,7 +222,8 @@ class CheckEnv:
     that environment variables are set appropriately.
     """
 
-    # the acceptable schema for env_filename
+    # the acceptable schema for env_filename; checkenv.validator implements the same rules
+    # without jsonschema and is used unless strict validation is requested
     _schema = {
         "type": "object",
         "patternProperties": {
@@ -166,6 +241,44 @@ class CheckEnv:
                                     {"type": "boolean"},
                                 ]
                             },
+                            "type": {
+                                "enum": [
+                                    "string",
+                                    "enum",
+                                    "int",
+                                    "float",
+                                    "bool",
+                                    "regex",
+                                    "url",
+                                    "duration",
+                                ]
+                            },
+                            "min": {"type": "number"},
+                            "max": {"type": "number"},
+                            "pattern": {"type": "string", "format": "regex"},
+                            "choices": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "minItems": 1,
+                            },
+                        },
+                        "additionalProperties": False,
+                        "if": {"properties": {"type": {"const": "enum"}}, "required": ["type"]},
+                        "then": {"required": ["choices"]},
+                    },
+                    {"type": "boolean"},
+                ]
+            },
+            # glob (FEATURE_*) and regular expression (/SHARD_[0-9]+_DSN/) pattern keys
+            "^(?:[a-zA-Z0-9_]*[*?][a-zA-Z0-9_*?]*|/.+/)$": {
+                "oneOf": [
+                    {
+                        "type": "object",
+                        "properties": {
+                            "required": {"type": "boolean"},
+                            "description": {"type": "string"},
+                            "min_count": {"type": "integer", "minimum": 0},
+                            "require_value": {"type": "boolean"},
                         },
                         "additionalProperties": False,
                     },
@@ -173,85 +286,434 @@ class CheckEnv:
                 ]
             },
         },
+        "propertyNames": {"format": "checkenv-pattern-key"},
         "additionalProperties": False,
     }
 
-    def __init__(self, env_filename: str = "env.json") -> None:
+    def __init__(
+        self,
+        env_filename: str = "env.json",
+        cache_dir: str | None = None,
+        strict: bool = False,
+        dotenv_files: Sequence[str] = (),
+        secret_files: bool = False,
+        dotenv_override: bool = False,
+        outcome_cache: str | None = None,
+        streaming: bool = False,
+        spec_format: str | None = None,
+        namespaces: Sequence[str] = (),
+        fail_on_undeclared: bool = False,
+    ) -> None:
         self._env_filename = env_filename
+        self._strict = strict
+        self._streaming = streaming
+        self._spec_format = spec_format
+        self._dotenv_files = dotenv_files
+        self._secret_files = secret_files
+        self._dotenv_override = dotenv_override
+        self._cache: SpecCache | None = None
+        if cache_dir is not None and not streaming:
+            from checkenv import cache
+
+            self._cache = cache.SpecCache(cache_dir)
+        self._outcomes: OutcomeCache | None = None
+        if outcome_cache is not None and not (dotenv_files or secret_files or streaming):
+            from checkenv import outcome
+
+            self._outcomes = outcome.OutcomeCache(outcome_cache)
+        self._namespaces: NamespaceIndex | None = None
+        if namespaces:
+            from checkenv import namespaces as namespace_index
+
+            self._namespaces = namespace_index.NamespaceIndex(namespaces)
+        self._fail_on_undeclared = fail_on_undeclared
+        # the outcome cache key of the loaded spec file, and its entry on an outcome cache hit
+        self._outcome_key: tuple[Any, ...] | None = None
+        self._outcome_entry: dict[str, Any] | None = None
         self._spec: dict[str, Any] | None = None
+        self._compiled: CompiledSpec | None = None
         self._missing: list[str] = []
         self._optional: list[str] = []
+        self._defaults: dict[str, str] = {}
+        self._invalid: Mapping[str, str] = {}
+        self._undeclared: list[str] = []
+        self._values: Mapping[str, Any] = {}
+        self._matches: Mapping[str, list[str]] = {}
+        self._suggestions: Mapping[str, list[str]] = {}
+        self._sources: Mapping[str, str] = {}
+        self._fragments: tuple[str, ...] = ()
+        self._descriptions: Mapping[str, str] | None = None
+        self._value_sources: Mapping[str, str] = {}
+        self._results: list[EnvCheckResults] | None = None
+        self._config: ResolvedConfig | None = None
+        self._stats = CheckStats()
 
     def _reset(self) -> None:
-        """Resets missing and optional lists"""
+        """Resets the loaded spec, the missing, optional and default results and the stats"""
+        self._stats = CheckStats()
+        self._compiled = None
+        self._outcome_key = None
+        self._outcome_entry = None
         self._missing = []
         self._optional = []
+        self._defaults = {}
+        self._invalid = {}
+        self._undeclared = []
+        self._values = {}
+        self._matches = {}
+        self._suggestions = {}
+        self._sources = {}
+        self._fragments = ()
+        self._descriptions = None
+        self._value_sources = {}
+        self._results = None
+        self._config = None
 
     def load_spec_file(self) -> None:
         """Loads the env var spec file, verifies it adheres to JSON schema
 
+        If a cache directory was configured, a previously validated copy of an unchanged spec
+        file is reused instead of parsing and validating it again.
+
+        Spec files listed under ``"$include"`` are merged in (see checkenv.include).
+
+        If an outcome cache was configured and holds an entry for the unchanged spec file, the
+        spec stored with it is used, without parsing or validating anything (see
+        checkenv.outcome).
+
+        The spec file is parsed in the format its name selects, unless a ``spec_format`` was given
+        (see checkenv.loaders).
+
+        In streaming mode, JSON spec files are parsed and validated entry by entry, and only the
+        entries without their descriptions are kept (see checkenv.stream). Neither cache is used.
+
         Raises jsonschema.exceptions.ValidationError if input env.json file is malformed.
         Raises FileNotFoundError if the spec file cannot be found.
+        Raises ValueError if the spec file cannot be parsed.
         """
         self._reset()
-        with open(self._env_filename, encoding="utf-8") as jsonfile:
-            jdata = json.load(jsonfile)
-            validate(jdata, self._schema)
-            self._spec = jdata
+        from checkenv.loaders import parse_spec, spec_format_for
 
-    def _check_and_set(
-        self,
-        name: str,
-        required: bool,
-        default: EnvDefault | object = _DEFAULT_NOT_PROVIDED,
-    ) -> None:
-        """Applies the spec against a single environment variable.
+        spec_format = spec_format_for(self._env_filename, self._spec_format)
+        if self._streaming and spec_format == "json":
+            self._load_spec_stream()
+            return
+        stats = self._stats
+        cached = None
+        started = stats.start(PHASE_READ)
+        try:
+            with open(self._env_filename, "rb") as jsonfile:
+                stat = os.fstat(jsonfile.fileno())
+                raw = jsonfile.read()
+            if self._outcomes is not None:
+                self._outcome_key = self._outcomes.spec_key(self._env_filename, raw)
+                self._outcome_entry = self._outcomes.load(self._outcome_key)
+            if self._outcome_entry is None and self._cache is not None:
+                cached = self._cache.load(self._env_filename, stat, raw, spec_format)
+                stats.cache_hit = cached is not None
+        finally:
+            stats.stop(PHASE_READ, started)
+        if self._outcome_entry is not None:
+            self._spec = self._outcome_entry["spec"]
+            self._sources = self._outcome_entry["sources"]
+            stats.keys = len(self._spec)
+            return
+        if cached is not None:
+            self._set_spec(cached)
+            return
+
+        started = stats.start(PHASE_PARSE)
+        try:
+            jdata = parse_spec(raw, self._env_filename, spec_format)
+        finally:
+            stats.stop(PHASE_PARSE, started)
+        started = stats.start(PHASE_VALIDATE)
+        try:
+            if isinstance(jdata, dict) and INCLUDE_KEY in jdata:
+                from checkenv.include import split_includes
+
+                self._validate(split_includes(jdata)[0])
+            else:
+                self._validate(jdata)
+        finally:
+            stats.stop(PHASE_VALIDATE, started)
+        if self._cache is not None:
+            # the cached spec keeps its includes, so changed fragments are always picked up
+            self._cache.store(self._env_filename, stat, raw, jdata, spec_format)
+        self._set_spec(jdata)
 
-        If an environment variable is not set and a default value is provided,
-        this method will apply the default value and mark the environment
-        variable as optional.
+    def _load_spec_stream(self) -> None:
+        """Loads the spec file with checkenv.stream, timing reading, parsing and validating it,
+        which happen together, as the parse phase.
         """
-        # see if name is defined
-        value = os.getenv(name, None)
-        if value is None:
-            if default is not _DEFAULT_NOT_PROVIDED:
-                os.environ[name] = str(default)
-                self._optional.append(name)
-            else:  # see if this was mandatory or optional
-                if required:
-                    self._missing.append(name)
-                else:
-                    self._optional.append(name)
-
-    def apply_spec(self) -> None:
-        """Iterate over the spec definitions and apply against the current environment.
-
-        Determines the mandatory and optional environment variables.
-
-        Applies any default values (if supplied, and if the the environment variable
-        isn't already set.
+        from checkenv.stream import load_spec_stream
+
+        stats = self._stats
+        started = stats.start(PHASE_PARSE)
+        try:
+            streamed = load_spec_stream(
+                self._env_filename, self._validate if self._strict else None
+            )
+        finally:
+            stats.stop(PHASE_PARSE, started)
+        self._descriptions = streamed.descriptions
+        self._set_spec(streamed.spec)
+
+    def _set_spec(self, jdata: dict[str, Any]) -> None:
+        """Sets a validated spec, merged with the spec files it includes, if any"""
+        stats = self._stats
+        if INCLUDE_KEY in jdata:
+            from checkenv.include import compose
+
+            started = stats.start(PHASE_INCLUDE)
+            try:
+                composed = compose(self._env_filename, jdata, self._validate, self._strict)
+            finally:
+                stats.stop(PHASE_INCLUDE, started)
+            jdata = composed.spec
+            self._sources = composed.sources
+            self._fragments = composed.fragments
+        self._spec = jdata
+        stats.keys = len(jdata)
+
+    async def load_spec_file_async(self) -> None:
+        """Loads the spec file like `load_spec_file`, but reads, parses and validates it in a
+        worker thread, so the event loop is not blocked by slow file systems or large specs.
+
+        Raises the same exceptions as `load_spec_file`.
+        """
+        import asyncio
+
+        await asyncio.to_thread(self.load_spec_file)
+
+    def load_compiled_spec(self, spec: dict[str, Any], compiled: CompiledSpec) -> None:
+        """Loads a spec that was validated and compiled ahead of time, e.g. by checkenv.compiler,
+        without reading the spec file.
+        """
+        self._reset()
+        self._spec = spec
+        self._compiled = compiled
+        self._stats.keys = len(compiled)
+
+    def _validate(self, jdata: Any) -> None:
+        """Validates a parsed spec against the spec schema.
+
+        By default this uses checkenv's built-in spec validator, which reports every violation at
+        once. In strict mode the spec is validated by jsonschema against the reference _schema.
+        """
+        if self._strict:
+            from jsonschema import validate
+
+            from checkenv.validator import strict_format_checker
+
+            validate(jdata, self._schema, format_checker=strict_format_checker())
+        else:
+            from checkenv.validator import validate_spec
+
+            validate_spec(jdata)
+
+    @property
+    def spec(self) -> dict[str, Any] | None:
+        """Returns the loaded spec, or None if no spec file has been loaded yet.
+
+        In streaming mode, the entries of the spec file itself have no descriptions.
+        """
+        return self._spec
+
+    @property
+    def sources(self) -> Mapping[str, str]:
+        """Returns the spec file that defined each entry of the loaded spec, if the spec file
+        includes other spec files; empty otherwise.
+        """
+        return MappingProxyType(self._sources)
+
+    @property
+    def fragments(self) -> tuple[str, ...]:
+        """Returns every spec file the loaded spec includes, transitively; empty if it includes
+        none.
+        """
+        return self._fragments
+
+    @property
+    def compiled_spec(self) -> CompiledSpec:
+        """Returns the loaded spec in its compiled form, which can be evaluated against any
+        environment mapping.
+        """
+        if self._spec is None:
+            raise RuntimeError("Cannot compile checkenv spec before loading a spec file")
+        if self._compiled is None:
+            self._compiled = CompiledSpec.from_spec(self._spec)
+        return self._compiled
+
+    def apply_spec(self, dry_run: bool = False) -> None:
+        """Evaluates the spec against a snapshot of the current environment.
+
+        Determines the mandatory and optional environment variables in a single pass, then
+        applies any default values (if supplied, and if the environment variable isn't already
+        set) to os.environ in one batch.
+
+        Either way, the environment snapshot with the defaults layered on top is available from
+        `config`, which is all a dry run needs to resolve the configuration without touching
+        os.environ.
+
+        If ``.env`` files or ``*_FILE`` secrets were requested, they are loaded first (see
+        checkenv.envfiles), layered over the snapshot, and written to os.environ together with
+        the defaults. Secret files that cannot be read make their variables invalid.
+
+        If namespaces were given, the variables in them that the spec does not declare are
+        available from `undeclared` (see checkenv.namespaces).
+
+        With an outcome cache, a previous outcome for the same values of the spec's variables is
+        reused instead of evaluating the spec again, and `stats` tells whether it was. Only the
+        coerced values of typed variables are recomputed, since they are not plain data.
+
+        :param dry_run: Compute the missing, optional and default values without modifying
+            os.environ; the defaults that would have been applied are available from `defaults`
+        :type dry_run: bool, optional
         """
-        # _self.spec is a dictionary with each key representing an env to check
-        # 'key' is the environment variable name
-        # 'value' is either a boolean to indicate required, or a dict with more params
         if self._spec is None:
             raise RuntimeError("Cannot apply checkenv spec before loading a spec file")
+        from checkenv.overlay import ResolvedConfig, snapshot_environ
+
+        stats = self._stats
+        started = stats.start(PHASE_APPLY)
+        try:
+            snapshot = snapshot_environ()
+            outcome = fingerprint = None
+            if self._outcomes is not None and self._outcome_key is not None:
+                outcome, fingerprint = self._cached_outcome(snapshot)
+                stats.outcome_hit = outcome is not None
+            loaded = None
+            if self._dotenv_files or self._secret_files:
+                from checkenv.envfiles import load_env
 
-        for key, value in self._spec.items():
-            if isinstance(value, bool):
-                self._check_and_set(key, value)
+                loaded = load_env(
+                    snapshot,
+                    self._dotenv_files,
+                    self.compiled_spec.names,
+                    self._secret_files,
+                    self._dotenv_override,
+                )
+                snapshot = loaded.layer(snapshot)
+            if outcome is not None:
+                evaluation = self._outcome_evaluation(outcome, snapshot)
             else:
-                default = value.get("default", _DEFAULT_NOT_PROVIDED)
-                self._check_and_set(key, value.get("required", True), default)
+                evaluation = self.compiled_spec.evaluate(snapshot)
+            if loaded is not None:
+                self._value_sources = loaded.sources
+                if loaded.errors:
+                    evaluation = _with_errors(evaluation, loaded.errors)
+            self._missing = evaluation.missing
+            self._optional = evaluation.optional
+            self._defaults = evaluation.defaults
+            self._invalid = evaluation.invalid
+            self._values = evaluation.values
+            self._matches = evaluation.matches
+            self._suggestions = self._suggest(evaluation.missing, snapshot)
+            if self._namespaces is not None:
+                self._undeclared = self._find_undeclared(snapshot, evaluation)
+            self._results = None
+            self._config = ResolvedConfig(
+                snapshot,
+                evaluation.defaults,
+                evaluation.missing,
+                evaluation.optional,
+                evaluation.invalid,
+                evaluation.values,
+                None if loaded is None else loaded.values,
+                self._dotenv_override,
+            )
+            if outcome is None and fingerprint is not None:
+                self._store_outcome(fingerprint, evaluation, self._config)
+            applied = {}
+            if not dry_run and (loaded is not None or evaluation.defaults):
+                applied = self._config.commit()
+        finally:
+            stats.stop(PHASE_APPLY, started)
+        stats.missing = len(evaluation.missing)
+        stats.optional = len(evaluation.optional)
+        stats.defaults_applied = len(applied)
+
+    def _cached_outcome(self, env: Mapping[str, str]) -> "tuple[Outcome | None, str]":
+        """Looks up the outcome cached for the values of the spec's variables in ``env``,
+        returning it (or None) with the fingerprint of those values.
+        """
+        from checkenv.outcome import Outcome, env_fingerprint
+
+        compiled = self.compiled_spec
+        fingerprint = env_fingerprint(compiled.names, env, bool(compiled.pattern_keys))
+        cached = self._outcome_entry["outcomes"].get(fingerprint) if self._outcome_entry else None
+        return (None if cached is None else Outcome._make(cached)), fingerprint
+
+    def _outcome_evaluation(self, outcome: "Outcome", env: Mapping[str, str]) -> "SpecEvaluation":
+        """Turns a cached outcome back into an evaluation, coercing the typed values again"""
+        from checkenv.spec import SpecEvaluation
+
+        compiled = self.compiled_spec
+        values = compiled.evaluate(env).values if compiled.typed else {}
+        missing, optional, defaults, invalid, matches = outcome
+        return SpecEvaluation(missing, optional, defaults, invalid, values, matches)
+
+    def _store_outcome(
+        self, fingerprint: str, evaluation: "SpecEvaluation", config: "ResolvedConfig"
+    ) -> None:
+        """Stores an outcome under the fingerprint of the environment it was evaluated against,
+        and under the fingerprint of that environment with the defaults applied, which is what
+        processes forked after the defaults were committed see.
+
+        Only called after a miss in the outcome cache of a loaded spec file.
+        """
+        from checkenv.outcome import Outcome, env_fingerprint
+
+        compiled = self.compiled_spec
+        outcomes = {fingerprint: Outcome.of(evaluation)}
+        if evaluation.defaults:
+            applied = env_fingerprint(compiled.names, config, bool(compiled.pattern_keys))
+            outcomes[applied] = Outcome.of(compiled.evaluate(config))
+        root = os.path.normpath(self._env_filename)
+        fragments = {path for path in self._sources.values() if path != root}
+        self._outcomes.store(self._outcome_key, self._spec, self._sources, fragments, outcomes)
+
+    def _suggest(self, missing: list[str], env: Mapping[str, str]) -> dict[str, list[str]]:
+        """Finds similar names set in the environment for missing variables (not pattern keys)"""
+        names = [name for name in missing if not is_pattern_key(name)]
+        if not names:
+            return {}
+        from checkenv.suggest import suggest_names
+
+        # other variables of the spec are never suggested, even if they are set
+        return suggest_names(names, env, exclude=self._spec)
+
+    def _find_undeclared(self, env: Mapping[str, str], evaluation: "SpecEvaluation") -> list[str]:
+        """Finds the variables in the namespaces that the spec does not declare, and suggests
+        declared names for them, since a misspelled override is undeclared too.
+        """
+        declared = set(self._spec)
+        for names in evaluation.matches.values():
+            declared.update(names)
+        if self._secret_files:
+            from checkenv.envfiles import SECRET_SUFFIX
+
+            declared.update(name + SECRET_SUFFIX for name in self.compiled_spec.names)
+        undeclared = self._namespaces.undeclared(env, declared)
+        if undeclared:
+            from checkenv.suggest import suggest_names
+
+            self._suggestions.update(suggest_names(undeclared, self.compiled_spec.names))
+        return undeclared
 
     @property
     def check_failed(self) -> bool:
         """Indicates whether or not the environment variable check has failed.
 
-        :return: Returns True if any mandatory environment variables are not set; False otherwise
+        :return: Returns True if any mandatory environment variables are not set, or any typed
+            environment variables have invalid values, or (with ``fail_on_undeclared``) any
+            variables in the namespaces are undeclared; False otherwise
         :rtype: bool
         """
-        return len(self._missing) > 0
+        if self._fail_on_undeclared and self._undeclared:
+            return True
+        return len(self._missing) > 0 or len(self._invalid) > 0
 
     @property
     def missing(self) -> list[str]:
@@ -265,6 +727,134 @@ class CheckEnv:
         """
         return self._optional
 
+    @property
+    def invalid(self) -> Mapping[str, str]:
+        """Returns the typed environment variables whose values (or defaults) are invalid, with
+        the reason, keyed by environment variable name.
+        """
+        return self._invalid
+
+    @property
+    def undeclared(self) -> list[str]:
+        """Returns the variables set in the namespaces that the spec does not declare, sorted"""
+        return self._undeclared
+
+    @property
+    def values(self) -> Mapping[str, Any]:
+        """Returns a read-only mapping of the valid typed environment variables to their coerced
+        values, e.g. an int for ``"type": "int"``, including coerced defaults.
+        """
+        return MappingProxyType(self._values)
+
+    @property
+    def matches(self) -> Mapping[str, list[str]]:
+        """Returns the variables matching each pattern key (e.g. ``FEATURE_*``) of the spec, keyed
+        by pattern key in spec order.
+        """
+        return MappingProxyType(self._matches)
+
+    @property
+    def suggestions(self) -> Mapping[str, list[str]]:
+        """Returns up to three similar names that are set in the environment for each missing
+        variable that has any ("did you mean ...?"), and up to three similar declared names for
+        each undeclared variable that has any, keyed by environment variable name.
+        """
+        return MappingProxyType(self._suggestions)
+
+    @property
+    def value_sources(self) -> Mapping[str, str]:
+        """Returns the ``.env`` file or secret file that each loaded environment variable came
+        from; variables taken from the environment itself are not listed.
+        """
+        return MappingProxyType(self._value_sources)
+
+    @property
+    def defaults(self) -> dict[str, str]:
+        """Returns the default values applied (or, in a dry run, that would have been applied) to
+        unset environment variables, keyed by environment variable name.
+        """
+        return self._defaults
+
+    @property
+    def config(self) -> "ResolvedConfig | None":
+        """Returns the environment snapshot of the latest apply_spec with the spec's defaults
+        layered on top, or None if the spec has not been applied yet.
+        """
+        return self._config
+
+    @property
+    def stats(self) -> CheckStats:
+        """Returns the phase durations and counters of the latest load_spec_file and apply_spec"""
+        return self._stats
+
+    def render(self, renderer: "Renderer | str" = "color") -> None:
+        """Renders the missing and optional result sections, timed as the render phase"""
+        from checkenv.render import get_renderer
+
+        output = get_renderer(renderer)
+        started = self._stats.start(PHASE_RENDER)
+        try:
+            output.render(self.results)
+        finally:
+            self._stats.stop(PHASE_RENDER, started)
+
+    @property
+    def results(self) -> list[EnvCheckResults]:
+        """Returns the missing and optional result sections, for rendering, with an invalid
+        section in between if the spec has typed variables or pattern keys, or any variable is
+        invalid, and an undeclared section last if namespaces were given.
+
+        The sections (and their rows) are built once per apply_spec and reused afterwards.
+        """
+        if self._results is None:
+            # rows of entries from included spec files name the file
+            root = os.path.normpath(self._env_filename)
+            sources = {name: path for name, path in self._sources.items() if path != root}
+            results = [
+                EnvCheckResults(
+                    self._missing,
+                    self._spec,
+                    EnvCheckResults.MISSING,
+                    suggestions=self._suggestions,
+                    sources=sources,
+                    descriptions=self._descriptions,
+                )
+            ]
+            compiled = self._compiled
+            if self._invalid or (
+                compiled is not None and (compiled.typed or compiled.pattern_keys)
+            ):
+                results.append(
+                    EnvCheckResults(
+                        list(self._invalid),
+                        self._spec,
+                        EnvCheckResults.INVALID,
+                        self._invalid,
+                        sources=sources,
+                        descriptions=self._descriptions,
+                    )
+                )
+            results.append(
+                EnvCheckResults(
+                    self._optional,
+                    self._spec,
+                    EnvCheckResults.OPTIONAL,
+                    sources=sources,
+                    descriptions=self._descriptions,
+                )
+            )
+            if self._namespaces is not None:
+                results.append(
+                    EnvCheckResults(
+                        self._undeclared,
+                        self._spec,
+                        EnvCheckResults.UNDECLARED,
+                        suggestions=self._suggestions,
+                    )
+                )
+            self._results = results
+        return self._results
+
     def print_results(self, env_var_names: list[str], section: str) -> None:
         """Consolidates the results of the checkenv process into a resulting object that can be
         output in a variety of different formats, such as colorized console output, or to something
@@ -276,7 +866,19 @@ class CheckEnv:
         results.print_console_color()
 
 
-def _handle_exit(raise_exc: bool = False, exc: Exception | None = None) -> None:
+def _with_errors(evaluation: "SpecEvaluation", errors: Mapping[str, str]) -> "SpecEvaluation":
+    """Reports the variables whose values could not be loaded as invalid, rather than unset, and
+    drops their defaults
+    """
+    return evaluation._replace(
+        missing=[name for name in evaluation.missing if name not in errors],
+        optional=[name for name in evaluation.optional if name not in errors],
+        defaults={name: value for name, value in evaluation.defaults.items() if name not in errors},
+        invalid={**evaluation.invalid, **errors},
+    )
+
+
+def _handle_exit(raise_exc: bool = False, exc: Exception | None = None) -> NoReturn:
     if not raise_exc:
         sys.exit(1)
     if exc is None:
@@ -284,17 +886,108 @@ def _handle_exit(raise_exc: bool = False, exc: Exception | None = None) -> None:
     raise exc
 
 
-def _handle_print(no_out: bool = False, msg: str = "") -> None:
-    if not no_out:
-        print(msg)
+def _is_validation_error(exc: Exception) -> bool:
+    """Checks for a jsonschema ValidationError without importing jsonschema.
+
+    If jsonschema was never imported, no spec was validated, so exc cannot be one.
+    """
+    exceptions = sys.modules.get("jsonschema.exceptions")
+    return exceptions is not None and isinstance(exc, exceptions.ValidationError)
+
+
+def compile_spec(
+    filename: str = "env.json", cache_dir: str | None = None, strict: bool = False
+) -> CompiledSpec:
+    """Loads and validates a spec file once, for evaluating it against many environments.
+
+    The returned CompiledSpec never reads or modifies os.environ; use `CompiledSpec.evaluate` for
+    a single mapping or `CompiledSpec.evaluate_many` to stream results for many mappings.
+
+    Raises the same exceptions as `CheckEnv.load_spec_file`.
+    """
+    env = CheckEnv(env_filename=filename, cache_dir=cache_dir, strict=strict)
+    env.load_spec_file()
+    return env.compiled_spec
+
+
+def lazy_config(
+    filename: str = "env.json",
+    cache_dir: str | None = None,
+    strict: bool = False,
+    spec_format: str | None = None,
+) -> "LazyConfig":
+    """Loads and validates a spec file, returning a config whose variables are looked up,
+    defaulted and validated only when they are first read (see checkenv.lazy).
+
+    Nothing is checked against the environment until the variables are read, or until
+    `LazyConfig.verify_all` runs the same check as `check`.
+
+    Raises the same exceptions as `CheckEnv.load_spec_file`.
+    """
+    from checkenv.lazy import LazyConfig
+
+    env = CheckEnv(
+        env_filename=filename, cache_dir=cache_dir, strict=strict, spec_format=spec_format
+    )
+    env.load_spec_file()
+    return LazyConfig(env)
+
+
+def _finish_check(
+    env: CheckEnv, raise_exception: bool, no_output: bool, output: "Renderer", overlay: bool
+) -> CheckEnv:
+    """Applies a loaded spec, renders the results and handles a failed check.
+
+    Passing checks that reused a cached outcome are not rendered again.
+    """
+    env.apply_spec(dry_run=overlay)
+    if not no_output and not (env.stats.outcome_hit and not env.check_failed):
+        env.render(output)
+    if env.check_failed:
+        if raise_exception:
+            raise CheckEnvException(
+                env.missing, env.optional, env.stats, env.invalid, env.suggestions, env.undeclared
+            )
+        _handle_exit(raise_exc=raise_exception)
+    return env
 
 
 def check(
-    filename: str = "env.json", raise_exception: bool = False, no_output: bool = False
-) -> None:
+    filename: str = "env.json",
+    raise_exception: bool = False,
+    no_output: bool = False,
+    cache_dir: str | None = None,
+    strict: bool = False,
+    renderer: "Renderer | str" = "color",
+    overlay: bool = False,
+    dotenv_files: Sequence[str] = (),
+    secret_files: bool = False,
+    dotenv_override: bool = False,
+    outcome_cache: str | None = None,
+    streaming: bool = False,
+    spec_format: str | None = None,
+    namespaces: Sequence[str] = (),
+    fail_on_undeclared: bool = False,
+) -> CheckEnv:
     """Executes the end-to-end flow for checking environment variables against the spec.
 
-    For most out-of-the-box applications, this is the only method you need to call.
+    For most out-of-the-box applications, this is the only method you need to call. The time
+    spent in each phase of the check is available from the `stats` of the returned CheckEnv, or
+    of the CheckEnvException raised when the check fails.
+
+    In overlay mode, os.environ is left untouched; the resolved configuration, with the defaults
+    layered over a snapshot of the environment, is available from the `config` of the returned
+    CheckEnv and can be written to os.environ later, along with any loaded variables, with
+    `ResolvedConfig.commit`. Checks in overlay mode are safe to run from many threads at once.
+
+    Variables loaded from ``.env`` files and secret files are checked together with the
+    environment, and written to os.environ along with the defaults unless in overlay mode; the
+    file each of them came from is available from `CheckEnv.value_sources`.
+
+    With an outcome cache, e.g. in every worker of a pre-fork server, the first check stores its
+    outcome and later checks of the same spec and the same values of its variables reuse it,
+    without validating the spec or printing the results again (see checkenv.outcome). Failed
+    checks are always printed.
 
     :param filename: The name of the environment configuration file (default, env.json)
     :type filename: str, optional
@@ -302,26 +995,148 @@ def check(
     :type raise_exception: bool, optional
     :param no_output: Do not write anything to stdout
     :type no_output: bool, optional
+    :param cache_dir: Directory for caching the validated spec between runs (default, no cache)
+    :type cache_dir: str, optional
+    :param strict: Validate the spec with the jsonschema reference validator (default, False)
+    :type strict: bool, optional
+    :param renderer: The output format ("color", "text", "json" or "jsonl"), or a Renderer
+        instance to write to another stream or a logger (default, "color")
+    :type renderer: Renderer or str, optional
+    :param overlay: Do not apply default values to os.environ (default, False)
+    :type overlay: bool, optional
+    :param dotenv_files: ``.env`` files to load before the check, in increasing order of
+        precedence; variables set in the environment take precedence over them (default, none)
+    :type dotenv_files: Sequence[str], optional
+    :param secret_files: Read spec variables that are unset from the files named by their
+        ``*_FILE`` variables, e.g. ``DB_PASSWORD`` from ``DB_PASSWORD_FILE`` (default, False)
+    :type secret_files: bool, optional
+    :param dotenv_override: Let the ``.env`` files override the environment (default, False)
+    :type dotenv_override: bool, optional
+    :param outcome_cache: File for sharing the outcome of the check between processes (default,
+        no cache); not used together with ``dotenv_files`` or ``secret_files``
+    :type outcome_cache: str, optional
+    :param streaming: Load the spec file entry by entry, keeping its descriptions on disk until
+        they are rendered, for very large spec files; ``cache_dir`` and ``outcome_cache`` are
+        not used (default, False)
+    :type streaming: bool, optional
+    :param spec_format: The spec file's format, "json", "toml" or "pyproject" (default, chosen
+        by the file name: ``pyproject.toml`` uses its ``[tool.checkenv]`` table, other ``.toml``
+        files are TOML, and anything else is JSON)
+    :type spec_format: str, optional
+    :param namespaces: Name prefixes like ``APP_``, or globs and regular expressions written like
+        pattern keys, in which to report the variables the spec does not declare (default, none)
+    :type namespaces: Sequence[str], optional
+    :param fail_on_undeclared: Fail the check if any variables in the namespaces are undeclared,
+        rather than only reporting them (default, False)
+    :type fail_on_undeclared: bool, optional
+    :return: The CheckEnv that ran the check, with its results, resolved config and stats
+    :rtype: CheckEnv
     """
+    from checkenv.render import get_renderer
+
+    output = get_renderer(renderer)
     # handle two exception cases above
     try:
-        env = CheckEnv(env_filename=filename)
+        env = CheckEnv(
+            env_filename=filename,
+            cache_dir=cache_dir,
+            strict=strict,
+            dotenv_files=dotenv_files,
+            secret_files=secret_files,
+            dotenv_override=dotenv_override,
+            outcome_cache=outcome_cache,
+            streaming=streaming,
+            spec_format=spec_format,
+            namespaces=namespaces,
+            fail_on_undeclared=fail_on_undeclared,
+        )
         env.load_spec_file()
-        env.apply_spec()
+        return _finish_check(env, raise_exception, no_output, output, overlay)
+    except OSError as ioe:
+        # the spec file itself, a spec file it includes or a .env file
+        abs_filename = os.path.abspath(ioe.filename or filename)
+        if not no_output:
+            output.render_error(
+                f'Unable to find checkenv configuration file "{abs_filename}" - exiting'
+            )
+        _handle_exit(raise_exc=raise_exception, exc=ioe)
+    except Exception as exc:
+        if not _is_validation_error(exc):
+            raise
         if not no_output:
-            env.print_results(env.missing, EnvCheckResults.MISSING)
-            env.print_results(env.optional, EnvCheckResults.OPTIONAL)
-        if env.check_failed:
-            if raise_exception:
-                raise CheckEnvException(env.missing, env.optional)
-            _handle_exit(raise_exc=raise_exception)
-    except ValidationError as validation_error:
-        _handle_print(no_out=no_output, msg=validation_error.message)
-        _handle_exit(raise_exc=raise_exception, exc=validation_error)
+            output.render_error(exc.message)
+        _handle_exit(raise_exc=raise_exception, exc=exc)
+
+
+async def check_async(
+    filename: str = "env.json",
+    raise_exception: bool = True,
+    no_output: bool = False,
+    cache_dir: str | None = None,
+    strict: bool = False,
+    renderer: "Renderer | str" = "color",
+    overlay: bool = False,
+    dotenv_files: Sequence[str] = (),
+    secret_files: bool = False,
+    dotenv_override: bool = False,
+    outcome_cache: str | None = None,
+    streaming: bool = False,
+    spec_format: str | None = None,
+    namespaces: Sequence[str] = (),
+    fail_on_undeclared: bool = False,
+) -> CheckEnv:
+    """The asyncio variant of `check`, for checking the environment from a running event loop.
+
+    The spec file is loaded and validated, and the results are rendered, in worker threads, so
+    several checks can run concurrently with asyncio.gather. Since exiting the process from a
+    running event loop is rarely what you want, this never calls sys.exit: a failed check raises
+    CheckEnvException (or, if raise_exception is False, returns the CheckEnv with check_failed
+    set), and a spec file that cannot be loaded raises the same exceptions as
+    `CheckEnv.load_spec_file`.
+
+    The other parameters are the same as for `check`.
+    """
+    import asyncio
+
+    from checkenv.render import get_renderer
+
+    output = get_renderer(renderer)
+    env = CheckEnv(
+        env_filename=filename,
+        cache_dir=cache_dir,
+        strict=strict,
+        dotenv_files=dotenv_files,
+        secret_files=secret_files,
+        dotenv_override=dotenv_override,
+        outcome_cache=outcome_cache,
+        streaming=streaming,
+        spec_format=spec_format,
+        namespaces=namespaces,
+        fail_on_undeclared=fail_on_undeclared,
+    )
+    try:
+        await env.load_spec_file_async()
     except OSError as ioe:
-        abs_filename = os.path.abspath(filename)
-        _handle_print(
-            no_out=no_output,
-            msg=f'Unable to find checkenv configuration file "{abs_filename}" - exiting',
+        if not no_output:
+            abs_filename = os.path.abspath(ioe.filename or filename)
+            await asyncio.to_thread(
+                output.render_error, f'Unable to find checkenv configuration file "{abs_filename}"'
+            )
+        raise
+    except Exception as exc:
+        if not no_output and _is_validation_error(exc):
+            await asyncio.to_thread(output.render_error, exc.message)
+        raise
+
+    if dotenv_files or secret_files or outcome_cache is not None:
+        # loading files and sharing the outcome do file I/O, which should not block the event loop
+        await asyncio.to_thread(env.apply_spec, overlay)
+    else:
+        env.apply_spec(dry_run=overlay)
+    if not no_output and not (env.stats.outcome_hit and not env.check_failed):
+        await asyncio.to_thread(env.render, output)
+    if env.check_failed and raise_exception:
+        raise CheckEnvException(
+            env.missing, env.optional, env.stats, env.invalid, env.suggestions, env.undeclared
         )
-        _handle_exit(raise_exc=raise_exception, exc=ioe)
+    return env
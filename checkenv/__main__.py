@@ -0,0 +1,5 @@
+import sys
+
+from checkenv.cli import main
+
+sys.exit(main())
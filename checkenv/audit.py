@@ -0,0 +1,155 @@
+"""Auditing many environments against spec files, e.g. every process on a host.
+
+An audit evaluates one or more spec files against environment sources: the environments of
+running processes (``/proc/<pid>/environ``), ``.env`` files and NUL-separated environment dumps.
+The spec files are loaded and compiled once; the sources are read and parsed concurrently in a
+thread pool, and each one is evaluated against every spec as it comes back. The auditor's own
+environment is never read or modified.
+"""
+
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator
+from functools import partial
+from typing import NamedTuple
+
+from checkenv.dotenv import read_dotenv, read_environ_dump
+from checkenv.spec import CompiledSpec
+
+# an environment source: a label for the report, and a function returning the environment, or
+# None if the source turned out not to be wanted (e.g. a process not matching the filter)
+EnvSource = tuple[str, Callable[[], dict[str, str] | None]]
+
+
+class SourceReport(NamedTuple):
+    """The outcome of auditing a single environment source.
+
+    ``missing`` and ``optional`` map each spec file to the variables it reported for this source,
+    and ``invalid`` to its typed variables with invalid values, with the reason. If the source
+    could not be read, ``error`` says why.
+    """
+
+    source: str
+    missing: dict[str, list[str]]
+    optional: dict[str, list[str]]
+    invalid: dict[str, dict[str, str]]
+    error: str | None = None
+
+    @property
+    def failed(self) -> bool:
+        """Whether the source could not be read, or misses required variables or has invalid
+        values for any spec
+        """
+        return self.error is not None or any(self.missing.values()) or any(self.invalid.values())
+
+
+class AuditSummary(NamedTuple):
+    """Counts of audited sources by outcome"""
+
+    sources: int
+    passed: int
+    failed: int
+    errors: int
+
+
+def _read_process_environ(pid: int, match: "re.Pattern[str] | None") -> dict[str, str] | None:
+    if match is not None:
+        with open(f"/proc/{pid}/cmdline", "rb") as cmdline_file:
+            cmdline = os.fsdecode(cmdline_file.read()).replace("\0", " ").strip()
+        if match.search(cmdline) is None:
+            return None
+    return read_environ_dump(f"/proc/{pid}/environ")
+
+
+def process_sources(pids: Iterable[int] | None = None, match: str | None = None) -> list[EnvSource]:
+    """Returns sources for the environments of running processes (Linux only).
+
+    :param pids: The process ids to audit (default, every process in /proc)
+    :param match: Only audit processes whose command line matches this regular expression
+    """
+    if pids is None:
+        pids = sorted(int(entry) for entry in os.listdir("/proc") if entry.isdigit())
+    pattern = None if match is None else re.compile(match)
+    return [(f"pid:{pid}", partial(_read_process_environ, pid, pattern)) for pid in pids]
+
+
+def dotenv_sources(paths: Iterable[str]) -> list[EnvSource]:
+    """Returns sources for ``.env`` files"""
+    return [(path, partial(read_dotenv, path)) for path in paths]
+
+
+def dump_sources(paths: Iterable[str]) -> list[EnvSource]:
+    """Returns sources for NUL-separated ``KEY=VALUE`` environment dumps"""
+    return [(path, partial(read_environ_dump, path)) for path in paths]
+
+
+def _read_source(source: EnvSource) -> tuple[str, dict[str, str] | None, str | None]:
+    label, read = source
+    try:
+        return label, read(), None
+    except (OSError, UnicodeDecodeError) as exc:
+        return label, None, str(exc)
+
+
+def audit(
+    specs: Iterable[str],
+    sources: Iterable[EnvSource],
+    max_workers: int | None = None,
+    cache_dir: str | None = None,
+    strict: bool = False,
+) -> Iterator[SourceReport]:
+    """Evaluates every spec file against every environment source.
+
+    Plain specs are evaluated with `CompiledSpec.evaluate_many`, which only checks whether
+    variables are set; specs with typed variables or pattern keys are evaluated like
+    `checkenv.check` does, so invalid values and unmatched patterns fail the audit too.
+
+    Yields one report per source in the order the sources were given, skipping sources that
+    were filtered out. Raises the same exceptions as `CheckEnv.load_spec_file` if a spec file
+    cannot be loaded.
+
+    :param max_workers: The size of the thread pool reading the sources (default, chosen by
+        concurrent.futures)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from checkenv import compile_spec
+
+    # built once, shared by every source
+    compiled: list[tuple[str, CompiledSpec]] = [
+        (path, compile_spec(path, cache_dir, strict)) for path in specs
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for label, env, error in executor.map(_read_source, sources):
+            if error is not None:
+                yield SourceReport(label, {}, {}, {}, error)
+                continue
+            if env is None:
+                continue
+            missing = {}
+            optional = {}
+            invalid = {}
+            for path, spec in compiled:
+                if spec.typed or spec.pattern_keys:
+                    evaluation = spec.evaluate(env)
+                    missing[path] = evaluation.missing
+                    optional[path] = evaluation.optional
+                    invalid[path] = evaluation.invalid
+                    continue
+                missing_bits, optional_bits = next(spec.evaluate_many((env,)))
+                missing[path] = spec.names_for(missing_bits)
+                optional[path] = spec.names_for(optional_bits)
+                invalid[path] = {}
+            yield SourceReport(label, missing, optional, invalid)
+
+
+def summarize(reports: Iterable[SourceReport]) -> AuditSummary:
+    """Counts the reports by outcome"""
+    sources = passed = errors = 0
+    for report in reports:
+        sources += 1
+        if report.error is not None:
+            errors += 1
+        elif not report.failed:
+            passed += 1
+    return AuditSummary(sources, passed, sources - passed - errors, errors)
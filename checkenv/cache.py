@@ -0,0 +1,98 @@
+"""On-disk cache for validated checkenv spec files.
+
+Loading a spec normally means parsing JSON and validating it against the spec schema on every
+process start. When a cache directory is configured, the validated spec is stored as a ``marshal``
+blob keyed on the spec file's absolute path, format, size, modification time and content hash, so
+warm starts only need to read and hash the spec file.
+"""
+
+import contextlib
+import hashlib
+import marshal
+import os
+import sys
+from typing import Any
+
+# bump whenever the entry layout or the spec validation rules change
+_FORMAT_VERSION = 2
+_ENTRY_SUFFIX = ".spec"
+
+
+def spec_digest(raw: bytes) -> str:
+    """Returns the content hash used to key cached specs"""
+    return hashlib.blake2b(raw, digest_size=20).hexdigest()
+
+
+class SpecCache:
+    """A directory of cached, already-validated specs.
+
+    Cache failures are never fatal: a missing, corrupt or stale entry is treated as a miss, and
+    an unwritable cache directory simply means nothing gets stored.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self._cache_dir = cache_dir
+
+    def entry_path(self, filename: str) -> str:
+        """Returns the path of the cache entry for the given spec file"""
+        key = hashlib.sha256(os.path.abspath(filename).encode("utf-8", "surrogatepass"))
+        return os.path.join(self._cache_dir, key.hexdigest()[:32] + _ENTRY_SUFFIX)
+
+    def _key(
+        self, filename: str, stat: os.stat_result, raw: bytes, spec_format: str
+    ) -> tuple[Any, ...]:
+        return (
+            _FORMAT_VERSION,
+            sys.implementation.cache_tag,
+            os.path.abspath(filename),
+            # the same file parses to different specs in different formats, e.g. pyproject.toml
+            spec_format,
+            stat.st_size,
+            stat.st_mtime_ns,
+            spec_digest(raw),
+        )
+
+    def load(
+        self, filename: str, stat: os.stat_result, raw: bytes, spec_format: str = "json"
+    ) -> dict[str, Any] | None:
+        """Returns the cached spec for ``filename`` parsed in ``spec_format``, or None if there is
+        no usable entry.
+        """
+        try:
+            with open(self.entry_path(filename), "rb") as entry_file:
+                entry = marshal.loads(entry_file.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(entry, tuple) or len(entry) != 2:
+            return None
+        key, spec = entry
+        if key != self._key(filename, stat, raw, spec_format) or not isinstance(spec, dict):
+            return None
+        return spec
+
+    def store(
+        self,
+        filename: str,
+        stat: os.stat_result,
+        raw: bytes,
+        spec: dict[str, Any],
+        spec_format: str = "json",
+    ) -> None:
+        """Stores a validated spec for ``filename``, parsed in ``spec_format``, ignoring any
+        filesystem errors.
+        """
+        import tempfile  # only needed when writing, so not paid for on warm starts
+
+        entry = marshal.dumps((self._key(filename, stat, raw, spec_format), spec))
+        tmp_path = None
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as entry_file:
+                entry_file.write(entry)
+            # atomic rename so concurrent readers never see a partially written entry
+            os.replace(tmp_path, self.entry_path(filename))
+        except OSError:
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
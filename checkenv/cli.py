@@ -0,0 +1,257 @@
+"""The checkenv command line interface, available as ``checkenv`` or ``python -m checkenv``."""
+
+import argparse
+import sys
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+from checkenv.instrument import PHASES
+
+if TYPE_CHECKING:
+    from checkenv.many import MultiCheckResult
+
+
+def _add_check_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    parser = subparsers.add_parser(
+        "check",
+        help="check the environment against one or more spec files",
+        description="Check the current environment against one or more spec files. Spec files "
+        "are loaded and validated concurrently, and default values are not applied.",
+    )
+    parser.add_argument("files", nargs="*", default=["env.json"], help="spec files to check")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker pool size")
+    parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="use a process pool instead of a thread pool, to scale with CPU cores",
+    )
+    parser.add_argument("--cache-dir", default=None, help="cache validated specs in this directory")
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="validate specs with the jsonschema reference validator",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["color", "text", "json", "jsonl"],
+        default="color",
+        help="output format (default: color)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print any results")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time spent in each phase of each check to stderr",
+    )
+    parser.set_defaults(handler=_run_check)
+
+
+def _run_check(args: argparse.Namespace) -> int:
+    from checkenv.many import evaluate_many_specs
+
+    result = evaluate_many_specs(
+        args.files,
+        max_workers=args.workers,
+        use_processes=args.processes,
+        cache_dir=args.cache_dir,
+        strict=args.strict,
+    )
+    if not args.quiet:
+        result.print_results(args.format)
+    if args.profile:
+        _print_profile(result)
+    return 1 if result.check_failed else 0
+
+
+def _print_profile(result: "MultiCheckResult") -> None:
+    """Writes a table of per-phase durations in milliseconds, one row per spec file"""
+    phases = [
+        phase
+        for phase in PHASES
+        if any(
+            report.stats is not None and phase in report.stats.durations_ns
+            for report in result.reports
+        )
+    ]
+    lines = ["".join(f"{name:>10}" for name in (*phases, "total")) + "  file"]
+    for report in result.reports:
+        durations = report.stats.durations_ns if report.stats is not None else {}
+        cells = [durations.get(phase, 0) for phase in phases] + [sum(durations.values())]
+        lines.append("".join(f"{ns / 1e6:>10.3f}" for ns in cells) + f"  {report.path}")
+    sys.stderr.write("\n".join(lines) + "\n")
+
+
+def _add_compile_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    parser = subparsers.add_parser(
+        "compile",
+        help="compile a spec file into a python module",
+        description="Validate a spec file and compile it into a python module whose check() "
+        "function needs no JSON parsing or validation at runtime.",
+    )
+    parser.add_argument("file", nargs="?", default="env.json", help="spec file to compile")
+    parser.add_argument(
+        "-o", "--output", default="env_spec.py", help="module to write (default: env_spec.py)"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="do not write anything; exit with 1 if the module is missing or out of date",
+    )
+    parser.set_defaults(handler=_run_compile)
+
+
+def _report_spec_error(exc: Exception) -> int:
+    """Writes why a spec file could not be loaded to stderr and returns the exit code.
+
+    Re-raises exc if it is not an error loading the spec file.
+    """
+    from checkenv import _is_validation_error
+
+    if isinstance(exc, OSError):
+        sys.stderr.write(f"{exc}\n")
+    elif isinstance(exc, ValueError):  # malformed, or in an unknown format
+        sys.stderr.write(f"Invalid spec file: {exc}\n")
+    elif _is_validation_error(exc):
+        sys.stderr.write(f"{exc.message}\n")
+    else:
+        raise exc
+    return 1
+
+
+def _run_compile(args: argparse.Namespace) -> int:
+    from checkenv.compiler import compile_module, generate_module
+
+    try:
+        if not args.check:
+            compile_module(args.file, args.output)
+            return 0
+        source = generate_module(args.file, args.output)
+    except Exception as exc:
+        return _report_spec_error(exc)
+
+    try:
+        with open(args.output, encoding="utf-8") as module_file:
+            current = module_file.read() == source
+    except OSError:
+        current = False
+    if not current:
+        sys.stderr.write(f"{args.output} is out of date with {args.file}\n")
+    return 0 if current else 1
+
+
+def _add_audit_parser(subparsers: "argparse._SubParsersAction[argparse.ArgumentParser]") -> None:
+    parser = subparsers.add_parser(
+        "audit",
+        help="audit the environments of processes, .env files or environment dumps",
+        description="Evaluate one or more spec files against many environments and print one "
+        "JSON line per environment, followed by a summary line. Environments are read "
+        "concurrently; the auditor's own environment is neither checked nor modified.",
+    )
+    parser.add_argument(
+        "-s",
+        "--spec",
+        dest="specs",
+        action="append",
+        default=None,
+        help="spec file to audit against; may be repeated (default: env.json)",
+    )
+    parser.add_argument(
+        "--pid",
+        dest="pids",
+        type=int,
+        action="append",
+        default=None,
+        help="audit the environment of this process; may be repeated",
+    )
+    parser.add_argument(
+        "--all-processes", action="store_true", help="audit the environment of every process"
+    )
+    parser.add_argument(
+        "--match",
+        default=None,
+        metavar="REGEX",
+        help="only audit processes whose command line matches this regular expression",
+    )
+    parser.add_argument(
+        "--dotenv", nargs="+", default=[], metavar="FILE", help=".env files to audit"
+    )
+    parser.add_argument(
+        "--dump",
+        nargs="+",
+        default=[],
+        metavar="FILE",
+        help="NUL-separated KEY=VALUE environment dumps to audit, like /proc/<pid>/environ",
+    )
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker pool size")
+    parser.add_argument("--cache-dir", default=None, help="cache validated specs in this directory")
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="validate specs with the jsonschema reference validator",
+    )
+    parser.set_defaults(handler=_run_audit)
+
+
+def _run_audit(args: argparse.Namespace) -> int:
+    import json
+    import re
+
+    from checkenv.audit import (
+        EnvSource,
+        audit,
+        dotenv_sources,
+        dump_sources,
+        process_sources,
+        summarize,
+    )
+
+    sources: list[EnvSource] = []
+    if args.pids is not None or args.all_processes or args.match is not None:
+        try:
+            sources += process_sources(None if args.all_processes else args.pids, args.match)
+        except re.error as exc:
+            sys.stderr.write(f"Invalid --match pattern: {exc}\n")
+            return 2
+    sources += dotenv_sources(args.dotenv)
+    sources += dump_sources(args.dump)
+
+    reports = []
+    write = sys.stdout.write
+    try:
+        for report in audit(
+            args.specs or ["env.json"], sources, args.workers, args.cache_dir, args.strict
+        ):
+            reports.append(report)
+            line: dict[str, object] = {"source": report.source, "passed": not report.failed}
+            if report.error is not None:
+                line["error"] = report.error
+            else:
+                line["missing"] = report.missing
+                line["optional"] = report.optional
+                line["invalid"] = report.invalid
+            write(json.dumps(line) + "\n")
+    except Exception as exc:
+        return _report_spec_error(exc)
+    summary = summarize(reports)
+    write(json.dumps({"summary": summary._asdict()}) + "\n")
+    return 1 if summary.failed or summary.errors else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for the checkenv command line interface"""
+    parser = argparse.ArgumentParser(
+        prog="checkenv",
+        description="Ensures specified environment variables are present during runtime.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    _add_check_parser(subparsers)
+    _add_compile_parser(subparsers)
+    _add_audit_parser(subparsers)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Runs the checkenv command line interface and returns the process exit code"""
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
@@ -0,0 +1,154 @@
+"""Typed spec entries: validating and coercing environment variable values.
+
+A spec entry can declare a ``type`` (``string``, ``int``, ``float``, ``bool``, ``enum``, ``regex``,
+``url`` or ``duration``) and constraints (``min``, ``max``, ``pattern`` and ``choices``). Each
+typed entry is compiled once, when the spec is compiled, into a validator: a callable that takes
+the raw string value and returns the coerced value, or raises ValueError with the reason the
+value is invalid. Patterns are compiled once per spec and shared between entries.
+
+``pattern`` must match the whole raw value and ``choices`` lists the allowed raw values, whatever
+the type. ``min`` and ``max`` bound the value of ``int`` and ``float`` entries, the number of
+seconds of ``duration`` entries, and the length of any other value. Reasons never include the
+value itself, since environment variables often hold secrets.
+"""
+
+import re
+from collections.abc import Callable, Mapping
+from datetime import timedelta
+from typing import Any
+
+Validator = Callable[[str], Any]
+
+_BOOLEANS = {
+    "true": True,
+    "yes": True,
+    "on": True,
+    "1": True,
+    "false": False,
+    "no": False,
+    "off": False,
+    "0": False,
+}
+_DURATION_RE = re.compile(r"(?:\d+(?:\.\d+)?(?:ms|s|m|h|d))+")
+_DURATION_PART_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h|d)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("not an integer") from None
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError("not a number") from None
+
+
+def _parse_bool(value: str) -> bool:
+    try:
+        return _BOOLEANS[value.strip().lower()]
+    except KeyError:
+        raise ValueError("not a boolean (use true/false, yes/no, on/off or 1/0)") from None
+
+
+def _parse_regex(value: str) -> "re.Pattern[str]":
+    try:
+        return re.compile(value)
+    except re.error as exc:
+        raise ValueError(f"not a valid regular expression ({exc})") from None
+
+
+def _parse_url(value: str) -> str:
+    from urllib.parse import urlsplit
+
+    try:
+        parts = urlsplit(value)
+    except ValueError:
+        parts = None
+    if parts is None or not parts.scheme or not parts.netloc:
+        raise ValueError("not a URL with a scheme and a host")
+    return value
+
+
+def _parse_duration(value: str) -> timedelta:
+    """Parses durations like ``90``, ``1.5s``, ``250ms`` or ``1h30m``; plain numbers are seconds"""
+    value = value.strip()
+    try:
+        return timedelta(seconds=float(value))
+    except (ValueError, OverflowError):
+        pass
+    if _DURATION_RE.fullmatch(value) is None:
+        raise ValueError("not a duration (e.g. 90, 250ms, 1.5s or 1h30m)")
+    seconds = sum(
+        float(amount) * _DURATION_UNITS[unit] for amount, unit in _DURATION_PART_RE.findall(value)
+    )
+    try:
+        return timedelta(seconds=seconds)
+    except OverflowError:
+        raise ValueError("too long a duration") from None
+
+
+_PARSERS: dict[str, Validator] = {
+    "string": str,
+    "enum": str,
+    "int": _parse_int,
+    "float": _parse_float,
+    "bool": _parse_bool,
+    "regex": _parse_regex,
+    "url": _parse_url,
+    "duration": _parse_duration,
+}
+
+
+def _measure(type_name: str) -> Callable[[Any, str], float]:
+    """Returns a function of (coerced value, raw value) giving the quantity min and max bound"""
+    if type_name in ("int", "float"):
+        return lambda coerced, raw: coerced
+    if type_name == "duration":
+        return lambda coerced, raw: coerced.total_seconds()
+    return lambda coerced, raw: len(raw)
+
+
+def compile_validator(
+    entry: Mapping[str, Any], patterns: "dict[str, re.Pattern[str]] | None" = None
+) -> Validator:
+    """Compiles a typed spec entry into a validator.
+
+    :param entry: A spec entry that has been validated against the spec schema
+    :param patterns: Compiled patterns by source, shared between the entries of a spec
+    """
+    type_name = entry.get("type", "string")
+    parse = _PARSERS[type_name]
+    pattern = None
+    if "pattern" in entry:
+        if patterns is None:
+            patterns = {}
+        source = entry["pattern"]
+        pattern = patterns.get(source)
+        if pattern is None:
+            pattern = patterns[source] = re.compile(source)
+    choices = frozenset(entry["choices"]) if "choices" in entry else None
+    choices_text = ", ".join(map(repr, entry.get("choices", ())))
+    low = entry.get("min")
+    high = entry.get("max")
+    measure = _measure(type_name) if low is not None or high is not None else None
+
+    def validate(value: str) -> Any:
+        if pattern is not None and pattern.fullmatch(value) is None:
+            raise ValueError(f"does not match the pattern {pattern.pattern!r}")
+        if choices is not None and value not in choices:
+            raise ValueError(f"not one of {choices_text}")
+        coerced = parse(value)
+        if measure is not None:
+            quantity = measure(coerced, value)
+            if low is not None and quantity < low:
+                raise ValueError(f"less than the minimum of {low}")
+            if high is not None and quantity > high:
+                raise ValueError(f"greater than the maximum of {high}")
+        return coerced
+
+    return validate
@@ -0,0 +1,209 @@
+"""Ahead-of-time compilation of checkenv spec files into Python modules.
+
+``checkenv compile env.json`` validates a spec file once against ``CheckEnv._schema`` and writes a
+Python module holding the spec as precomputed tuples, along with a ``check`` function that behaves
+exactly like `checkenv.check`. Importing the generated module costs no JSON parsing or
+validation, and Python caches its bytecode like any other module.
+
+The generated module records the content hash of the spec file it was built from, and of every
+spec file it includes. Unless told not to, its ``check`` hashes those files (if they are present)
+and, if any of them changed since the module was generated, warns and checks against the spec
+file instead, so a stale build never checks the wrong variables.
+"""
+
+import math
+import os
+import warnings
+from typing import TYPE_CHECKING, Any
+
+from checkenv.spec import CompiledSpec
+
+if TYPE_CHECKING:
+    from checkenv import CheckEnv
+    from checkenv.render import Renderer
+
+_MODULE_TEMPLATE = '''\
+"""The checkenv spec in SOURCE, compiled by `checkenv compile`; do not edit."""
+
+from checkenv.compiler import check_compiled, is_stale_build
+from checkenv.spec import CompiledSpec, compile_patterns, compile_validators
+
+SOURCE = {source!r}
+SOURCE_DIGEST = {digest!r}
+# the spec files SOURCE includes, relative to this module, with their content hashes
+FRAGMENTS = {fragments!r}
+
+SPEC = {spec}
+
+COMPILED = CompiledSpec(
+    {names},
+    {required},
+    {defaults},
+    {descriptions},
+    compile_validators(SPEC),
+    compile_patterns(SPEC),
+)
+
+
+def check(
+    raise_exception=False, no_output=False, renderer="color", check_stale=True, overlay=False
+):
+    """Checks the environment against the compiled spec, exactly like checkenv.check.
+
+    If check_stale is set and the spec file changed since this module was generated, a
+    StaleSpecWarning is issued and the spec file is checked instead.
+    """
+    return check_compiled(
+        __file__, SOURCE, SOURCE_DIGEST, SPEC, COMPILED,
+        raise_exception, no_output, renderer, check_stale, overlay, FRAGMENTS,
+    )
+
+
+def is_stale():
+    """Returns whether the spec file, or a spec file it includes, changed since this module was
+    generated
+    """
+    return is_stale_build(__file__, SOURCE, SOURCE_DIGEST, FRAGMENTS)
+'''
+
+
+class StaleSpecWarning(UserWarning):
+    """Issued when a compiled spec module is older than the spec file it was built from"""
+
+
+def _literal(value: Any) -> str:
+    """Returns a Python literal for a JSON value; unlike repr, also for non-finite floats"""
+    if isinstance(value, dict):
+        items = ", ".join(f"{_literal(key)}: {_literal(item)}" for key, item in value.items())
+        return f"{{{items}}}"
+    if isinstance(value, float) and not math.isfinite(value):
+        return f"float({repr(value)!r})"
+    return repr(value)
+
+
+def _source_path(module_file: str, source: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(module_file)), source)
+
+
+def _relative_path(path: str, module_dir: str) -> str:
+    try:
+        return os.path.relpath(os.path.abspath(path), module_dir)
+    except ValueError:  # on another drive
+        return os.path.abspath(path)
+
+
+def _file_digest(path: str) -> str:
+    from checkenv.cache import spec_digest
+
+    with open(path, "rb") as spec_file:
+        return spec_digest(spec_file.read())
+
+
+def generate_module(filename: str = "env.json", output: str | None = None) -> str:
+    """Validates a spec file against the reference schema and returns the source of a module
+    that checks it without parsing or validating anything at runtime.
+
+    :param filename: The spec file to compile (default, env.json)
+    :type filename: str, optional
+    :param output: Where the module will be written, so the spec file can be found relative to
+        it (default, the current directory)
+    :type output: str, optional
+
+    Raises the same exceptions as `CheckEnv.load_spec_file`.
+    """
+    from checkenv import CheckEnv
+
+    env = CheckEnv(env_filename=filename, strict=True)
+    env.load_spec_file()
+    module_dir = os.path.dirname(os.path.abspath(output or "module.py"))
+    fragments = {
+        _relative_path(path, module_dir): _file_digest(path) for path in sorted(env.fragments)
+    }
+    compiled = env.compiled_spec
+    return _MODULE_TEMPLATE.format(
+        source=_relative_path(filename, module_dir),
+        digest=_file_digest(filename),
+        fragments=fragments,
+        spec="{"
+        + "".join(f"\n    {_literal(k)}: {_literal(v)}," for k, v in env.spec.items())
+        + "\n}",
+        names=repr(compiled.names),
+        required=repr(compiled.required),
+        defaults=repr(compiled.defaults),
+        descriptions=repr(compiled.descriptions),
+    )
+
+
+def compile_module(filename: str = "env.json", output: str = "env_spec.py") -> str:
+    """Compiles a spec file into a Python module at ``output`` and returns the module's source.
+
+    The module is replaced atomically, so processes importing it never see a partial file.
+    """
+    import tempfile
+
+    source = generate_module(filename, output)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as module_file:
+            module_file.write(source)
+        os.replace(tmp_path, output)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return source
+
+
+def is_stale_build(
+    module_file: str, source: str, digest: str, fragments: dict[str, str] | None = None
+) -> bool:
+    """Returns whether a compiled module's spec file, or a spec file it includes, changed since
+    the module was generated.
+
+    Spec files that are not present (e.g. not deployed alongside the module) are not stale.
+
+    :param fragments: The included spec files, relative to the module, with their content hashes
+    """
+    try:
+        if _file_digest(_source_path(module_file, source)) != digest:
+            return True
+    except OSError:
+        return False
+    for path, expected in (fragments or {}).items():
+        try:
+            if _file_digest(_source_path(module_file, path)) != expected:
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def check_compiled(
+    module_file: str,
+    source: str,
+    digest: str,
+    spec: dict[str, Any],
+    compiled: CompiledSpec,
+    raise_exception: bool = False,
+    no_output: bool = False,
+    renderer: "Renderer | str" = "color",
+    check_stale: bool = True,
+    overlay: bool = False,
+    fragments: dict[str, str] | None = None,
+) -> "CheckEnv":
+    """Runs the check of a generated module; see the module docstring"""
+    from checkenv import CheckEnv, _finish_check, check
+    from checkenv.render import get_renderer
+
+    if check_stale and is_stale_build(module_file, source, digest, fragments):
+        source_path = _source_path(module_file, source)
+        warnings.warn(
+            f"{module_file} is out of date with {source_path}; checking the spec file instead "
+            "(run checkenv compile to regenerate it)",
+            StaleSpecWarning,
+            stacklevel=3,
+        )
+        return check(source_path, raise_exception, no_output, renderer=renderer, overlay=overlay)
+
+    env = CheckEnv(env_filename=_source_path(module_file, source))
+    env.load_compiled_spec(spec, compiled)
+    return _finish_check(env, raise_exception, no_output, get_renderer(renderer), overlay)
@@ -0,0 +1,113 @@
+"""A parser for ``.env`` files and NUL-separated environment dumps.
+
+``.env`` files are parsed with a single precompiled regex over the whole file. The supported
+syntax is the common subset of dotenv implementations:
+
+- ``KEY=value`` lines, optionally prefixed with ``export``; blank lines and ``#`` comments
+- unquoted values, which end at the end of the line or at a `` #`` comment, and are stripped
+- single-quoted values, taken literally, which may span lines
+- double-quoted values, which may span lines and support the ``\\n``, ``\\r``, ``\\t``, ``\\"``,
+  ``\\\\`` and ``\\$`` escapes
+
+Variable expansion (``${OTHER}``) is not supported; values are taken as written. Lines that are
+not assignments are ignored.
+
+Large ``.env`` files are memory-mapped and scanned in place with a bytes version of the regex,
+instead of being read and decoded as a whole first.
+
+Environment dumps use the ``/proc/<pid>/environ`` format: ``KEY=VALUE`` entries separated by NUL
+bytes.
+"""
+
+import mmap
+import os
+import re
+from collections.abc import Iterable
+
+_ASSIGNMENT_RE = re.compile(
+    r"""
+    ^[ \t]*(?:export[ \t]+)?
+    (?P<key>[A-Za-z_][A-Za-z0-9_.]*)
+    [ \t]*=
+    (?:
+        [ \t]*'(?P<single>[^']*)'
+      | [ \t]*"(?P<double>(?:[^"\\]|\\.)*)"
+      | (?P<bare>[^\n]*)
+    )
+    """,
+    re.MULTILINE | re.VERBOSE | re.DOTALL,
+)
+# the same pattern for memory-mapped files; the syntax is ASCII, so both match the same entries
+_ASSIGNMENT_BYTES_RE = re.compile(
+    _ASSIGNMENT_RE.pattern.encode(), _ASSIGNMENT_RE.flags & ~re.UNICODE
+)
+# files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+# a comment needs whitespace before it, so that values like "a#b" are kept whole
+_INLINE_COMMENT_RE = re.compile(r"[ \t]+#.*")
+_ESCAPE_RE = re.compile(r"\\(.)", re.DOTALL)
+_ESCAPES = {"n": "\n", "r": "\r", "t": "\t"}
+
+
+def _unescape(match: re.Match[str]) -> str:
+    char = match.group(1)
+    return _ESCAPES.get(char, char)
+
+
+def parse_dotenv(text: str) -> dict[str, str]:
+    """Parses the contents of a ``.env`` file; later assignments win"""
+    matches = _ASSIGNMENT_RE.finditer(text)
+    return _collect(match.group("key", "single", "double", "bare") for match in matches)
+
+
+def _collect(assignments: Iterable[tuple[str | None, ...]]) -> dict[str, str]:
+    env: dict[str, str] = {}
+    for key, single, double, bare in assignments:
+        if single is not None:
+            env[key] = single
+        elif double is not None:
+            env[key] = _ESCAPE_RE.sub(_unescape, double) if "\\" in double else double
+        else:
+            env[key] = _INLINE_COMMENT_RE.sub("", bare).strip()
+    return env
+
+
+def parse_environ_dump(data: bytes) -> dict[str, str]:
+    """Parses NUL-separated ``KEY=VALUE`` entries, like ``/proc/<pid>/environ``.
+
+    Bytes that are not valid in the file system encoding are kept as surrogate escapes, like
+    os.environ does. Entries without ``=`` are ignored.
+    """
+    env = {}
+    for entry in os.fsdecode(data).split("\0"):
+        key, sep, value = entry.partition("=")
+        if sep:
+            env[key] = value
+    return env
+
+
+def _decode(group: bytes | None) -> str | None:
+    return None if group is None else group.decode("utf-8")
+
+
+def read_dotenv(path: str) -> dict[str, str]:
+    """Reads and parses a ``.env`` file, memory-mapping it if it is large"""
+    with open(path, "rb") as dotenv_file:
+        size = os.fstat(dotenv_file.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(dotenv_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # text mode would translate CRLF line endings, so those files are read instead
+                if mapped.find(b"\r") == -1:
+                    matches = _ASSIGNMENT_BYTES_RE.finditer(mapped)
+                    return _collect(
+                        tuple(map(_decode, match.group("key", "single", "double", "bare")))
+                        for match in matches
+                    )
+    with open(path, encoding="utf-8") as dotenv_file:
+        return parse_dotenv(dotenv_file.read())
+
+
+def read_environ_dump(path: str) -> dict[str, str]:
+    """Reads and parses a NUL-separated environment dump, e.g. ``/proc/<pid>/environ``"""
+    with open(path, "rb") as dump_file:
+        return parse_environ_dump(dump_file.read())
@@ -0,0 +1,121 @@
+"""Loading ``.env`` files and ``*_FILE`` secrets before a check.
+
+Deployments often keep part of their configuration in ``.env`` files, and Docker-style secrets
+pass a path in ``NAME_FILE`` instead of the value of ``NAME``. `load_env` resolves both against a
+snapshot of the environment, so that the check sees every value in one batch and os.environ is
+written at most once, together with the defaults, in `checkenv.overlay.ResolvedConfig.commit`.
+
+Precedence, from highest to lowest:
+
+1. variables set in the environment (with ``override``, the ``.env`` files win instead)
+2. ``.env`` files, later files before earlier ones
+3. ``*_FILE`` secrets: ``NAME`` is read from the file named by ``NAME_FILE`` if ``NAME`` is not
+   set by either of the above. ``NAME_FILE`` itself may come from the environment or a ``.env``
+   file. Only the variables of the spec are resolved this way, so unrelated variables like
+   ``SSL_CERT_FILE`` are never followed.
+
+Secret files are read concurrently by a bounded thread pool, and trailing newlines are stripped
+from their contents, like shell command substitution does.
+"""
+
+from collections import ChainMap
+from collections.abc import Iterable, Mapping, Sequence
+from typing import NamedTuple
+
+from checkenv.dotenv import read_dotenv
+
+SECRET_SUFFIX = "_FILE"
+# the maximum number of secret files read at once
+MAX_SECRET_WORKERS = 8
+
+
+class LoadedEnv(NamedTuple):
+    """The variables loaded from ``.env`` files and secret files.
+
+    ``values`` holds the variables to layer over the environment, ``sources`` the ``.env`` file
+    or secret file each of them came from, and ``errors`` the variables whose secret file could
+    not be read, with the reason.
+    """
+
+    values: dict[str, str]
+    sources: dict[str, str]
+    errors: dict[str, str]
+
+    def layer(self, env: Mapping[str, str]) -> Mapping[str, str]:
+        """Returns a view of ``env`` with the loaded variables layered on top"""
+        # a view rather than a copy, so the snapshot stays case-insensitive on Windows
+        return ChainMap(self.values, env)
+
+
+def _read_secret(path: str) -> str:
+    with open(path, encoding="utf-8") as secret_file:
+        return secret_file.read().rstrip("\r\n")
+
+
+def load_env(
+    env: Mapping[str, str],
+    dotenv_files: Sequence[str] = (),
+    names: Iterable[str] = (),
+    secret_files: bool = False,
+    override: bool = False,
+    max_workers: int = MAX_SECRET_WORKERS,
+) -> LoadedEnv:
+    """Loads ``.env`` files and resolves ``*_FILE`` secrets against an environment snapshot.
+
+    Raises OSError if a ``.env`` file cannot be read; secret files that cannot be read are
+    reported in `LoadedEnv.errors` instead.
+
+    :param env: The environment snapshot, which is not modified
+    :param dotenv_files: The ``.env`` files to load, in increasing order of precedence
+    :param names: The variables whose ``NAME_FILE`` secrets are resolved, e.g. the spec's
+    :param secret_files: Resolve ``NAME_FILE`` secrets (default, False)
+    :param override: Let ``.env`` files override variables set in the environment
+    :param max_workers: The maximum number of secret files read at once
+    """
+    values: dict[str, str] = {}
+    sources: dict[str, str] = {}
+    for path in dotenv_files:
+        loaded = read_dotenv(path)
+        values.update(loaded)
+        sources.update(dict.fromkeys(loaded, path))
+    if not override:
+        for name in [name for name in values if name in env]:
+            del values[name]
+            del sources[name]
+
+    errors: dict[str, str] = {}
+    if secret_files:
+        combined = ChainMap(values, env)
+        secrets = {
+            name: combined[name + SECRET_SUFFIX]
+            for name in names
+            if name not in combined and name + SECRET_SUFFIX in combined
+        }
+        for name, (path, result) in zip(secrets, _read_secrets(secrets, max_workers), strict=True):
+            if isinstance(result, str):
+                values[name] = result
+                sources[name] = path
+            else:
+                reason = result.strerror if isinstance(result, OSError) else result
+                errors[name] = f"cannot read {name}{SECRET_SUFFIX} {path!r}: {reason}"
+    return LoadedEnv(values, sources, errors)
+
+
+def _read_secrets(
+    secrets: Mapping[str, str], max_workers: int
+) -> list[tuple[str, str | Exception]]:
+    """Reads the secret files, returning each path with its contents or the error"""
+
+    def read(path: str) -> tuple[str, str | Exception]:
+        try:
+            return path, _read_secret(path)
+        except (OSError, UnicodeDecodeError) as exc:
+            return path, exc
+
+    paths = list(secrets.values())
+    if len(paths) <= 1:
+        return list(map(read, paths))
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return list(executor.map(read, paths))
@@ -1,8 +1,52 @@
+from collections.abc import Mapping, Sequence
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from checkenv.instrument import CheckStats
+
+
+def format_suggestions(suggestions: Sequence[str]) -> str:
+    """Formats the similar names suggested for a missing variable, e.g. ``did you mean A, B?``"""
+    return f"did you mean {', '.join(suggestions)}?"
+
+
 class CheckEnvException(Exception):
-    def __init__(self, missing: list[str], optional: list[str]) -> None:
+    def __init__(
+        self,
+        missing: list[str],
+        optional: list[str],
+        stats: "CheckStats | None" = None,
+        invalid: Mapping[str, str] | None = None,
+        suggestions: Mapping[str, Sequence[str]] | None = None,
+        undeclared: list[str] | None = None,
+    ) -> None:
         self._missing = missing
         self._optional = optional
-        super().__init__(f"Missing required environment variables: {', '.join(missing)}")
+        self._stats = stats
+        self._invalid = {} if invalid is None else dict(invalid)
+        self._suggestions = {} if suggestions is None else dict(suggestions)
+        self._undeclared = [] if undeclared is None else undeclared
+        if self._invalid and not missing:
+            message = f"Invalid environment variables: {', '.join(self._invalid)}"
+        elif self._undeclared and not missing:
+            names = self._with_suggestions(self._undeclared)
+            message = f"Undeclared environment variables: {', '.join(names)}"
+        else:
+            names = self._with_suggestions(missing)
+            message = f"Missing required environment variables: {', '.join(names)}"
+            if self._invalid:
+                message += f"; invalid: {', '.join(self._invalid)}"
+        if self._undeclared and (missing or self._invalid):
+            message += f"; undeclared: {', '.join(self._undeclared)}"
+        super().__init__(message)
+
+    def _with_suggestions(self, names: list[str]) -> list[str]:
+        return [
+            f"{name} ({format_suggestions(self._suggestions[name])})"
+            if name in self._suggestions
+            else name
+            for name in names
+        ]
 
     @property
     def missing(self) -> list[str]:
@@ -11,3 +55,79 @@ class CheckEnvException(Exception):
     @property
     def optional(self) -> list[str]:
         return self._optional
+
+    @property
+    def invalid(self) -> dict[str, str]:
+        """The typed variables whose values are invalid, with the reason"""
+        return self._invalid
+
+    @property
+    def suggestions(self) -> dict[str, Sequence[str]]:
+        """Similar names set in the environment for the missing variables that have any, and
+        similar declared names for the undeclared variables that have any
+        """
+        return self._suggestions
+
+    @property
+    def undeclared(self) -> list[str]:
+        """The variables set in the checked namespaces that the spec does not declare"""
+        return self._undeclared
+
+    @property
+    def stats(self) -> "CheckStats | None":
+        """The phase durations and counters of the failed check, if available"""
+        return self._stats
+
+
+class MultiCheckEnvException(CheckEnvException):
+    """Raised by check_many if any of the spec files failed its check.
+
+    `missing` and `optional` combine the variables of every spec file, while the per-file
+    properties are keyed by spec file path in the order the files were given. `errors` holds the
+    spec files that could not be loaded, with the reason, and `per_file_invalid` the invalid typed
+    variables of each spec file that has any.
+    """
+
+    def __init__(
+        self,
+        per_file_missing: dict[str, list[str]],
+        per_file_optional: dict[str, list[str]],
+        errors: dict[str, str],
+        per_file_invalid: dict[str, dict[str, str]] | None = None,
+    ) -> None:
+        self._per_file_missing = per_file_missing
+        self._per_file_optional = per_file_optional
+        self._errors = errors
+        self._per_file_invalid = {} if per_file_invalid is None else per_file_invalid
+        missing = list(dict.fromkeys(name for names in per_file_missing.values() for name in names))
+        optional = list(
+            dict.fromkeys(name for names in per_file_optional.values() for name in names)
+        )
+        invalid = {
+            name: reason
+            for reasons in self._per_file_invalid.values()
+            for name, reason in reasons.items()
+        }
+        super().__init__(missing, optional, invalid=invalid)
+        failed = [
+            path
+            for path, names in per_file_missing.items()
+            if names or path in errors or path in self._per_file_invalid
+        ]
+        self.args = (f"Environment check failed for spec files: {', '.join(failed)}",)
+
+    @property
+    def per_file_missing(self) -> dict[str, list[str]]:
+        return self._per_file_missing
+
+    @property
+    def per_file_optional(self) -> dict[str, list[str]]:
+        return self._per_file_optional
+
+    @property
+    def per_file_invalid(self) -> dict[str, dict[str, str]]:
+        return self._per_file_invalid
+
+    @property
+    def errors(self) -> dict[str, str]:
+        return self._errors
@@ -0,0 +1,198 @@
+"""Spec composition: spec files including shared spec fragments.
+
+A spec file may list other spec files under the reserved ``"$include"`` key, as a path or a list
+of paths relative to the including file. Included entries come first, in include order; later
+includes override earlier ones and the including file's own entries override them all, entry by
+entry. A service's env.json can so extend shared fragments for logging, databases or tracing and
+override just what it needs. Includes must form a directed acyclic graph: a fragment included
+along several paths is loaded once, and cycles are rejected.
+
+Fragments are loaded level by level, reading, parsing and validating the fragments of a level
+concurrently. Every validated fragment is memoized for the life of the process, keyed by its real
+path, size and modification time, so hundreds of spec files sharing a fragment validate it once.
+"""
+
+import os
+import threading
+from collections.abc import Callable, Sequence
+from typing import Any, NamedTuple
+
+INCLUDE_KEY = "$include"
+
+
+class Fragment(NamedTuple):
+    """A validated spec file: its own entries and its includes, as written"""
+
+    entries: dict[str, Any]
+    includes: tuple[str, ...]
+
+
+class ComposedSpec(NamedTuple):
+    """A spec merged with everything it includes.
+
+    ``sources`` maps every entry to the spec file that defined it, after overrides, and
+    ``fragments`` lists every included spec file, including those whose entries were all
+    overridden.
+    """
+
+    spec: dict[str, Any]
+    sources: dict[str, str]
+    fragments: tuple[str, ...] = ()
+
+
+# (real path, size, mtime, strict) -> validated fragment, shared by every check in the process
+_fragments: dict[tuple[str, int, int, bool], Fragment] = {}
+_fragments_lock = threading.Lock()
+
+
+def clear_fragment_cache() -> None:
+    """Forgets every memoized fragment, e.g. in tests"""
+    with _fragments_lock:
+        _fragments.clear()
+
+
+def split_includes(jdata: Any) -> tuple[Any, tuple[str, ...]]:
+    """Separates the includes of a parsed spec file from its entries.
+
+    Raises jsonschema.exceptions.ValidationError if the includes are not a path or a list of
+    paths.
+    """
+    if not isinstance(jdata, dict) or INCLUDE_KEY not in jdata:
+        return jdata, ()
+    entries = dict(jdata)
+    includes = entries.pop(INCLUDE_KEY)
+    if isinstance(includes, str):
+        includes = [includes]
+    if not isinstance(includes, list) or not all(
+        isinstance(include, str) and include for include in includes
+    ):
+        raise _include_error(jdata, f"{includes!r} is not a path or a list of paths")
+    return entries, tuple(includes)
+
+
+def _include_error(jdata: Any, message: str) -> Exception:
+    from checkenv.validator import SpecError, _validation_error
+
+    return _validation_error(jdata, [SpecError((INCLUDE_KEY,), message)])
+
+
+def _fragment_key(path: str, stat: os.stat_result, strict: bool) -> tuple[str, int, int, bool]:
+    return (os.path.realpath(path), stat.st_size, stat.st_mtime_ns, strict)
+
+
+def load_fragment(path: str, validate: Callable[[Any], None], strict: bool = False) -> Fragment:
+    """Loads, validates and memoizes a spec fragment, or returns its memoized copy.
+
+    Validation errors are prefixed with the fragment's path.
+
+    :param validate: Validates the fragment's entries, e.g. `CheckEnv._validate`
+    :param strict: Whether ``validate`` is the strict validator, which is part of the memo key
+    """
+    with open(path, "rb") as spec_file:
+        key = _fragment_key(path, os.fstat(spec_file.fileno()), strict)
+        fragment = _fragments.get(key)
+        if fragment is not None:
+            return fragment
+        raw = spec_file.read()
+
+    from checkenv import _is_validation_error
+    from checkenv.loaders import parse_spec
+
+    try:
+        entries, includes = split_includes(parse_spec(raw, path))
+        validate(entries)
+    except ValueError as exc:  # malformed JSON or TOML
+        raise ValueError(f"{path}: {exc}") from exc
+    except Exception as exc:
+        if _is_validation_error(exc):
+            exc.message = f"{path}: {exc.message}"
+        raise
+    fragment = Fragment(entries, includes)
+    with _fragments_lock:
+        return _fragments.setdefault(key, fragment)
+
+
+def _load_level(
+    paths: Sequence[str], validate: Callable[[Any], None], strict: bool
+) -> list[Fragment]:
+    """Loads the fragments of one level of the include graph, the uncached ones concurrently"""
+    fragments: list[Fragment | None] = []
+    misses = []
+    for path in paths:
+        fragment = _fragments.get(_fragment_key(path, os.stat(path), strict))
+        fragments.append(fragment)
+        if fragment is None:
+            misses.append(path)
+    if len(misses) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor() as executor:
+            loaded = list(executor.map(lambda path: load_fragment(path, validate, strict), misses))
+    else:
+        loaded = [load_fragment(path, validate, strict) for path in misses]
+    loaded_iter = iter(loaded)
+    return [next(loaded_iter) if fragment is None else fragment for fragment in fragments]
+
+
+def compose(
+    path: str, jdata: dict[str, Any], validate: Callable[[Any], None], strict: bool = False
+) -> ComposedSpec:
+    """Merges a validated spec file with the spec files it includes, transitively.
+
+    Raises OSError if an included file cannot be read, ValueError if one is not valid JSON, and
+    jsonschema.exceptions.ValidationError if one is invalid or the includes form a cycle.
+
+    :param path: The path of the spec file, which its includes are relative to
+    :param jdata: The parsed and validated spec file
+    :param validate: Validates the entries of included spec files, e.g. `CheckEnv._validate`
+    :param strict: Whether ``validate`` is the strict validator
+    """
+    root = os.path.normpath(path)
+    entries, includes = split_includes(jdata)
+    # the include graph, keyed by real path so that every file is a single node, and the
+    # entries and displayed path of every node
+    graph: dict[str, tuple[str, ...]] = {}
+    nodes: dict[str, tuple[dict[str, Any], str]] = {}
+
+    def add_node(display: str, fragment: Fragment) -> list[tuple[str, str]]:
+        real = os.path.realpath(display)
+        base = os.path.dirname(display)
+        targets = [os.path.normpath(os.path.join(base, include)) for include in fragment.includes]
+        graph[real] = tuple(map(os.path.realpath, targets))
+        nodes[real] = (fragment.entries, display)
+        return [(os.path.realpath(target), target) for target in targets]
+
+    level = add_node(root, Fragment(entries, includes))
+    while level:
+        pending = {real: display for real, display in level if real not in graph}
+        fragments = _load_level(list(pending.values()), validate, strict)
+        level = []
+        for display, fragment in zip(pending.values(), fragments, strict=True):
+            level += add_node(display, fragment)
+
+    merged: dict[str, ComposedSpec] = {}
+    stack: list[str] = []
+
+    def merge(real: str) -> ComposedSpec:
+        if real in stack:
+            cycle = [nodes[node][1] for node in stack[stack.index(real) :]]
+            raise _include_error(jdata, f"include cycle: {' -> '.join([*cycle, nodes[real][1]])}")
+        if real not in merged:
+            stack.append(real)
+            spec: dict[str, Any] = {}
+            sources: dict[str, str] = {}
+            for include in graph[real]:
+                included = merge(include)
+                spec.update(included.spec)
+                sources.update(included.sources)
+            own, display = nodes[real]
+            spec.update(own)
+            sources.update(dict.fromkeys(own, display))
+            stack.pop()
+            merged[real] = ComposedSpec(spec, sources)
+        return merged[real]
+
+    root_real = os.path.realpath(root)
+    composed = merge(root_real)
+    fragments = tuple(display for real, (_, display) in nodes.items() if real != root_real)
+    return composed._replace(fragments=fragments)
@@ -0,0 +1,143 @@
+"""Lazy configuration: variables are resolved and validated on first access.
+
+`checkenv.check` evaluates every entry of the spec up front: each variable is looked up and
+defaulted, and every typed entry is compiled into a validator and validates its value. Apps with
+huge specs often read a handful of variables at startup, so a `LazyConfig` (see
+`checkenv.lazy_config`) does that work per variable instead, the first time the variable is read,
+and memoizes the result. Reading a name the spec does not declare raises KeyError right away, and
+reading a missing required variable, or a typed variable with an invalid value, raises
+CheckEnvException.
+
+The spec file itself is still loaded and validated up front, which a spec cache makes cheap. Since
+nothing else is checked up front, a missing variable that is never read goes unnoticed until
+`LazyConfig.verify_all` runs the full check, exactly like `checkenv.check`; pattern keys are only
+checked then. After os.environ changes, `LazyConfig.invalidate` forgets the memoized values.
+"""
+
+import os
+from collections.abc import Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING, Any
+
+from checkenv.exceptions import CheckEnvException
+from checkenv.spec import TYPED_PROPERTIES, is_pattern_key
+
+if TYPE_CHECKING:
+    import re
+
+    from checkenv import CheckEnv
+    from checkenv.coerce import Validator
+    from checkenv.render import Renderer
+
+
+class LazyConfig(Mapping[str, Any]):
+    """A read-only mapping of the spec's variables to their values, resolved on first access.
+
+    Values are what `check` would produce: the value set in os.environ, else the stringified
+    default, else None for optional variables; typed variables map to their coerced values.
+    Defaults are not written to os.environ, unless by `verify_all`.
+
+    :param env: A CheckEnv whose spec file has been loaded
+    """
+
+    def __init__(self, env: "CheckEnv") -> None:
+        if env.spec is None:
+            raise RuntimeError("Cannot read checkenv config before loading a spec file")
+        self._env = env
+        self._spec = env.spec
+        self._values: dict[str, Any] = {}
+        # compiled on first access and kept when values are invalidated; patterns are shared
+        # between the validators, as in CompiledSpec
+        self._validators: dict[str, Validator] = {}
+        self._patterns: dict[str, re.Pattern[str]] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        if name not in self:
+            raise KeyError(f"{name} is not declared in the spec")
+        value = self._values[name] = self._resolve(name, self._spec[name])
+        return value
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name in self._spec and not is_pattern_key(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._spec if not is_pattern_key(name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LazyConfig({self._env._env_filename!r}, resolved={list(self._values)!r})"
+
+    def _resolve(self, name: str, entry: bool | dict[str, Any]) -> Any:
+        """Looks up, defaults and validates a single variable, the way CompiledSpec.evaluate does"""
+        value = os.environ.get(name)
+        if isinstance(entry, bool):
+            required, default = entry, None
+        else:
+            required, default = entry.get("required", True), entry.get("default")
+        if value is None and default is not None:
+            value = str(default)
+        if value is None:
+            if required:
+                from checkenv.overlay import snapshot_environ
+                from checkenv.suggest import suggest_names
+
+                suggestions = suggest_names([name], snapshot_environ(), exclude=self._spec)
+                raise CheckEnvException([name], [], suggestions=suggestions)
+            return None
+        if isinstance(entry, bool) or TYPED_PROPERTIES.isdisjoint(entry):
+            return value
+        validate = self._validators.get(name)
+        if validate is None:
+            from checkenv.coerce import compile_validator
+
+            validate = self._validators[name] = compile_validator(entry, self._patterns)
+        try:
+            return validate(value)
+        except ValueError as exc:
+            raise CheckEnvException([], [], invalid={name: str(exc)}) from None
+
+    @property
+    def resolved(self) -> list[str]:
+        """The variables resolved (and memoized) so far, in the order they were first read"""
+        return list(self._values)
+
+    def invalidate(self, names: Iterable[str] | None = None) -> None:
+        """Forgets the memoized values of the named variables, or of all of them, after
+        os.environ changed; they are resolved again on their next access.
+        """
+        if names is None:
+            self._values.clear()
+            return
+        for name in names:
+            self._values.pop(name, None)
+
+    def verify_all(
+        self,
+        raise_exception: bool = False,
+        no_output: bool = False,
+        renderer: "Renderer | str" = "color",
+        overlay: bool = False,
+    ) -> "CheckEnv":
+        """Checks the whole spec against the environment, exactly like `checkenv.check`: the
+        results are rendered, defaults are applied to os.environ unless in overlay mode, and a
+        failed check exits or raises CheckEnvException.
+
+        Afterwards every variable is memoized, so reading any of them is free. The parameters are
+        the same as for `checkenv.check`.
+
+        :return: The CheckEnv that ran the check
+        """
+        from checkenv import _finish_check
+        from checkenv.render import get_renderer
+
+        env = _finish_check(self._env, raise_exception, no_output, get_renderer(renderer), overlay)
+        config = env.config
+        values = env.values
+        names = env.compiled_spec.names
+        self._values = {name: values.get(name, config.get(name)) for name in names}
+        return env
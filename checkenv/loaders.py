@@ -0,0 +1,112 @@
+"""Spec file formats: JSON, TOML and the ``[tool.checkenv]`` table of ``pyproject.toml``.
+
+Every format parses the bytes of a spec file, read with a single ``read()``, into the same
+form as a JSON spec, which is then validated like any other spec. The format is chosen by the
+explicit ``spec_format`` of a check, or else by the spec file's name: ``pyproject.toml`` files use
+their ``[tool.checkenv]`` table, other ``.toml`` files are TOML specs, and everything else is
+JSON. `register_loader` adds more formats.
+
+JSON specs are parsed by orjson when it is installed, which is several times faster than the
+standard library for large specs. Anything orjson rejects is parsed again by the standard
+library, so the accepted files and the error messages stay exactly the same.
+"""
+
+from collections.abc import Callable, Iterable
+from functools import cache
+from typing import Any
+
+SpecLoader = Callable[[bytes], Any]
+
+
+@cache
+def _orjson_loads() -> SpecLoader | None:
+    try:
+        from orjson import loads
+    except ImportError:
+        return None
+    return loads
+
+
+def load_json(raw: bytes) -> Any:
+    """Parses a JSON spec, with orjson if it is installed; raises ValueError if malformed"""
+    import json
+
+    loads = _orjson_loads()
+    if loads is not None:
+        try:
+            return loads(raw)
+        except json.JSONDecodeError:
+            # e.g. a byte order mark or NaN, which the standard library accepts
+            pass
+    return json.loads(raw)
+
+
+def load_toml(raw: bytes) -> Any:
+    """Parses a TOML spec; raises ValueError if malformed"""
+    import tomllib
+
+    return tomllib.loads(raw.decode("utf-8"))
+
+
+def load_pyproject(raw: bytes) -> Any:
+    """Parses the ``[tool.checkenv]`` table of a ``pyproject.toml`` file.
+
+    Raises ValueError if the file is malformed or has no ``[tool.checkenv]`` table.
+    """
+    tool = load_toml(raw).get("tool")
+    if not isinstance(tool, dict) or "checkenv" not in tool:
+        raise ValueError("No [tool.checkenv] table found")
+    return tool["checkenv"]
+
+
+# format name -> loader
+LOADERS: dict[str, SpecLoader] = {
+    "json": load_json,
+    "toml": load_toml,
+    "pyproject": load_pyproject,
+}
+# file name suffix -> format name; whole file names take precedence over extensions
+SUFFIXES: dict[str, str] = {
+    "pyproject.toml": "pyproject",
+    ".toml": "toml",
+    ".json": "json",
+}
+
+
+def register_loader(name: str, loader: SpecLoader, suffixes: Iterable[str] = ()) -> None:
+    """Registers a spec file format, e.g. YAML.
+
+    :param name: The format name, for ``spec_format``
+    :param loader: Parses the bytes of a spec file into the same form as a JSON spec, raising
+        ValueError if they are malformed
+    :param suffixes: File extensions (like ``".yaml"``) or whole file names that select the format
+    """
+    LOADERS[name] = loader
+    SUFFIXES.update(dict.fromkeys(suffixes, name))
+
+
+def spec_format_for(filename: str, spec_format: str | None = None) -> str:
+    """Returns the format of a spec file: ``spec_format`` if given, else the one its name selects.
+
+    Raises ValueError for unknown format names.
+    """
+    if spec_format is not None:
+        if spec_format not in LOADERS:
+            formats = ", ".join(LOADERS)
+            raise ValueError(f"Unknown checkenv spec format {spec_format!r} (use one of {formats})")
+        return spec_format
+    import os
+
+    basename = os.path.basename(filename).lower()
+    if basename in SUFFIXES:
+        return SUFFIXES[basename]
+    return SUFFIXES.get(os.path.splitext(basename)[1], "json")
+
+
+def parse_spec(raw: bytes, filename: str, spec_format: str | None = None) -> Any:
+    """Parses the bytes of a spec file in its format; raises ValueError if they are malformed
+
+    :param filename: The spec file's name, which selects the format unless ``spec_format`` is given
+    :param spec_format: The format name, see `LOADERS`
+    """
+    return LOADERS[spec_format_for(filename, spec_format)](raw)
@@ -0,0 +1,207 @@
+"""Checking many spec files at once, e.g. every service's env.json in a monorepo.
+
+Spec files are loaded, validated and evaluated concurrently in a thread or process pool. Every spec
+is evaluated against the same snapshot of the environment and nothing is written to os.environ,
+so the outcome does not depend on the order in which the workers finish. Reports always come back
+in the order the spec files were given.
+"""
+
+import os
+import sys
+from collections.abc import Iterable, Mapping
+from functools import partial
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from checkenv.exceptions import MultiCheckEnvException
+
+if TYPE_CHECKING:
+    from checkenv import EnvCheckResults
+    from checkenv.instrument import CheckStats
+    from checkenv.render import Renderer
+
+
+class SpecReport(NamedTuple):
+    """The outcome of checking a single spec file.
+
+    ``spec`` only holds the entries of the reported variables, for rendering their defaults and
+    descriptions. If the spec file could not be loaded, ``error`` says why. ``stats`` holds the
+    phase durations and counters of the check, and ``invalid`` maps the typed variables with
+    invalid values to the reason.
+    """
+
+    path: str
+    missing: list[str]
+    optional: list[str]
+    spec: dict[str, Any]
+    error: str | None = None
+    stats: "CheckStats | None" = None
+    invalid: Mapping[str, str] | None = None
+
+    @property
+    def failed(self) -> bool:
+        """Whether the spec file could not be loaded, or any required variables are missing or
+        any typed variables are invalid
+        """
+        return self.error is not None or len(self.missing) > 0 or bool(self.invalid)
+
+
+class MultiCheckResult:
+    """The aggregated outcome of check_many, with one report per spec file in input order"""
+
+    def __init__(self, reports: list[SpecReport]) -> None:
+        self._reports = reports
+
+    @property
+    def reports(self) -> list[SpecReport]:
+        """The per spec file reports, in the order the spec files were given"""
+        return self._reports
+
+    @property
+    def check_failed(self) -> bool:
+        """Indicates whether any spec file failed its check"""
+        return any(report.failed for report in self._reports)
+
+    def to_exception(self) -> MultiCheckEnvException:
+        """Builds the exception describing every failed spec file"""
+        return MultiCheckEnvException(
+            {report.path: report.missing for report in self._reports},
+            {report.path: report.optional for report in self._reports},
+            {report.path: report.error for report in self._reports if report.error is not None},
+            {report.path: dict(report.invalid) for report in self._reports if report.invalid},
+        )
+
+    def print_results(self, renderer: "Renderer | str" = "color") -> None:
+        """Renders every spec file's results in one write, in input order.
+
+        An invalid section is included for the spec files with invalid typed variables.
+        """
+        from checkenv.render import get_renderer
+
+        get_renderer(renderer).render_report(
+            [(report.path, _sections(report), report.error) for report in self._reports]
+        )
+
+
+def _sections(report: SpecReport) -> list["EnvCheckResults"]:
+    from checkenv import EnvCheckResults
+
+    sections = [EnvCheckResults(report.missing, report.spec, EnvCheckResults.MISSING)]
+    invalid = report.invalid
+    if invalid:
+        sections.append(
+            EnvCheckResults(list(invalid), report.spec, EnvCheckResults.INVALID, invalid)
+        )
+    sections.append(EnvCheckResults(report.optional, report.spec, EnvCheckResults.OPTIONAL))
+    return sections
+
+
+def _check_one(
+    path: str, env: Mapping[str, str], cache_dir: str | None, strict: bool
+) -> SpecReport:
+    """Loads and evaluates a single spec file; runs inside the worker pool"""
+    from checkenv import CheckEnv, _is_validation_error
+    from checkenv.instrument import PHASE_APPLY
+
+    instance = CheckEnv(env_filename=path, cache_dir=cache_dir, strict=strict)
+    try:
+        instance.load_spec_file()
+    except OSError as exc:
+        abs_path = os.path.abspath(exc.filename or path)
+        error = f'Unable to find checkenv configuration file "{abs_path}"'
+        return SpecReport(path, [], [], {}, error, instance.stats)
+    except ValueError as value_error:  # malformed, or in an unknown format
+        error = f"Invalid spec file: {value_error}"
+        return SpecReport(path, [], [], {}, error, instance.stats)
+    except Exception as exc:
+        if not _is_validation_error(exc):
+            raise
+        return SpecReport(path, [], [], {}, exc.message, instance.stats)
+
+    stats = instance.stats
+    started = stats.start(PHASE_APPLY)
+    evaluation = instance.compiled_spec.evaluate(env)
+    stats.stop(PHASE_APPLY, started)
+    stats.missing = len(evaluation.missing)
+    stats.optional = len(evaluation.optional)
+    spec = instance.spec
+    reported = {
+        name: spec[name]
+        for name in (*evaluation.missing, *evaluation.invalid, *evaluation.optional)
+    }
+    invalid = dict(evaluation.invalid)
+    return SpecReport(path, evaluation.missing, evaluation.optional, reported, None, stats, invalid)
+
+
+def evaluate_many_specs(
+    paths: Iterable[str],
+    env: Mapping[str, str] | None = None,
+    max_workers: int | None = None,
+    use_processes: bool = False,
+    cache_dir: str | None = None,
+    strict: bool = False,
+) -> MultiCheckResult:
+    """Loads and evaluates many spec files concurrently without printing or exiting.
+
+    :param env: The environment to evaluate every spec against (default, a snapshot of os.environ)
+    :param max_workers: The pool size (default, chosen by concurrent.futures)
+    :param use_processes: Use a process pool instead of a thread pool, so that parsing and
+        validating large specs scales with the number of CPU cores
+    """
+    paths = list(paths)
+    snapshot = dict(os.environ if env is None else env)
+    worker = partial(_check_one, env=snapshot, cache_dir=cache_dir, strict=strict)
+    if len(paths) <= 1 or max_workers == 1:
+        return MultiCheckResult(list(map(worker, paths)))
+
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=max_workers) as executor:
+        # map yields results in input order, whatever order the workers finish in
+        return MultiCheckResult(list(executor.map(worker, paths)))
+
+
+def check_many(
+    paths: Iterable[str],
+    raise_exception: bool = False,
+    no_output: bool = False,
+    max_workers: int | None = None,
+    use_processes: bool = False,
+    cache_dir: str | None = None,
+    strict: bool = False,
+    env: Mapping[str, str] | None = None,
+    renderer: "Renderer | str" = "color",
+) -> MultiCheckResult:
+    """Checks many spec files concurrently and reports the results in one aggregated report.
+
+    Unlike check, default values are not applied to os.environ, since spec files may disagree
+    about them. Spec files that cannot be loaded count as failures.
+
+    :param paths: The spec files to check
+    :type paths: Iterable[str]
+    :param raise_exception: If any check fails, raise a MultiCheckEnvException instead of exiting
+    :type raise_exception: bool, optional
+    :param no_output: Do not write anything to stdout
+    :type no_output: bool, optional
+    :param max_workers: The number of workers in the pool (default, chosen by concurrent.futures)
+    :type max_workers: int, optional
+    :param use_processes: Use a process pool instead of a thread pool (default, False)
+    :type use_processes: bool, optional
+    :param cache_dir: Directory for caching validated specs between runs (default, no cache)
+    :type cache_dir: str, optional
+    :param strict: Validate specs with the jsonschema reference validator (default, False)
+    :type strict: bool, optional
+    :param env: The environment to check against (default, a snapshot of os.environ)
+    :type env: Mapping[str, str], optional
+    :param renderer: The output format ("color", "text", "json" or "jsonl"), or a Renderer
+        instance to write to another stream or a logger (default, "color")
+    :type renderer: Renderer or str, optional
+    """
+    result = evaluate_many_specs(paths, env, max_workers, use_processes, cache_dir, strict)
+    if not no_output:
+        result.print_results(renderer)
+    if result.check_failed:
+        if raise_exception:
+            raise result.to_exception()
+        sys.exit(1)
+    return result
@@ -0,0 +1,66 @@
+"""Undeclared variables: variables in the app's namespaces that the spec does not declare.
+
+A leftover ``APP_OLD_FLAG`` or a misspelled ``APP_DATABSE_URL`` override silently does nothing,
+so a check can list every variable in the app's namespaces that is not declared in the spec. A
+namespace is a name prefix like ``APP_``, or a glob or regular expression written like a pattern
+key (``APP_*_URL``, ``/APP_[0-9]+_.*/``, see checkenv.patterns).
+
+`NamespaceIndex` is built once per check, so finding the undeclared variables stays linear in the
+size of the environment however many namespaces there are. The prefixes are kept sorted, with
+every prefix that extends a shorter one dropped. A name can then only start with the greatest
+prefix not after it, which one bisection finds. Globs and regular expressions are combined into
+one `PatternMatcher`.
+"""
+
+from bisect import bisect_right
+from collections.abc import Container, Iterable
+
+from checkenv.spec import is_pattern_key
+
+
+class NamespaceIndex:
+    """The app's namespaces, indexed for matching many variable names.
+
+    Raises re.error if a regular expression namespace does not compile.
+
+    :param namespaces: Name prefixes like ``APP_``, and globs or regular expressions written like
+        pattern keys
+    """
+
+    def __init__(self, namespaces: Iterable[str]) -> None:
+        prefixes = []
+        patterns = []
+        for namespace in dict.fromkeys(namespaces):
+            (patterns if is_pattern_key(namespace) else prefixes).append(namespace)
+        # without the prefixes that extend another one, only one prefix can match any name
+        self._prefixes: list[str] = []
+        for prefix in sorted(prefixes):
+            if not self._prefixes or not prefix.startswith(self._prefixes[-1]):
+                self._prefixes.append(prefix)
+        self._matcher = None
+        if patterns:
+            from checkenv.patterns import PatternMatcher
+
+            self._matcher = PatternMatcher(patterns)
+
+    def _has_prefix(self, name: str) -> bool:
+        index = bisect_right(self._prefixes, name)
+        return index > 0 and name.startswith(self._prefixes[index - 1])
+
+    def match(self, names: Iterable[str]) -> list[str]:
+        """Returns the names in any of the namespaces, in the order given"""
+        names = list(names)
+        matched = set()
+        if self._matcher is not None:
+            for pattern_matches in self._matcher.match(names):
+                matched.update(pattern_matches)
+        return [name for name in names if name in matched or self._has_prefix(name)]
+
+    def undeclared(self, names: Iterable[str], declared: Container[str]) -> list[str]:
+        """Returns the names in any of the namespaces that are not declared, sorted
+
+        :param names: The variables to look at, e.g. those set in the environment
+        :param declared: The declared variables, e.g. the spec's and those matching its pattern
+            keys
+        """
+        return sorted(name for name in self.match(names) if name not in declared)
@@ -0,0 +1,200 @@
+"""An outcome cache for checks that run in many processes, e.g. pre-fork web server workers.
+
+Under gunicorn or uWSGI every worker imports the application and checks the environment again,
+loading the same spec and printing the same report once per worker. With an outcome cache, the
+first check stores its outcome (the missing, optional and invalid variables, and the defaults),
+together with the validated spec, and later checks reuse it without loading, validating or
+printing anything as long as their fingerprint matches.
+
+The fingerprint covers the spec (the content of the spec file and the size and modification time
+of every spec file it includes) and the values of the spec's variables, so any change to a
+relevant variable means the spec is evaluated again. For specs with pattern keys, every variable
+is relevant.
+
+The cache is a single ``marshal`` file, written atomically and read through ``mmap``. Entries are
+also kept in memory, so workers forked after the master process ran the check reuse its outcome
+without reading the file at all. Each entry records the fingerprint of the environment both
+before and after the defaults were applied, since forked workers inherit the applied defaults.
+"""
+
+import contextlib
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+import threading
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from checkenv.spec import SpecEvaluation
+
+# bump whenever the entry layout changes
+_FORMAT_VERSION = 1
+# the most fingerprints kept per entry; the oldest ones are dropped first
+MAX_OUTCOMES = 16
+
+# cache file path -> entry, inherited by forked processes
+_entries: dict[str, dict[str, Any]] = {}
+_entries_lock = threading.Lock()
+
+
+class Outcome(NamedTuple):
+    """The reusable outcome of evaluating a spec against an environment"""
+
+    missing: list[str]
+    optional: list[str]
+    defaults: dict[str, str]
+    invalid: dict[str, str]
+    matches: dict[str, list[str]]
+
+    @classmethod
+    def of(cls, evaluation: "SpecEvaluation") -> "Outcome":
+        """Returns the reusable part of an evaluation, as plain data"""
+        return cls(
+            list(evaluation.missing),
+            list(evaluation.optional),
+            dict(evaluation.defaults),
+            dict(evaluation.invalid),
+            {key: list(names) for key, names in evaluation.matches.items()},
+        )
+
+
+def env_fingerprint(
+    names: Iterable[str], env: Mapping[str, str], all_variables: bool = False
+) -> str:
+    """Returns the fingerprint of the values of ``names`` in ``env``.
+
+    :param all_variables: Include every variable of ``env``, e.g. for specs with pattern keys
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    for name in names:
+        value = env.get(name)
+        # an unset variable must not look like an empty one
+        digest.update(b"\1" if value is None else f"={value}".encode("utf-8", "surrogatepass"))
+        digest.update(b"\0")
+    if all_variables:
+        for name, value in sorted(env.items()):
+            digest.update(f"{name}={value}\0".encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+def _fragment_stats(paths: Iterable[str]) -> list[tuple[str, int, int]] | None:
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return stats
+
+
+class OutcomeCache:
+    """A file of check outcomes for one spec file, shared by every process that checks it.
+
+    Cache failures are never fatal: a missing, corrupt or stale file is treated as a miss, and an
+    unwritable file simply means nothing gets stored.
+
+    :param path: The cache file, e.g. ``/tmp/myapp-checkenv.outcome``
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = os.path.abspath(path)
+
+    @property
+    def path(self) -> str:
+        """The absolute path of the cache file"""
+        return self._path
+
+    @staticmethod
+    def spec_key(filename: str, raw: bytes) -> tuple[Any, ...]:
+        """Returns the key of a spec file's entries: its path and a hash of its content"""
+        digest = hashlib.blake2b(raw, digest_size=20).hexdigest()
+        return (_FORMAT_VERSION, sys.implementation.cache_tag, os.path.abspath(filename), digest)
+
+    def _read(self) -> dict[str, Any] | None:
+        entry = _entries.get(self._path)
+        if entry is not None:
+            return entry
+        try:
+            with (
+                open(self._path, "rb") as cache_file,
+                mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped,
+            ):
+                entry = marshal.loads(mapped)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(entry, dict):
+            return None
+        with _entries_lock:
+            _entries[self._path] = entry
+        return entry
+
+    def load(self, key: tuple[Any, ...]) -> dict[str, Any] | None:
+        """Returns the entry for a spec key if the spec files it includes are unchanged"""
+        entry = self._read()
+        if entry is None or entry.get("key") != key:
+            return None
+        fragments = entry["fragments"]
+        if fragments and _fragment_stats(path for path, _, _ in fragments) != fragments:
+            return None
+        return entry
+
+    def store(
+        self,
+        key: tuple[Any, ...],
+        spec: dict[str, Any],
+        sources: Mapping[str, str],
+        fragments: Iterable[str],
+        outcomes: Mapping[str, Outcome],
+    ) -> None:
+        """Adds outcomes to the entry for a spec key, replacing the entry of any other key.
+
+        Filesystem errors are ignored.
+
+        :param spec: The validated spec, merged with the spec files it includes
+        :param sources: The spec file that defined each entry, see `CheckEnv.sources`
+        :param fragments: The spec files the spec file includes, transitively
+        :param outcomes: The outcomes to add, by environment fingerprint
+        """
+        entry = self.load(key)
+        if entry is None:
+            stats = _fragment_stats(sorted(map(os.path.abspath, fragments)))
+            if stats is None:  # a spec file it includes was removed meanwhile
+                return
+            entry = {
+                "key": key,
+                "fragments": stats,
+                "spec": spec,
+                "sources": dict(sources),
+                "outcomes": {},
+            }
+        merged = {**entry["outcomes"], **{fp: tuple(outcome) for fp, outcome in outcomes.items()}}
+        entry = {**entry, "outcomes": dict(list(merged.items())[-MAX_OUTCOMES:])}
+        with _entries_lock:
+            _entries[self._path] = entry
+
+        import tempfile
+
+        data = marshal.dumps(entry)
+        tmp_path = None
+        try:
+            directory = os.path.dirname(self._path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as cache_file:
+                cache_file.write(data)
+            # atomic rename so concurrent readers never see a partially written file
+            os.replace(tmp_path, self._path)
+        except OSError:
+            if tmp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(tmp_path)
+
+
+def clear_memory() -> None:
+    """Forgets the entries kept in memory, e.g. in tests"""
+    with _entries_lock:
+        _entries.clear()
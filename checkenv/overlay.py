@@ -0,0 +1,160 @@
+"""Resolved configurations: spec defaults layered over a snapshot of the environment.
+
+Applying a spec used to mean writing its defaults into os.environ, which costs a ``putenv`` per
+default, races with other threads reading or writing the environment, and rules out evaluating a
+spec speculatively. A `ResolvedConfig` instead layers the defaults over an environment snapshot
+without copying either: lookups check the defaults first and fall back to the snapshot, and
+nothing is written to os.environ unless `ResolvedConfig.commit` is called.
+
+checkenv takes `ENVIRON_LOCK` whenever it snapshots or writes os.environ, so concurrent checks
+never snapshot a partially committed environment.
+"""
+
+import os
+import threading
+from collections.abc import Iterator, Mapping
+from types import MappingProxyType
+from typing import Any
+
+# serializes checkenv's snapshots of and writes to os.environ
+ENVIRON_LOCK = threading.RLock()
+
+
+class _CaseInsensitiveEnviron(Mapping[str, str]):
+    """A copy of os.environ on Windows, where variable names are case-insensitive"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, environ: Mapping[str, str]) -> None:
+        self._data = {name.upper(): value for name, value in environ.items()}
+
+    def __getitem__(self, name: str) -> str:
+        return self._data[name.upper()]
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.upper() in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def snapshot_environ() -> Mapping[str, str]:
+    """Returns a consistent snapshot of os.environ"""
+    with ENVIRON_LOCK:
+        # os.environ is case-insensitive on Windows, which a plain dict copy is not
+        if os.name == "nt":
+            return _CaseInsensitiveEnviron(os.environ)
+        return os.environ.copy()
+
+
+class ResolvedConfig(Mapping[str, str]):
+    """A read-only view of an environment snapshot with a spec's defaults layered on top.
+
+    Configs are immutable, so they can be shared between threads freely.
+    """
+
+    __slots__ = (
+        "_base",
+        "_defaults",
+        "_missing",
+        "_optional",
+        "_invalid",
+        "_values",
+        "_loaded",
+        "_override",
+    )
+
+    def __init__(
+        self,
+        base: Mapping[str, str],
+        defaults: dict[str, str],
+        missing: list[str],
+        optional: list[str],
+        invalid: Mapping[str, str] | None = None,
+        values: Mapping[str, Any] | None = None,
+        loaded: Mapping[str, str] | None = None,
+        override: bool = False,
+    ) -> None:
+        self._base = base
+        self._defaults = defaults
+        self._missing = missing
+        self._optional = optional
+        self._invalid = {} if invalid is None else invalid
+        self._values = {} if values is None else values
+        # the variables loaded from .env files and secret files, already layered into base
+        self._loaded = {} if loaded is None else loaded
+        # whether the loaded variables win over the environment, like dotenv_override
+        self._override = override
+
+    def __getitem__(self, name: str) -> str:
+        try:
+            return self._defaults[name]
+        except KeyError:
+            return self._base[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._defaults or name in self._base
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._defaults
+        defaults = self._defaults
+        yield from (name for name in self._base if name not in defaults)
+
+    def __len__(self) -> int:
+        base = self._base
+        return len(base) + sum(1 for name in self._defaults if name not in base)
+
+    def __repr__(self) -> str:
+        return f"ResolvedConfig(defaults={self._defaults!r}, missing={self._missing!r})"
+
+    @property
+    def defaults(self) -> Mapping[str, str]:
+        """The defaults layered over the environment, keyed by environment variable name"""
+        return MappingProxyType(self._defaults)
+
+    @property
+    def missing(self) -> list[str]:
+        """The required environment variables that are missing"""
+        return self._missing
+
+    @property
+    def optional(self) -> list[str]:
+        """The optional environment variables that were not set in the environment"""
+        return self._optional
+
+    @property
+    def invalid(self) -> Mapping[str, str]:
+        """The typed environment variables whose values are invalid, with the reason"""
+        return MappingProxyType(self._invalid)
+
+    @property
+    def values(self) -> Mapping[str, Any]:
+        """The coerced values of the valid typed environment variables"""
+        return MappingProxyType(self._values)
+
+    @property
+    def check_failed(self) -> bool:
+        """Indicates whether any required environment variables are missing or invalid"""
+        return len(self._missing) > 0 or len(self._invalid) > 0
+
+    def commit(self) -> dict[str, str]:
+        """Writes the variables loaded from ``.env`` files and secret files, and the defaults, to
+        os.environ while holding `ENVIRON_LOCK`.
+
+        Variables that were set since the snapshot was taken are left alone, unless the loaded
+        variables override the environment. Returns the defaults that were written.
+        """
+        with ENVIRON_LOCK:
+            environ = os.environ
+            if self._loaded:
+                loaded = self._loaded
+                if not self._override:
+                    loaded = {name: value for name, value in loaded.items() if name not in environ}
+                environ.update(loaded)
+            applied = {name: value for name, value in self._defaults.items() if name not in environ}
+            if applied:
+                environ.update(applied)
+        return applied
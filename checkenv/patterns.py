@@ -0,0 +1,136 @@
+"""Pattern spec keys: rules for families of variables like ``SHARD_<n>_DSN`` or ``FEATURE_*``.
+
+A spec key containing ``*`` (any characters) or ``?`` (one character) is a glob, and a key
+wrapped in slashes like ``/SHARD_[0-9]+_DSN/`` is a regular expression; either must match whole
+variable names. A pattern entry is satisfied when at least ``min_count`` variables match it (by
+default 1 if the entry is required, 0 otherwise), and, with ``require_value``, every matching
+variable has a non-empty value.
+
+Matching thousands of patterns against an environment with tens of thousands of variables one
+pattern at a time would be far too slow, and so is a naive alternation of all patterns, which the
+regex engine tries one alternative after another. `PatternMatcher` instead compiles every pattern
+into one regex factored over a trie of the patterns' literal prefixes, so a variable that matches
+no pattern is rejected in a single C-level match that fails within its first few characters.
+Only variables that match some pattern walk the prefix trie in Python to find every pattern they
+match.
+"""
+
+import re
+from collections.abc import Iterable, Mapping
+from typing import Any, NamedTuple
+
+_GLOB_CHARS = frozenset("*?")
+# patterns compiled with other flags, e.g. a leading (?i), cannot be part of the combined regex
+_COMBINABLE_FLAGS = re.compile("", re.DOTALL).flags
+# a regex key's literal prefix: name characters that are not quantified
+_REGEX_PREFIX_RE = re.compile(r"[A-Za-z0-9_]*?(?=[A-Za-z0-9_][*+?{]|[^A-Za-z0-9_]|$)")
+
+
+class PatternRule(NamedTuple):
+    """A compiled pattern entry"""
+
+    key: str
+    min_count: int
+    require_value: bool
+
+    @classmethod
+    def from_entry(cls, key: str, entry: bool | Mapping[str, Any]) -> "PatternRule":
+        if isinstance(entry, bool):
+            return cls(key, int(entry), False)
+        default_count = 1 if entry.get("required", True) else 0
+        return cls(
+            key, int(entry.get("min_count", default_count)), entry.get("require_value", False)
+        )
+
+
+def pattern_regex(key: str) -> tuple[str, str]:
+    """Splits a pattern key into its literal prefix and the regex matching the rest of a name"""
+    if key.startswith("/"):
+        source = key[1:-1]
+        if "|" in source:
+            return "", source
+        prefix = _REGEX_PREFIX_RE.match(source).group()
+        return prefix, source[len(prefix) :]
+    index = min(key.index(char) for char in _GLOB_CHARS if char in key)
+    rest = "".join(
+        ".*" if char == "*" else "." if char == "?" else re.escape(char) for char in key[index:]
+    )
+    return key[:index], rest
+
+
+class _TrieNode:
+    __slots__ = ("children", "patterns")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        # (pattern index, rest regex) of the patterns whose literal prefix ends here
+        self.patterns: list[tuple[int, str]] = []
+
+
+def _trie_regex(node: _TrieNode) -> str:
+    alternatives = [f"(?:{rest})" for _, rest in node.patterns]
+    alternatives += [
+        re.escape(char) + _trie_regex(child) for char, child in sorted(node.children.items())
+    ]
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return f"(?:{'|'.join(alternatives)})"
+
+
+class PatternMatcher:
+    """Matches variable names against many pattern keys at once.
+
+    :param keys: The pattern keys, in spec order
+    """
+
+    def __init__(self, keys: Iterable[str]) -> None:
+        self._keys = tuple(keys)
+        self._root = _TrieNode()
+        # patterns with capture groups would renumber each other's backreferences if combined, so
+        # they are matched separately, like patterns with inline flags
+        self._separate: list[int] = []
+        self._regexes: list[re.Pattern[str]] = []
+        for index, key in enumerate(self._keys):
+            prefix, rest = pattern_regex(key)
+            regex = re.compile(re.escape(prefix) + rest, re.DOTALL)
+            self._regexes.append(regex)
+            if regex.groups or regex.flags != _COMBINABLE_FLAGS:
+                self._separate.append(index)
+                continue
+            node = self._root
+            for char in prefix:
+                node = node.children.setdefault(char, _TrieNode())
+            node.patterns.append((index, rest))
+        combined = self._root.patterns or self._root.children
+        self._combined = re.compile(_trie_regex(self._root), re.DOTALL) if combined else None
+
+    @property
+    def keys(self) -> tuple[str, ...]:
+        """The pattern keys, in spec order"""
+        return self._keys
+
+    def _candidates(self, name: str) -> Iterable[int]:
+        node = self._root
+        yield from (index for index, _ in node.patterns)
+        for char in name:
+            child = node.children.get(char)
+            if child is None:
+                return
+            node = child
+            yield from (index for index, _ in node.patterns)
+
+    def match(self, names: Iterable[str]) -> list[list[str]]:
+        """Returns the names matching each pattern key, in key order; names keep their order"""
+        matches: list[list[str]] = [[] for _ in self._keys]
+        regexes = self._regexes
+        combined = None if self._combined is None else self._combined.fullmatch
+        separate = [(index, regexes[index].fullmatch) for index in self._separate]
+        for name in names:
+            if combined is not None and combined(name) is not None:
+                for index in self._candidates(name):
+                    if regexes[index].fullmatch(name) is not None:
+                        matches[index].append(name)
+            for index, fullmatch in separate:
+                if fullmatch(name) is not None:
+                    matches[index].append(name)
+        return matches
@@ -0,0 +1,252 @@
+"""Renderers for checkenv results.
+
+A renderer formats every section of a report into a single string and writes it with one call,
+either to a stream (stdout by default) or to a ``logging.Logger``, so reports with hundreds of
+rows are written quickly and do not interleave with other writers.
+
+Renderers are selected by format name with `get_renderer`: ``color`` (the classic colored console
+output), ``text``, ``json`` or ``jsonl`` (JSON Lines).
+"""
+
+import re
+import sys
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any, TextIO
+
+from checkenv.exceptions import format_suggestions
+
+if TYPE_CHECKING:
+    import logging
+
+    from checkenv import EnvCheckResultRow, EnvCheckResults
+
+_ANSI_CODE_RE = re.compile("\033\\[[0-9;]*m")
+
+# (spec file path, result sections, load error) for each spec file in a multi-file report
+FileReport = tuple[str, Sequence["EnvCheckResults"], str | None]
+
+
+class Renderer(ABC):
+    """Base class for renderers; subclasses implement `format_sections` and `format_error`.
+
+    :param stream: The stream to write to (default, sys.stdout at the time of writing)
+    :param logger: Log the rendered output with this logger instead of writing to a stream
+    :param level: The level to log the rendered output at (default, logging.WARNING)
+    """
+
+    def __init__(
+        self,
+        stream: TextIO | None = None,
+        logger: "logging.Logger | None" = None,
+        level: int = 30,  # logging.WARNING, without importing logging
+    ) -> None:
+        self._stream = stream
+        self._logger = logger
+        self._level = level
+
+    @abstractmethod
+    def format_sections(self, sections: Sequence["EnvCheckResults"]) -> str:
+        """Formats the result sections of a single check"""
+
+    @abstractmethod
+    def format_error(self, message: str) -> str:
+        """Formats an error that stopped the check, e.g. an invalid spec file"""
+
+    def format_report(self, reports: Sequence[FileReport]) -> str:
+        """Formats the results of checking many spec files, listing each file that has output"""
+        parts = []
+        for path, sections, error in reports:
+            body = self.format_error(error) if error is not None else self.format_sections(sections)
+            if body:
+                parts.append(f"\n{path}\n{body}")
+        return "".join(parts)
+
+    def render(self, sections: Sequence["EnvCheckResults"]) -> None:
+        """Formats and writes the result sections of a single check"""
+        self._write(self.format_sections(sections))
+
+    def render_error(self, message: str) -> None:
+        """Formats and writes an error that stopped the check"""
+        self._write(self.format_error(message))
+
+    def render_report(self, reports: Sequence[FileReport]) -> None:
+        """Formats and writes the results of checking many spec files"""
+        self._write(self.format_report(reports))
+
+    def _target_stream(self) -> TextIO:
+        return sys.stdout if self._stream is None else self._stream
+
+    def _write(self, text: str) -> None:
+        if not text:
+            return
+        if self._logger is not None:
+            self._logger.log(self._level, text.rstrip("\n"))
+            return
+        stream = self._target_stream()
+        stream.write(text)
+        stream.flush()
+
+
+class PlainTextRenderer(Renderer):
+    """Renders results as plain text, one row per line"""
+
+    def format_sections(self, sections: Sequence["EnvCheckResults"]) -> str:
+        return "".join(f"\n{section}\n" for section in sections if len(section))
+
+    def format_error(self, message: str) -> str:
+        return message + "\n"
+
+
+class ColorConsoleRenderer(PlainTextRenderer):
+    """Renders results with ANSI colors; the classic visual from the npm checkenv module.
+
+    When writing to a stream, the colors are stripped if the stream is not a terminal, and
+    colorama converts them on legacy Windows consoles.
+    """
+
+    # the same ANSI codes as colorama's Back.RED + Fore.WHITE, Back.YELLOW + Fore.BLACK,
+    # Fore.BLUE, Fore.YELLOW, Fore.RED, Fore.GREEN and Style.RESET_ALL
+    COLORS_HEADER_MANDATORY = "\033[41m\033[37m"
+    COLORS_HEADER_OPTIONAL = "\033[43m\033[30m"
+    COLORS_ENV_NAME_TEXT = "\033[34m"
+    COLORS_DEFAULT_TEXT = "\033[33m"
+    COLORS_ERROR_TEXT = "\033[31m"
+    COLORS_SUGGESTION_TEXT = "\033[32m"
+    COLORS_RESET = "\033[0m"
+
+    def _header_color(self, section: "EnvCheckResults") -> str:
+        if section.section in (section.OPTIONAL, section.UNDECLARED):
+            return self.COLORS_HEADER_OPTIONAL
+        return self.COLORS_HEADER_MANDATORY
+
+    def _format_row(self, row: "EnvCheckResultRow") -> str:
+        parts = [self.COLORS_ENV_NAME_TEXT, row.name, self.COLORS_RESET]
+        if row.default is not None:
+            parts += [self.COLORS_DEFAULT_TEXT, f" (default={row.default})", self.COLORS_RESET]
+        if row.error is not None:
+            parts += [self.COLORS_ERROR_TEXT, f" (invalid: {row.error})", self.COLORS_RESET]
+        if row.suggestions:
+            suggestions = format_suggestions(row.suggestions)
+            parts += [self.COLORS_SUGGESTION_TEXT, f" ({suggestions})", self.COLORS_RESET]
+        if row.source is not None:
+            parts.append(f" (from {row.source})")
+        if row.description:
+            parts.append(f" {row.description}")
+        parts.append(self.COLORS_RESET)
+        return "".join(parts)
+
+    def format_sections(self, sections: Sequence["EnvCheckResults"]) -> str:
+        parts = []
+        for section in sections:
+            if not len(section):
+                continue
+            parts.append(f"{self._header_color(section)}\n{section.header}{self.COLORS_RESET}\n")
+            parts.extend(f"{self._format_row(row)}\n" for row in section.rows)
+        return "".join(parts)
+
+    def _write(self, text: str) -> None:
+        if self._logger is None and text:
+            from colorama import AnsiToWin32
+
+            wrapper = AnsiToWin32(self._target_stream())
+            if wrapper.convert:
+                # legacy Windows consoles need colorama to turn the codes into console API calls
+                wrapper.write(text)
+                wrapper.stream.flush()
+                return
+            if wrapper.strip:
+                # strip here rather than through colorama's wrapper, which writes piecemeal
+                text = _ANSI_CODE_RE.sub("", text)
+        super()._write(text)
+
+
+def _row_dict(row: "EnvCheckResultRow") -> dict[str, Any]:
+    document = {"name": row.name, "default": row.default, "description": row.description}
+    if row.error is not None:
+        document["error"] = row.error
+    if row.suggestions:
+        document["suggestions"] = list(row.suggestions)
+    if row.source is not None:
+        document["source"] = row.source
+    return document
+
+
+class JsonRenderer(Renderer):
+    """Renders results as a single JSON document with a list of rows per section"""
+
+    def _document(self, sections: Sequence["EnvCheckResults"]) -> dict[str, Any]:
+        return {section.section: list(map(_row_dict, section.rows)) for section in sections}
+
+    def _dumps(self, document: Any) -> str:
+        import json
+
+        return json.dumps(document) + "\n"
+
+    def format_sections(self, sections: Sequence["EnvCheckResults"]) -> str:
+        return self._dumps(self._document(sections))
+
+    def format_error(self, message: str) -> str:
+        return self._dumps({"error": message})
+
+    def format_report(self, reports: Sequence[FileReport]) -> str:
+        files = []
+        for path, sections, error in reports:
+            document = {"path": path, **self._document(sections)}
+            if error is not None:
+                document["error"] = error
+            files.append(document)
+        return self._dumps({"files": files})
+
+
+class JsonLinesRenderer(JsonRenderer):
+    """Renders results as JSON Lines, one object per row tagged with its section"""
+
+    def _lines(self, sections: Sequence["EnvCheckResults"], **extra: Any) -> list[str]:
+        import json
+
+        return [
+            json.dumps({**extra, "section": section.section, **_row_dict(row)}) + "\n"
+            for section in sections
+            for row in section.rows
+        ]
+
+    def format_sections(self, sections: Sequence["EnvCheckResults"]) -> str:
+        return "".join(self._lines(sections))
+
+    def format_report(self, reports: Sequence[FileReport]) -> str:
+        lines = []
+        for path, sections, error in reports:
+            if error is not None:
+                lines.append(self._dumps({"path": path, "error": error}))
+            lines.extend(self._lines(sections, path=path))
+        return "".join(lines)
+
+
+RENDERERS: dict[str, type[Renderer]] = {
+    "color": ColorConsoleRenderer,
+    "text": PlainTextRenderer,
+    "json": JsonRenderer,
+    "jsonl": JsonLinesRenderer,
+}
+
+
+def get_renderer(
+    renderer: "Renderer | str" = "color",
+    stream: TextIO | None = None,
+    logger: "logging.Logger | None" = None,
+) -> Renderer:
+    """Returns a renderer instance, creating one if given a format name.
+
+    Raises ValueError for unknown format names.
+    """
+    if isinstance(renderer, Renderer):
+        return renderer
+    try:
+        renderer_class = RENDERERS[renderer]
+    except KeyError:
+        formats = ", ".join(RENDERERS)
+        raise ValueError(
+            f"Unknown checkenv output format {renderer!r} (use one of {formats})"
+        ) from None
+    return renderer_class(stream=stream, logger=logger)
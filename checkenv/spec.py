@@ -0,0 +1,311 @@
+"""A precomputed form of a validated checkenv spec.
+
+Applying a spec used to walk the spec dictionary and call ``os.getenv`` (and write
+``os.environ``) once per key. ``CompiledSpec`` flattens a validated spec into parallel tuples once,
+so evaluating it is a single pass of dictionary lookups against an environment snapshot, and the
+defaults it produces can be committed to the process environment in one batch.
+
+A compiled spec can be evaluated against any mapping, not just ``os.environ``. For validating
+large numbers of environments, ``CompiledSpec.evaluate_many`` streams back compact bitsets of
+missing and optional variables (bit ``i`` stands for the i-th variable in spec order) instead of
+building result lists for every mapping.
+
+Typed entries (see checkenv.coerce) are compiled into validators along with the spec, so
+evaluating a spec also validates and coerces the values of its typed variables without parsing
+anything twice. Pattern keys (see checkenv.patterns) are compiled into a single matcher, built on
+first use. Specs without typed entries or pattern keys import neither module.
+"""
+
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from itertools import chain
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from checkenv.patterns import PatternMatcher, PatternRule
+
+# the entry properties that make a spec entry typed
+TYPED_PROPERTIES = frozenset({"type", "min", "max", "pattern", "choices"})
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+class SpecEvaluation(NamedTuple):
+    """The outcome of evaluating a spec against an environment.
+
+    ``missing`` and ``optional`` follow the spec's key order, with pattern keys after the
+    variable names, and ``defaults`` maps each unset variable that has a default to its
+    stringified default value. For typed variables that are set or have a default, ``values``
+    maps each valid one to its coerced value, and ``invalid`` maps each invalid one, and each
+    pattern key whose matches break its rules, to the reason. ``matches`` maps each pattern key
+    to the variables matching it.
+    """
+
+    missing: list[str]
+    optional: list[str]
+    defaults: dict[str, str]
+    invalid: Mapping[str, str] = _EMPTY
+    values: Mapping[str, Any] = _EMPTY
+    matches: Mapping[str, list[str]] = _EMPTY
+
+
+def is_pattern_key(key: str) -> bool:
+    """Whether a validated spec key is a glob or regex pattern rather than a variable name"""
+    return "*" in key or "?" in key or key.startswith("/")
+
+
+def _pattern_keys(spec: Mapping[str, Any]) -> list[str]:
+    # one scan over all keys at once, so specs without patterns pay next to nothing
+    joined = "\0" + "\0".join(spec)
+    if "*" not in joined and "?" not in joined and "\0/" not in joined:
+        return []
+    return [key for key in spec if is_pattern_key(key)]
+
+
+def compile_patterns(spec: Mapping[str, Any]) -> "tuple[PatternRule, ...]":
+    """Compiles the pattern entries of a validated spec into rules, in spec order"""
+    keys = _pattern_keys(spec)
+    if not keys:
+        return ()
+    from checkenv.patterns import PatternRule
+
+    return tuple(PatternRule.from_entry(key, spec[key]) for key in keys)
+
+
+def compile_validators(spec: Mapping[str, Any]) -> tuple[tuple[str, Callable[[str], Any]], ...]:
+    """Compiles the typed entries of a validated spec into ``(name, validator)`` pairs, in spec
+    order. Identical patterns are compiled once per spec.
+    """
+    # pattern entries cannot be typed, so every typed entry is a variable
+    typed = [
+        (name, entry)
+        for name, entry in spec.items()
+        if isinstance(entry, dict) and not TYPED_PROPERTIES.isdisjoint(entry)
+    ]
+    if not typed:
+        return ()
+    from checkenv.coerce import compile_validator
+
+    patterns: dict[str, Any] = {}
+    return tuple((name, compile_validator(entry, patterns)) for name, entry in typed)
+
+
+class CompiledSpec:
+    """A validated spec flattened into parallel, spec-ordered tuples"""
+
+    __slots__ = (
+        "_names",
+        "_required",
+        "_defaults",
+        "_descriptions",
+        "_validators",
+        "_patterns",
+        "_matcher",
+        "_bit_index",
+    )
+
+    def __init__(
+        self,
+        names: tuple[str, ...],
+        required: tuple[bool, ...],
+        defaults: tuple[str | None, ...],
+        descriptions: tuple[str | None, ...],
+        validators: tuple[tuple[str, Callable[[str], Any]], ...] = (),
+        patterns: "tuple[PatternRule, ...]" = (),
+    ) -> None:
+        self._names = names
+        self._required = required
+        self._defaults = defaults
+        self._descriptions = descriptions
+        self._validators = validators
+        self._patterns = patterns
+        self._matcher: PatternMatcher | None = None
+        # (bit per name, required names, optional names), built on first use by evaluate_many
+        self._bit_index: tuple[dict[str, int], frozenset[str], frozenset[str]] | None = None
+
+    @classmethod
+    def from_spec(cls, spec: dict[str, Any]) -> "CompiledSpec":
+        """Compiles a spec that has already been validated against the spec schema"""
+        patterns = compile_patterns(spec)
+        pattern_keys = {rule.key for rule in patterns}
+        names = []
+        required = []
+        defaults: list[str | None] = []
+        descriptions: list[str | None] = []
+        for name, value in spec.items():
+            if pattern_keys and name in pattern_keys:
+                continue
+            names.append(name)
+            if isinstance(value, bool):
+                required.append(value)
+                defaults.append(None)
+                descriptions.append(None)
+            else:
+                required.append(value.get("required", True))
+                default = value.get("default", None)
+                defaults.append(None if default is None else str(default))
+                descriptions.append(value.get("description", None))
+        return cls(
+            tuple(names),
+            tuple(required),
+            tuple(defaults),
+            tuple(descriptions),
+            compile_validators(spec),
+            patterns,
+        )
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        """The environment variable names, in spec order, without the pattern keys"""
+        return self._names
+
+    @property
+    def pattern_keys(self) -> tuple[str, ...]:
+        """The pattern keys, in spec order"""
+        return tuple(rule.key for rule in self._patterns)
+
+    @property
+    def required(self) -> tuple[bool, ...]:
+        """Whether each variable is required (ignoring defaults), in spec order"""
+        return self._required
+
+    @property
+    def defaults(self) -> tuple[str | None, ...]:
+        """The stringified default for each variable, or None if it has none, in spec order"""
+        return self._defaults
+
+    @property
+    def descriptions(self) -> tuple[str | None, ...]:
+        """The description of each variable, or None if it has none, in spec order"""
+        return self._descriptions
+
+    @property
+    def typed(self) -> bool:
+        """Whether the spec has typed variables, whose values are validated and coerced"""
+        return len(self._validators) > 0
+
+    def evaluate(self, env: Mapping[str, str]) -> SpecEvaluation:
+        """Evaluates the spec against an environment mapping without modifying it.
+
+        A variable that is set, even to an empty string, is satisfied. An unset variable with a
+        default is optional and gets its default, otherwise it is missing if required and
+        optional if not. The values of typed variables, or their defaults, are then validated
+        and coerced, and pattern keys are matched against the variables and defaults. A default
+        that is invalid is dropped, so its variable is invalid rather than optional.
+        """
+        missing = []
+        optional = []
+        defaults = {}
+        for name, required, default in zip(
+            self._names, self._required, self._defaults, strict=True
+        ):
+            if name in env:
+                continue
+            if default is not None:
+                defaults[name] = default
+                optional.append(name)
+            elif required:
+                missing.append(name)
+            else:
+                optional.append(name)
+        if not self._validators and not self._patterns:
+            return SpecEvaluation(missing, optional, defaults)
+
+        invalid: dict[str, str] = {}
+        values = {}
+        for name, validate in self._validators:
+            value = env.get(name)
+            if value is None:
+                value = defaults.get(name)
+                if value is None:
+                    continue
+            try:
+                values[name] = validate(value)
+            except ValueError as exc:
+                invalid[name] = str(exc)
+                # an invalid default is never applied, and its variable is only reported invalid
+                if defaults.pop(name, None) is not None:
+                    optional.remove(name)
+        matches = {}
+        if self._patterns:
+            matches = self._evaluate_patterns(env, defaults, missing, optional, invalid)
+        return SpecEvaluation(missing, optional, defaults, invalid, values, matches)
+
+    def _evaluate_patterns(
+        self,
+        env: Mapping[str, str],
+        defaults: dict[str, str],
+        missing: list[str],
+        optional: list[str],
+        invalid: dict[str, str],
+    ) -> dict[str, list[str]]:
+        """Matches the pattern keys and records the failed ones; returns the matches by key"""
+        if self._matcher is None:
+            from checkenv.patterns import PatternMatcher
+
+            self._matcher = PatternMatcher(rule.key for rule in self._patterns)
+        matches = {}
+        # defaults only ever fill in unset variables, so no name is matched twice
+        matched = self._matcher.match(chain(env, defaults))
+        for rule, names in zip(self._patterns, matched, strict=True):
+            matches[rule.key] = names
+            count = len(names)
+            if count < rule.min_count:
+                if count == 0:
+                    missing.append(rule.key)
+                else:
+                    invalid[rule.key] = (
+                        f"{count} matching ({', '.join(names)}), {rule.min_count} required"
+                    )
+                continue
+            if rule.require_value:
+                empty = [name for name in names if not env.get(name, defaults.get(name))]
+                if empty:
+                    invalid[rule.key] = f"no value for {', '.join(empty)}"
+                    continue
+            if count == 0:
+                optional.append(rule.key)
+        return matches
+
+    def _bits(self) -> tuple[dict[str, int], frozenset[str], frozenset[str]]:
+        if self._bit_index is None:
+            bits = {name: 1 << index for index, name in enumerate(self._names)}
+            required_names = frozenset(
+                name
+                for name, required, default in zip(
+                    self._names, self._required, self._defaults, strict=True
+                )
+                if required and default is None
+            )
+            self._bit_index = (bits, required_names, frozenset(self._names) - required_names)
+        return self._bit_index
+
+    def evaluate_many(self, envs: Iterable[Mapping[str, str]]) -> Iterator[tuple[int, int]]:
+        """Evaluates the spec against each environment mapping, lazily.
+
+        Yields one ``(missing, optional)`` pair of bitsets per mapping, where bit ``i`` is set if
+        the i-th variable in spec order is missing (or unset but optional). A mapping passes the
+        check if its ``missing`` bitset is 0; use `names_for` to turn a bitset back into names.
+        Only the presence of variables is checked: the values of typed variables are not
+        validated and pattern keys are ignored.
+        """
+        bits, required_names, optional_names = self._bits()
+        bit_for = bits.__getitem__
+        missing_from = required_names.difference
+        optional_from = optional_names.difference
+        for env in envs:
+            # set.difference probes a dict's keys in C without building a key set; summing
+            # distinct bits is the same as OR-ing them together
+            yield sum(map(bit_for, missing_from(env))), sum(map(bit_for, optional_from(env)))
+
+    def names_for(self, bitset: int) -> list[str]:
+        """Returns the variable names whose bits are set in ``bitset``, in spec order"""
+        names = []
+        while bitset:
+            lowest = bitset & -bitset
+            names.append(self._names[lowest.bit_length() - 1])
+            bitset ^= lowest
+        return names
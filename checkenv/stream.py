@@ -0,0 +1,213 @@
+"""Streaming, low-memory loading of very large spec files.
+
+Generated spec files can grow to tens of megabytes, mostly because of long descriptions, and
+``json.load`` holds the whole document in memory along with every description for as long as the
+spec is loaded. `load_spec_stream` instead reads the spec file in chunks and parses and validates
+its entries one at a time. It keeps each entry without its description, and only the byte span
+of the entries that have one. `DescriptionIndex` reads a description back from the spec file when
+a row that shows it is built, so descriptions of variables that are set are never held at all.
+
+Spec files that are not a JSON object (or start with a byte order mark) are loaded whole, which
+reports the same errors as the regular loader.
+"""
+
+import codecs
+import json
+import os
+import re
+from collections.abc import Callable, Iterator, Mapping
+from typing import Any, BinaryIO, NamedTuple
+
+from checkenv.include import INCLUDE_KEY
+
+# the number of bytes read from the spec file at a time
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """A window of decoded text over a binary stream, tracking the byte offset of the text"""
+
+    def __init__(self, stream: BinaryIO, chunk_size: int) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._eof = False
+        self.text = ""
+        self.pos = 0
+        # the byte offset of text[counted], so offsets are computed incrementally
+        self._counted = 0
+        self._counted_offset = 0
+
+    def offset(self) -> int:
+        """Returns the byte offset of the current position"""
+        if self.pos > self._counted:
+            self._counted_offset += len(
+                self.text[self._counted : self.pos].encode("utf-8", "surrogatepass")
+            )
+            self._counted = self.pos
+        return self._counted_offset
+
+    def fill(self, size: int = 0) -> bool:
+        """Reads at least ``size`` more bytes, dropping the consumed text; False at the end"""
+        if self._eof:
+            return False
+        chunk = self._stream.read(max(size, self._chunk_size))
+        self._eof = not chunk
+        self.offset()
+        self.text = self.text[self.pos :] + self._decoder.decode(chunk, final=self._eof)
+        self.pos = self._counted = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, or "" at the end of the stream"""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.text, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.text) or not self.fill():
+                return self.text[self.pos : self.pos + 1]
+
+    def decode(self) -> Any:
+        """Decodes the JSON value at the current position, reading more text as needed"""
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as exc:
+                # read as much again as is buffered, so huge values are not parsed over and over
+                if self.fill(len(self.text)):
+                    continue
+                raise self.error(exc.msg, exc.pos) from None
+            # a number at the end of the text may continue in the next chunk
+            if end < len(self.text) or not self.fill():
+                self.pos = end
+                return value
+
+    def error(self, message: str, pos: int | None = None) -> ValueError:
+        if pos is not None:
+            self.pos = pos
+        return ValueError(f"{message}: byte {self.offset()}")
+
+
+class _NotAnObject(ValueError):
+    """Raised by iter_entries if the stream does not start with a JSON object"""
+
+
+class StreamedSpec(NamedTuple):
+    """A spec loaded by `load_spec_stream`: its entries without descriptions, and the index to
+    load the descriptions from.
+    """
+
+    spec: dict[str, Any]
+    descriptions: "DescriptionIndex"
+
+
+class DescriptionIndex(Mapping[str, str]):
+    """The descriptions of a streamed spec file, read from the spec file on access.
+
+    Only the byte span of every entry with a description is kept. If the spec file changed since
+    it was loaded, its descriptions are treated as absent rather than read from stale offsets.
+    """
+
+    def __init__(self, path: str, stat: os.stat_result, spans: dict[str, tuple[int, int]]) -> None:
+        self._path = path
+        self._stat = (stat.st_size, stat.st_mtime_ns)
+        self._spans = spans
+
+    def __getitem__(self, name: str) -> str:
+        start, end = self._spans[name]
+        with open(self._path, "rb") as spec_file:
+            stat = os.fstat(spec_file.fileno())
+            if (stat.st_size, stat.st_mtime_ns) != self._stat:
+                raise KeyError(name)
+            spec_file.seek(start)
+            return json.loads(spec_file.read(end - start))["description"]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._spans)
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+
+def iter_entries(
+    stream: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[str, Any, int, int]]:
+    """Parses a JSON object from a binary stream one member at a time.
+
+    Yields each key with its value and the byte span of the value in the stream. Raises
+    ValueError, with the byte offset, if the stream is not a well-formed JSON object.
+    """
+    reader = _Reader(stream, chunk_size)
+    if reader.peek() != "{":
+        raise _NotAnObject(f"Expecting '{{': byte {reader.offset()}")
+    reader.pos += 1
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            if reader.peek() != '"':
+                raise reader.error("Expecting property name enclosed in double quotes")
+            name = reader.decode()
+            if reader.peek() != ":":
+                raise reader.error("Expecting ':' delimiter")
+            reader.pos += 1
+            reader.peek()
+            start = reader.offset()
+            value = reader.decode()
+            yield name, value, start, reader.offset()
+            delimiter = reader.peek()
+            if delimiter not in (",", "}"):
+                raise reader.error("Expecting ',' delimiter")
+            reader.pos += 1
+            if delimiter == "}":
+                break
+    if reader.peek():
+        raise reader.error("Extra data")
+
+
+def load_spec_stream(
+    path: str, validate: Callable[[Any], None] | None = None, chunk_size: int = CHUNK_SIZE
+) -> StreamedSpec:
+    """Loads and validates a spec file entry by entry, without holding its descriptions.
+
+    Raises ValueError if the spec file is not valid JSON and jsonschema.exceptions.ValidationError
+    if it is not a valid spec. The ``"$include"`` key is kept as it is, to be validated and merged
+    by checkenv.include.
+
+    :param validate: Validates each entry as a spec of its own, e.g. the strict validator; by
+        default, the built-in validator's errors are collected and reported all at once
+    :param chunk_size: The number of bytes to read from the spec file at a time
+    """
+    from checkenv.validator import iter_spec_errors, validate_spec
+
+    spec: dict[str, Any] = {}
+    spans: dict[str, tuple[int, int]] = {}
+    errors = []
+    with open(path, "rb") as spec_file:
+        stat = os.fstat(spec_file.fileno())
+        try:
+            for name, entry, start, end in iter_entries(spec_file, chunk_size):
+                spans.pop(name, None)
+                if name != INCLUDE_KEY:
+                    if validate is not None:
+                        validate({name: entry})
+                    else:
+                        errors += iter_spec_errors({name: entry})
+                    if isinstance(entry, dict) and "description" in entry:
+                        entry = {key: value for key, value in entry.items() if key != "description"}
+                        spans[name] = (start, end)
+                spec[name] = entry
+        except _NotAnObject:
+            # not an object, or not plain UTF-8: the regular loader reports what is wrong
+            from checkenv.include import split_includes
+
+            spec_file.seek(0)
+            jdata = json.loads(spec_file.read())
+            (validate or validate_spec)(split_includes(jdata)[0])
+            return StreamedSpec(jdata, DescriptionIndex(path, stat, {}))
+    if errors:
+        from checkenv.validator import _validation_error
+
+        raise _validation_error(spec, errors)
+    return StreamedSpec(spec, DescriptionIndex(path, stat, spans))
@@ -0,0 +1,112 @@
+"""Suggestions of similar names ("did you mean ...?") for missing environment variables.
+
+Most missing variables are typos (``DATABSE_URL``) or prefix drift (``APP_DB_URL`` set where the
+spec expects ``DB_URL``), so failed checks suggest the closest names that are set. Comparing every
+missing name with every variable in the environment would be quadratic, so `SuggestionIndex`
+indexes the variable names by trigram once per check, and only the few names that share the most
+trigrams with a missing name are compared with it.
+"""
+
+import heapq
+from collections.abc import Container, Iterable
+from difflib import SequenceMatcher
+
+# the number of best suggestions to return, and the minimum similarity ratio of a suggestion
+DEFAULT_LIMIT = 3
+DEFAULT_CUTOFF = 0.8
+# the number of candidates sharing the most trigrams that are compared exactly, per suggestion
+_CANDIDATES_PER_SUGGESTION = 8
+
+
+def _trigrams(name: str) -> set[str]:
+    # names are compared case-insensitively, and padded so that names shorter than three
+    # characters and the first and last characters get trigrams of their own
+    padded = f"\0{name.upper()}\0"
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+class SuggestionIndex:
+    """A trigram index of environment variable names, for finding names similar to another.
+
+    :param names: The names to suggest, e.g. the variables set in the environment
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        self._names: list[str] = []
+        self._gram_counts: list[int] = []
+        self._postings: dict[str, list[int]] = {}
+        for index, name in enumerate(names):
+            grams = _trigrams(name)
+            self._names.append(name)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def suggest(
+        self, name: str, limit: int = DEFAULT_LIMIT, cutoff: float = DEFAULT_CUTOFF
+    ) -> list[str]:
+        """Returns up to ``limit`` indexed names similar to ``name``, most similar first.
+
+        Names are similar if their similarity ratio (see difflib.SequenceMatcher) reaches
+        ``cutoff``, or if one of them is the other with a prefix like ``APP_``.
+
+        :param name: The name to find similar names for, e.g. a missing variable
+        :param limit: The maximum number of suggestions (default, 3)
+        :param cutoff: The minimum similarity ratio (0 to 1) of a suggestion (default, 0.8)
+        """
+        grams = _trigrams(name)
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for index in self._postings.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+        if not shared:
+            return []
+
+        # rank the candidates by the Dice coefficient of their trigram sets, then compare only
+        # the best few character by character
+        query_count = len(grams)
+        gram_counts = self._gram_counts
+        candidates = heapq.nlargest(
+            limit * _CANDIDATES_PER_SUGGESTION,
+            shared,
+            key=lambda index: shared[index] / (query_count + gram_counts[index]),
+        )
+        query = name.upper()
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+        scored = []
+        for index in candidates:
+            candidate = self._names[index]
+            upper = candidate.upper()
+            # prefix drift, e.g. APP_DB_URL for DB_URL, is suggested however short the names are
+            drift = upper.endswith(f"_{query}") or query.endswith(f"_{upper}")
+            matcher.set_seq1(upper)
+            if drift or (matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff):
+                ratio = matcher.ratio()
+                if drift or ratio >= cutoff:
+                    scored.append((ratio, candidate))
+        return [
+            candidate for _, candidate in heapq.nlargest(limit, scored, key=lambda item: item[0])
+        ]
+
+
+def suggest_names(
+    missing: Iterable[str], names: Iterable[str], exclude: Container[str] = ()
+) -> dict[str, list[str]]:
+    """Indexes ``names`` once and suggests similar names for each missing one.
+
+    :param missing: The names to find suggestions for
+    :param names: The names to suggest, e.g. the variables set in the environment
+    :param exclude: Names never to suggest, e.g. the other variables of the spec
+    :return: The suggestions for each missing name that has any, in the order of ``missing``
+    """
+    index = SuggestionIndex(name for name in names if name not in exclude)
+    suggestions = {}
+    for name in missing:
+        found = index.suggest(name)
+        if found:
+            suggestions[name] = found
+    return suggestions
@@ -0,0 +1,225 @@
+"""A purpose-built validator for checkenv spec files.
+
+The spec schema (``CheckEnv._schema``) is small and fixed, so instead of running the general
+purpose jsonschema engine over every entry, this module checks specs directly with one
+precompiled name regex and plain type checks. It accepts exactly the specs that the JSON schema
+accepts, and reports every violation in a single pass instead of stopping at the first one.
+
+Regular expression pattern keys must compile, which the JSON schema expresses with a custom
+``format``; `strict_format_checker` returns the jsonschema format checker that implements it.
+"""
+
+import re
+from collections.abc import Iterator
+from functools import cache
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from jsonschema import FormatChecker
+
+# must stay identical to the patternProperties keys in CheckEnv._schema; like jsonschema, the
+# patterns are applied with re.search
+ENV_NAME_PATTERN = "^[a-zA-Z_]+[a-zA-Z0-9_]*$"
+PATTERN_KEY_PATTERN = "^(?:[a-zA-Z0-9_]*[*?][a-zA-Z0-9_*?]*|/.+/)$"
+# the format of the propertyNames in CheckEnv._schema, checking regular expression pattern keys
+PATTERN_KEY_FORMAT = "checkenv-pattern-key"
+
+_ENV_NAME_RE = re.compile(ENV_NAME_PATTERN)
+_PATTERN_KEY_RE = re.compile(PATTERN_KEY_PATTERN)
+
+# must stay identical to the "type" enum in CheckEnv._schema and the types in checkenv.coerce
+TYPE_NAMES = ["string", "enum", "int", "float", "bool", "regex", "url", "duration"]
+
+# allowed object properties and the python types that satisfy their JSON schema types (bool is a
+# subclass of int, so "default" accepts booleans through int, and "min" and "max" reject them
+# separately)
+_PROPERTY_TYPES: dict[str, tuple[type, ...]] = {
+    "required": (bool,),
+    "description": (str,),
+    "default": (str, int, float),
+    "type": (str,),
+    "min": (int, float),
+    "max": (int, float),
+    "pattern": (str,),
+    "choices": (list,),
+}
+_PROPERTY_TYPE_NAMES = {
+    "required": "'boolean'",
+    "description": "'string'",
+    "default": "'string', 'number', 'boolean'",
+    "type": "'string'",
+    "min": "'number'",
+    "max": "'number'",
+    "pattern": "'string'",
+    "choices": "'array'",
+}
+_NUMBER_PROPERTIES = frozenset({"min", "max"})
+
+# allowed object properties of pattern entries, like _PROPERTY_TYPES; "min_count" is an integer,
+# which JSON schema also accepts as a float without a fractional part
+_PATTERN_PROPERTY_TYPES: dict[str, tuple[type, ...]] = {
+    "required": (bool,),
+    "description": (str,),
+    "min_count": (int, float),
+    "require_value": (bool,),
+}
+_PATTERN_PROPERTY_TYPE_NAMES = {
+    "required": "'boolean'",
+    "description": "'string'",
+    "min_count": "'integer'",
+    "require_value": "'boolean'",
+}
+
+
+class SpecError(NamedTuple):
+    """A single spec violation, located by the path of keys leading to it"""
+
+    path: tuple[str, ...]
+    message: str
+
+    def __str__(self) -> str:
+        return f"{format_path(self.path)}: {self.message}"
+
+
+def format_path(path: tuple[str, ...]) -> str:
+    """Formats a key path as a JSON path, e.g. ``$.PORT.default``"""
+    parts = ["$"]
+    for key in path:
+        if isinstance(key, str) and key.isidentifier():
+            parts.append(f".{key}")
+        else:
+            parts.append(f"[{key!r}]")
+    return "".join(parts)
+
+
+def iter_spec_errors(spec: Any) -> Iterator[SpecError]:
+    """Yields every violation of the spec schema found in ``spec``"""
+    if not isinstance(spec, dict):
+        yield SpecError((), f"{spec!r} is not of type 'object'")
+        return
+
+    match_name = _ENV_NAME_RE.search
+    match_pattern_key = _PATTERN_KEY_RE.search
+    property_types = _PROPERTY_TYPES
+    for name, entry in spec.items():
+        pattern_key = False
+        if not isinstance(name, str) or match_name(name) is None:
+            pattern_key = isinstance(name, str) and match_pattern_key(name) is not None
+            if not pattern_key:
+                yield SpecError((name,), f"{name!r} is not a valid environment variable name")
+            elif not is_valid_pattern_key(name):
+                yield SpecError((name,), f"{name!r} is not a valid regular expression")
+        if entry is True or entry is False:
+            continue
+        if not isinstance(entry, dict):
+            yield SpecError((name,), f"{entry!r} is not a boolean or an object")
+            continue
+        if pattern_key:
+            yield from _iter_pattern_entry_errors(name, entry)
+            continue
+        for prop, value in entry.items():
+            expected = property_types.get(prop)
+            if expected is None:
+                yield SpecError(
+                    (name, prop), f"Additional properties are not allowed ({prop!r} was unexpected)"
+                )
+            elif not isinstance(value, expected) or (
+                prop in _NUMBER_PROPERTIES and isinstance(value, bool)
+            ):
+                yield SpecError(
+                    (name, prop), f"{value!r} is not of type {_PROPERTY_TYPE_NAMES[prop]}"
+                )
+            elif prop in _CHECK_VALUE:
+                for path, message in _CHECK_VALUE[prop](value):
+                    yield SpecError((name, prop, *path), message)
+        if entry.get("type") == "enum" and "choices" not in entry:
+            yield SpecError((name,), "'choices' is a required property")
+
+
+def _iter_pattern_entry_errors(name: str, entry: dict[str, Any]) -> Iterator[SpecError]:
+    for prop, value in entry.items():
+        expected = _PATTERN_PROPERTY_TYPES.get(prop)
+        if expected is None:
+            yield SpecError(
+                (name, prop), f"Additional properties are not allowed ({prop!r} was unexpected)"
+            )
+        elif not isinstance(value, expected) or (
+            prop == "min_count"
+            and (isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()))
+        ):
+            yield SpecError(
+                (name, prop), f"{value!r} is not of type {_PATTERN_PROPERTY_TYPE_NAMES[prop]}"
+            )
+        elif prop == "min_count" and value < 0:
+            yield SpecError((name, prop), f"{value!r} is less than the minimum of 0")
+
+
+def is_valid_pattern_key(key: str) -> bool:
+    """Checks that a regular expression pattern key (``/.../``) compiles; true for other keys"""
+    if not (len(key) > 2 and key.startswith("/") and key.endswith("/")):
+        return True
+    try:
+        re.compile(key[1:-1])
+    except re.error:
+        return False
+    return True
+
+
+@cache
+def strict_format_checker() -> "FormatChecker":
+    """Returns the jsonschema format checker for validating specs against CheckEnv._schema"""
+    from jsonschema import FormatChecker
+
+    checker = FormatChecker()
+    checker.checks(PATTERN_KEY_FORMAT)(is_valid_pattern_key)
+    return checker
+
+
+def _check_type(value: str) -> Iterator[tuple[tuple[int, ...], str]]:
+    if value not in TYPE_NAMES:
+        yield (), f"{value!r} is not one of {TYPE_NAMES!r}"
+
+
+def _check_pattern(value: str) -> Iterator[tuple[tuple[int, ...], str]]:
+    try:
+        re.compile(value)
+    except re.error:
+        yield (), f"{value!r} is not a 'regex'"
+
+
+def _check_choices(value: list[Any]) -> Iterator[tuple[tuple[int, ...], str]]:
+    if not value:
+        yield (), "[] should be non-empty"
+    for index, choice in enumerate(value):
+        if not isinstance(choice, str):
+            yield (index,), f"{choice!r} is not of type 'string'"
+
+
+# checks of property values beyond their JSON types, yielding (relative path, message) pairs
+_CHECK_VALUE = {"type": _check_type, "pattern": _check_pattern, "choices": _check_choices}
+
+
+def validate_spec(spec: Any) -> None:
+    """Validates a parsed spec, reporting all violations at once.
+
+    Raises jsonschema.exceptions.ValidationError if the spec is invalid; the individual
+    violations are available as its ``context``, each with its own ``path``.
+    """
+    errors = list(iter_spec_errors(spec))
+    if errors:
+        raise _validation_error(spec, errors)
+
+
+def _validation_error(spec: Any, errors: list[SpecError]) -> Exception:
+    """Builds the jsonschema ValidationError raised for an invalid spec.
+
+    jsonschema is only imported here, so valid specs never pay for importing it.
+    """
+    from jsonschema.exceptions import ValidationError
+
+    if len(errors) == 1:
+        message = str(errors[0])
+    else:
+        message = f"{len(errors)} errors found in checkenv spec:\n" + "\n".join(map(str, errors))
+    context = [ValidationError(error.message, path=error.path) for error in errors]
+    return ValidationError(message, path=errors[0].path, context=context, instance=spec)
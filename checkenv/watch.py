@@ -0,0 +1,360 @@
+"""Watching a spec file and the environment for changes, for long-running processes.
+
+A `SpecWatcher` keeps the parsed spec in memory and polls a cheap change source (by default the
+spec file's modification time and size). When the spec changes, the old and new specs are
+diffed, and only the added and changed entries are validated and evaluated again. Environment
+changes are handled the same way: `SpecWatcher.notify_env_changed` re-evaluates just the named
+variables.
+
+Instead of full results, callbacks get a `SpecDelta` describing what changed: variables that
+became missing or satisfied, and defaults that were applied, changed or withdrawn.
+
+Spec files that include other spec files (see checkenv.include) are composed like
+`CheckEnv.load_spec_file` does, and the included files are watched along with the spec file.
+"""
+
+import contextlib
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Hashable, Iterable
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from checkenv.include import INCLUDE_KEY
+from checkenv.spec import CompiledSpec, is_pattern_key
+
+if TYPE_CHECKING:
+    import asyncio
+
+# the state of a single variable: set in the environment, missing, unset but optional, or unset
+# with a default (which is the second item)
+_SET = ("set", None)
+_MISSING = ("missing", None)
+_OPTIONAL = ("optional", None)
+_DEFAULT = "default"
+
+
+def _same_entry(old: Any, new: Any) -> bool:
+    """Compares spec entries, telling booleans apart from the numbers they equal"""
+    if type(old) is not type(new) or old != new:
+        return False
+    return not isinstance(old, dict) or all(type(old[key]) is type(new[key]) for key in old)
+
+
+class SpecDelta(NamedTuple):
+    """What changed between two evaluations of a watched spec.
+
+    ``added``, ``changed`` and ``removed`` list the spec entries that changed in the spec file.
+    ``newly_missing`` lists required variables that became missing, and ``newly_satisfied`` the
+    ones that no longer are (because they were set, given a default, made optional or removed from
+    the spec). ``defaults_changed`` maps each variable whose default value was applied or changed
+    to its new value, or to None if its default no longer applies.
+    """
+
+    added: list[str]
+    changed: list[str]
+    removed: list[str]
+    newly_missing: list[str]
+    newly_satisfied: list[str]
+    defaults_changed: dict[str, str | None]
+
+    @property
+    def empty(self) -> bool:
+        """Whether nothing changed"""
+        return not any(self)
+
+
+class ChangeSource(ABC):
+    """Tells the watcher when the spec file may have changed.
+
+    `token` returns a value that changes whenever the spec file does; the spec file is only
+    reloaded when it differs from the previous poll. Subclass this to plug in other change
+    sources, or call `SpecWatcher.notify_spec_changed` from a push-based one.
+    """
+
+    @abstractmethod
+    def token(self) -> Hashable:
+        """Returns a value that changes whenever the spec file does"""
+
+
+def _stat_token(filename: str) -> Hashable:
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class StatChangeSource(ChangeSource):
+    """Detects changes by the spec file's modification time and size, with a single stat call"""
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+
+    def token(self) -> Hashable:
+        return _stat_token(self._filename)
+
+
+class SpecWatcher:
+    """Keeps os.environ checked against a spec file as the spec file and environment change.
+
+    Like `checkenv.check`, defaults are applied to os.environ for unset variables (unless
+    ``apply_defaults`` is False); a default that no longer applies is removed again, as long as
+    the variable still holds the applied value.
+
+    :param env_filename: The spec file to watch (default, env.json)
+    :param on_change: Called with a SpecDelta whenever an evaluation changes anything
+    :param interval: Seconds between polls in `run` and `run_async` (default, 1.0)
+    :param source: The change source to poll (default, a StatChangeSource for the spec file)
+    :param strict: Validate spec entries with the jsonschema reference validator
+    :param apply_defaults: Apply default values to os.environ (default, True)
+    """
+
+    def __init__(
+        self,
+        env_filename: str = "env.json",
+        on_change: Callable[[SpecDelta], None] | None = None,
+        interval: float = 1.0,
+        source: ChangeSource | None = None,
+        strict: bool = False,
+        apply_defaults: bool = True,
+    ) -> None:
+        from checkenv import CheckEnv
+
+        self._env_filename = env_filename
+        self._on_change = on_change
+        self._interval = interval
+        self._source = StatChangeSource(env_filename) if source is None else source
+        self._apply_defaults = apply_defaults
+        # validates spec entries the same way CheckEnv.load_spec_file does
+        self._validator = CheckEnv(env_filename, strict=strict)
+        self._lock = threading.Lock()
+        self._token: Hashable = None
+        # the spec files the spec file includes, whose stats are part of the token
+        self._fragments: tuple[str, ...] = ()
+        self._loaded = False
+        self._spec: dict[str, Any] = {}
+        self._states: dict[str, tuple[str, str | None]] = {}
+        self._rules: dict[str, tuple[bool, str | None]] = {}
+        self._applied: dict[str, str] = {}
+
+    @property
+    def spec(self) -> dict[str, Any]:
+        """The spec as of the last successful load"""
+        return self._spec
+
+    @property
+    def missing(self) -> list[str]:
+        """The required variables that are currently missing, in spec order"""
+        return [name for name, state in self._states.items() if state is _MISSING]
+
+    @property
+    def optional(self) -> list[str]:
+        """The optional variables that are currently unset or defaulted, in spec order"""
+        return [
+            name
+            for name, state in self._states.items()
+            if state is _OPTIONAL or state[0] == _DEFAULT
+        ]
+
+    @property
+    def defaults(self) -> dict[str, str]:
+        """The default values currently in effect, keyed by variable name"""
+        return {name: state[1] for name, state in self._states.items() if state[0] == _DEFAULT}
+
+    @property
+    def check_failed(self) -> bool:
+        """Whether any required variables are currently missing"""
+        return any(state is _MISSING for state in self._states.values())
+
+    def poll(self) -> SpecDelta | None:
+        """Reloads the spec file if the change source reports a change, or if it was never loaded.
+
+        Returns the resulting delta, or None if the spec file did not change. Raises the same
+        exceptions as `CheckEnv.load_spec_file` if the changed spec file cannot be loaded, in
+        which case the previous spec stays in effect.
+        """
+        token = self._current_token()
+        if self._loaded and token == self._token:
+            return None
+        return self._reload_from(token)
+
+    def notify_spec_changed(self) -> SpecDelta:
+        """Reloads the spec file right away, e.g. when a push-based change source fires"""
+        return self._reload_from(self._current_token())
+
+    def _current_token(self) -> Hashable:
+        """The change source's token, with the modification times and sizes of the included
+        spec files
+        """
+        return self._source.token(), tuple(map(_stat_token, self._fragments))
+
+    def _reload_from(self, token: Hashable) -> SpecDelta:
+        """Reloads the spec file, remembering the token taken before reading it"""
+        fragments = self._fragments
+        delta = self._reload()
+        # a changed include graph changes which files the token covers
+        self._token = token if self._fragments == fragments else self._current_token()
+        return delta
+
+    def notify_env_changed(self, names: Iterable[str]) -> SpecDelta:
+        """Re-evaluates only the named variables after they were set or unset"""
+        with self._lock:
+            spec_names = [name for name in dict.fromkeys(names) if name in self._rules]
+            delta = self._evaluate(spec_names, [], [], [])
+        self._notify(delta)
+        return delta
+
+    def _reload(self) -> SpecDelta:
+        from checkenv.loaders import parse_spec
+
+        with open(self._env_filename, "rb") as spec_file:
+            new_spec = parse_spec(spec_file.read(), self._env_filename)
+        if not isinstance(new_spec, dict):
+            self._validator._validate(new_spec)
+        fragments = None
+        if INCLUDE_KEY in new_spec:
+            from checkenv.include import compose, split_includes
+
+            # every entry is validated here; included spec files are memoized by checkenv.include
+            validate = self._validator._validate
+            validate(split_includes(new_spec)[0])
+            composed = compose(self._env_filename, new_spec, validate, self._validator._strict)
+            new_spec = composed.spec
+            fragments = composed.fragments
+        pattern_keys = [name for name in new_spec if is_pattern_key(name)]
+        if pattern_keys:
+            # pattern keys are validated, but only variable names are watched
+            self._validator._validate({name: new_spec[name] for name in pattern_keys})
+            new_spec = {name: entry for name, entry in new_spec.items() if name not in pattern_keys}
+
+        with self._lock:
+            old_spec = self._spec
+            added = [name for name in new_spec if name not in old_spec]
+            changed = [
+                name
+                for name in new_spec
+                if name in old_spec and not _same_entry(new_spec[name], old_spec[name])
+            ]
+            removed = [name for name in old_spec if name not in new_spec]
+            if fragments is None:
+                # unchanged entries were validated when they were loaded
+                self._validator._validate({name: new_spec[name] for name in added + changed})
+
+            compiled = CompiledSpec.from_spec({name: new_spec[name] for name in added + changed})
+            for name, required, default in zip(
+                compiled.names, compiled.required, compiled.defaults, strict=True
+            ):
+                self._rules[name] = (required, default)
+            for name in removed:
+                del self._rules[name]
+            self._spec = new_spec
+            self._fragments = () if fragments is None else fragments
+            self._loaded = True
+            delta = self._evaluate(added + changed, added, changed, removed)
+            # keep the states in spec order
+            self._states = {name: self._states[name] for name in new_spec}
+        self._notify(delta)
+        return delta
+
+    def _state(self, name: str) -> tuple[str, str | None]:
+        required, default = self._rules[name]
+        value = os.environ.get(name)
+        if value is not None and self._applied.get(name) != value:
+            return _SET
+        if default is not None:
+            return (_DEFAULT, default)
+        return _MISSING if required else _OPTIONAL
+
+    def _evaluate(
+        self,
+        names: list[str],
+        added: list[str],
+        changed: list[str],
+        removed: list[str],
+    ) -> SpecDelta:
+        """Updates the state of the given variables and drops the removed ones; the caller must
+        hold the lock.
+        """
+        newly_missing = []
+        newly_satisfied = []
+        defaults_changed: dict[str, str | None] = {}
+        for name in names:
+            old = self._states.get(name)
+            new = self._state(name)
+            self._states[name] = new
+            if new is _MISSING and old is not _MISSING:
+                newly_missing.append(name)
+            elif old is _MISSING and new is not _MISSING:
+                newly_satisfied.append(name)
+            if new[1] != (old[1] if old is not None else None):
+                defaults_changed[name] = new[1]
+        for name in removed:
+            old = self._states.pop(name)
+            if old is _MISSING:
+                newly_satisfied.append(name)
+            elif old[0] == _DEFAULT:
+                defaults_changed[name] = None
+        if self._apply_defaults:
+            self._write_defaults(names + removed)
+        return SpecDelta(added, changed, removed, newly_missing, newly_satisfied, defaults_changed)
+
+    def _write_defaults(self, names: list[str]) -> None:
+        """Applies the defaults in effect for the given variables and withdraws the others"""
+        from checkenv.overlay import ENVIRON_LOCK
+
+        with ENVIRON_LOCK:
+            for name in names:
+                state = self._states.get(name, _SET)
+                if state[0] == _DEFAULT:
+                    # also re-applies a default whose variable was unset behind the watcher's back
+                    if os.environ.get(name) != state[1]:
+                        os.environ[name] = state[1]
+                    self._applied[name] = state[1]
+                    continue
+                applied = self._applied.pop(name, None)
+                if applied is not None and os.environ.get(name) == applied:
+                    del os.environ[name]
+
+    def _notify(self, delta: SpecDelta) -> None:
+        if self._on_change is not None and not delta.empty:
+            self._on_change(delta)
+
+    def run(
+        self,
+        stop: threading.Event | None = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        """Polls until ``stop`` is set (or forever), waiting ``interval`` seconds between polls.
+
+        Errors loading a changed spec file are passed to ``on_error`` if given, and raised
+        otherwise.
+        """
+        stop = threading.Event() if stop is None else stop
+        while not stop.is_set():
+            self._poll_or_report(on_error)
+            stop.wait(self._interval)
+
+    async def run_async(
+        self,
+        stop: "asyncio.Event | None" = None,
+        on_error: Callable[[Exception], None] | None = None,
+    ) -> None:
+        """The asyncio variant of `run`; polls in a worker thread between asyncio sleeps, since a
+        poll stats the spec file and may reload it
+        """
+        import asyncio
+
+        stop = asyncio.Event() if stop is None else stop
+        while not stop.is_set():
+            await asyncio.to_thread(self._poll_or_report, on_error)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(stop.wait(), self._interval)
+
+    def _poll_or_report(self, on_error: Callable[[Exception], None] | None) -> None:
+        try:
+            self.poll()
+        except Exception as exc:
+            if on_error is None:
+                raise
+            on_error(exc)
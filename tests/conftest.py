@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def clean_env(monkeypatch):
+    """Returns a function that unsets environment variables for the rest of a test.
+
+    Each variable is set before it is deleted, so that monkeypatch also undoes anything the test
+    writes to it, such as the defaults applied by a check.
+    """
+
+    def clean(names):
+        for name in names:
+            monkeypatch.setenv(name, "")
+            monkeypatch.delenv(name)
+
+    return clean
+
+
+@pytest.fixture
+def spec_file(request, tmp_path):
+    """Writes the test module's SPEC to an env.json and returns its path"""
+    path = tmp_path / "env.json"
+    path.write_text(json.dumps(request.module.SPEC))
+    return str(path)
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import CheckEnv, check, check_async
+from checkenv.exceptions import CheckEnvException
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+VALID2 = os.path.join(dir_path, "fixtures/valid2.json")
+INVALID = os.path.join(dir_path, "fixtures/invalid.json")
+NO_MANDATORY = os.path.join(dir_path, "fixtures/valid_no_mandatory.json")
+
+
+NAMES = [
+    "VALUE1_NOT_SET",
+    "VALUE2_NOT_SET_WITH_DEFAULT",
+    "VALUE3_NOT_SET_NOT_REQUIRED",
+    "OPTIONAL_1",
+    "OPTIONAL_2",
+]
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+
+
+def test_failure_raises_by_default_with_same_output(capsys):
+    with pytest.raises(CheckEnvException) as expected:
+        check(VALID2, raise_exception=True, overlay=True)
+    expected_output = capsys.readouterr().out
+    with pytest.raises(CheckEnvException) as actual:
+        asyncio.run(check_async(VALID2, overlay=True))
+    assert capsys.readouterr().out == expected_output
+    assert actual.value.missing == expected.value.missing
+    assert actual.value.optional == expected.value.optional
+
+
+def test_failure_without_raising_returns_result():
+    env = asyncio.run(check_async(VALID2, raise_exception=False, no_output=True))
+    assert env.check_failed
+    assert os.environ["VALUE2_NOT_SET_WITH_DEFAULT"] == "3000"
+
+
+def test_loads_in_worker_threads_and_gathers(monkeypatch):
+    threads = set()
+    original = CheckEnv.load_spec_file
+
+    def load_spec_file(self):
+        threads.add(threading.get_ident())
+        original(self)
+
+    monkeypatch.setattr(CheckEnv, "load_spec_file", load_spec_file)
+
+    async def main():
+        return await asyncio.gather(
+            *(check_async(NO_MANDATORY, no_output=True, overlay=True) for _ in range(4))
+        )
+
+    results = asyncio.run(main())
+    assert threading.get_ident() not in threads
+    assert [env.optional for env in results] == [["OPTIONAL_1", "OPTIONAL_2"]] * 4
+
+
+def test_missing_file_raises(tmp_path, capsys):
+    with pytest.raises(OSError):
+        asyncio.run(check_async(str(tmp_path / "missing.json")))
+    assert "Unable to find checkenv configuration file" in capsys.readouterr().out
+    with pytest.raises(OSError):
+        asyncio.run(check_async(str(tmp_path / "missing.json"), no_output=True))
+    assert capsys.readouterr().out == ""
+
+
+def test_invalid_spec_raises(tmp_path, capsys):
+    with pytest.raises(ValidationError):
+        asyncio.run(check_async(INVALID))
+    assert "123TEST" in capsys.readouterr().out
+    bad_json = tmp_path / "bad.json"
+    bad_json.write_text("{")
+    with pytest.raises(json.JSONDecodeError):
+        asyncio.run(check_async(str(bad_json)))
+    assert capsys.readouterr().out == ""
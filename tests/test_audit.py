@@ -0,0 +1,158 @@
+import json
+import os
+import sys
+
+import pytest
+
+from checkenv.audit import (
+    SourceReport,
+    audit,
+    dotenv_sources,
+    dump_sources,
+    process_sources,
+    summarize,
+)
+from checkenv.cli import main
+from checkenv.dotenv import read_environ_dump
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+VALID2 = os.path.join(dir_path, "fixtures/valid2.json")
+NO_MANDATORY = os.path.join(dir_path, "fixtures/valid_no_mandatory.json")
+INVALID = os.path.join(dir_path, "fixtures/invalid.json")
+on_linux = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc")
+
+
+@pytest.fixture
+def sources(tmp_path):
+    good = tmp_path / "good.env"
+    good.write_text("VALUE1_NOT_SET=1\n", encoding="utf-8")
+    bad = tmp_path / "bad.environ"
+    bad.write_bytes(b"VALUE3_NOT_SET_NOT_REQUIRED=x\0")
+    return [str(good), str(bad), str(tmp_path / "missing.env")]
+
+
+def test_audit_sources(sources):
+    environ = dict(os.environ)
+    reports = list(
+        audit(
+            [VALID2, NO_MANDATORY],
+            dotenv_sources([sources[0], sources[2]]) + dump_sources([sources[1]]),
+            max_workers=2,
+        )
+    )
+    assert [report.source for report in reports] == [sources[0], sources[2], sources[1]]
+
+    good, missing, bad = reports
+    assert not good.failed
+    assert good.missing == {VALID2: [], NO_MANDATORY: []}
+    assert good.optional[VALID2] == ["VALUE2_NOT_SET_WITH_DEFAULT", "VALUE3_NOT_SET_NOT_REQUIRED"]
+    assert bad.failed
+    assert bad.missing[VALID2] == ["VALUE1_NOT_SET"]
+    assert bad.optional[VALID2] == ["VALUE2_NOT_SET_WITH_DEFAULT"]
+    assert missing.failed
+    assert missing.error is not None and missing.missing == {}
+
+    assert summarize(reports) == (3, 1, 1, 1)
+    assert dict(os.environ) == environ
+
+
+def test_summarize_empty():
+    assert summarize([]) == (0, 0, 0, 0)
+    assert not SourceReport("x", {}, {}, {}).failed
+
+
+def test_audit_typed_spec(tmp_path, capsys):
+    spec = tmp_path / "env.json"
+    spec.write_text(json.dumps({"PORT": {"type": "int"}, "WORKERS": {"type": "int", "default": 2}}))
+    spec = str(spec)
+    bad = tmp_path / "bad.env"
+    bad.write_text("PORT=abc\n", encoding="utf-8")
+    good = tmp_path / "good.env"
+    good.write_text("PORT=80\n", encoding="utf-8")
+    bad_report, good_report = audit([spec], dotenv_sources([str(bad), str(good)]))
+    assert bad_report.failed
+    assert bad_report.missing == {spec: []}
+    assert bad_report.optional == {spec: ["WORKERS"]}
+    assert bad_report.invalid == {spec: {"PORT": "not an integer"}}
+    assert not good_report.failed
+    assert good_report.invalid == {spec: {}}
+
+    assert main(["audit", "-s", spec, "--dotenv", str(bad)]) == 1
+    line = json.loads(capsys.readouterr().out.splitlines()[0])
+    assert line["passed"] is False
+    assert line["invalid"] == {spec: {"PORT": "not an integer"}}
+
+
+def test_audit_pattern_keys(tmp_path):
+    spec = tmp_path / "env.json"
+    spec.write_text(json.dumps({"FEATURE_*": True, "/SHARD_[0-9]+/": {"min_count": 2}}))
+    spec = str(spec)
+    unmatched = tmp_path / "unmatched.env"
+    unmatched.write_text("SHARD_1=a\n", encoding="utf-8")
+    matched = tmp_path / "matched.env"
+    matched.write_text("FEATURE_A=on\nSHARD_1=a\nSHARD_2=b\n", encoding="utf-8")
+    unmatched_report, matched_report = audit([spec], dotenv_sources([str(unmatched), str(matched)]))
+    assert unmatched_report.failed
+    assert unmatched_report.missing == {spec: ["FEATURE_*"]}
+    assert unmatched_report.invalid == {
+        spec: {"/SHARD_[0-9]+/": "1 matching (SHARD_1), 2 required"}
+    }
+    assert not matched_report.failed
+
+
+@on_linux
+def test_process_sources(monkeypatch):
+    monkeypatch.setenv("VALUE1_NOT_SET", "from the auditor")
+    pid = os.getpid()
+    environ = dict(os.environ)
+    assert [source for source, _ in process_sources()].count(f"pid:{pid}") == 1
+
+    # /proc/<pid>/environ is the environment the process started with, not os.environ
+    (report,) = audit([VALID2], process_sources([pid]))
+    assert report.source == f"pid:{pid}"
+    assert report.error is None
+    started_with = read_environ_dump(f"/proc/{pid}/environ")
+    assert report.missing[VALID2] == (
+        [] if "VALUE1_NOT_SET" in started_with else ["VALUE1_NOT_SET"]
+    )
+    assert list(audit([VALID2], process_sources([pid], match="^no such command$"))) == []
+    assert len(list(audit([VALID2], process_sources([pid], match="python|pytest")))) == 1
+    assert dict(os.environ) == environ
+
+
+def test_cli_audit(sources, capsys):
+    assert main(["audit", "-s", VALID2, "--dotenv", sources[0], "--dump", sources[1]]) == 1
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines[0] == {
+        "source": sources[0],
+        "passed": True,
+        "missing": {VALID2: []},
+        "optional": {VALID2: ["VALUE2_NOT_SET_WITH_DEFAULT", "VALUE3_NOT_SET_NOT_REQUIRED"]},
+        "invalid": {VALID2: {}},
+    }
+    assert lines[1]["passed"] is False
+    assert lines[2] == {"summary": {"sources": 2, "passed": 1, "failed": 1, "errors": 0}}
+
+    assert main(["audit", "-s", NO_MANDATORY, "--dotenv", sources[0]]) == 0
+    assert main(["audit", "-s", NO_MANDATORY, "--dotenv", sources[2]]) == 1
+    line = json.loads(capsys.readouterr().out.splitlines()[-2])
+    assert line["passed"] is False and "error" in line
+
+
+@on_linux
+def test_cli_audit_processes(capsys):
+    assert main(["audit", "-s", NO_MANDATORY, "--pid", str(os.getpid())]) == 0
+    assert main(["audit", "-s", NO_MANDATORY, "--match", "^no such command$"]) == 0
+    summary = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert summary == {"summary": {"sources": 0, "passed": 0, "failed": 0, "errors": 0}}
+
+
+def test_cli_audit_errors(tmp_path, monkeypatch, capsys):
+    assert main(["audit", "--match", "("]) == 2
+    assert "Invalid --match pattern" in capsys.readouterr().err
+
+    monkeypatch.chdir(tmp_path)
+    assert main(["audit"]) == 1
+    assert "env.json" in capsys.readouterr().err
+    assert main(["audit", "-s", INVALID]) == 1
+    assert capsys.readouterr().err
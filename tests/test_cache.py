@@ -0,0 +1,153 @@
+import json
+import marshal
+import os
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import CheckEnv, check
+from checkenv.cache import SpecCache
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    env_file = tmp_path / "env.json"
+    env_file.write_text(json.dumps({"CACHE_VALUE_1": True, "CACHE_VALUE_2": {"default": 1}}))
+    return env_file
+
+
+def _load(spec_file, cache_dir):
+    instance = CheckEnv(env_filename=str(spec_file), cache_dir=str(cache_dir))
+    instance.load_spec_file()
+    return instance
+
+
+def test_cold_load_stores_entry(spec_file, tmp_path):
+    cache_dir = tmp_path / "cache"
+    _load(spec_file, cache_dir)
+    assert os.path.exists(SpecCache(str(cache_dir)).entry_path(str(spec_file)))
+
+
+def test_warm_load_skips_validation(spec_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    cold = _load(spec_file, cache_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("spec should have been loaded from the cache")
+
+    monkeypatch.setattr(CheckEnv, "_validate", fail)
+    warm = _load(spec_file, cache_dir)
+    assert warm._spec == cold._spec
+
+
+def test_changed_spec_invalidates_entry(spec_file, tmp_path):
+    cache_dir = tmp_path / "cache"
+    _load(spec_file, cache_dir)
+
+    spec_file.write_text(json.dumps({"123INVALID": True}))
+    with pytest.raises(ValidationError):
+        _load(spec_file, cache_dir)
+
+
+def test_same_size_and_mtime_but_new_content_invalidates_entry(spec_file, tmp_path):
+    cache_dir = tmp_path / "cache"
+    _load(spec_file, cache_dir)
+    stat = os.stat(spec_file)
+
+    spec_file.write_text(spec_file.read_text().replace("CACHE_VALUE_1", "CACHE_VALUE_3"))
+    os.utime(spec_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert "CACHE_VALUE_3" in _load(spec_file, cache_dir)._spec
+
+
+def test_corrupt_entry_falls_back_and_is_rewritten(spec_file, tmp_path):
+    cache_dir = tmp_path / "cache"
+    entry_path = SpecCache(str(cache_dir)).entry_path(str(spec_file))
+    _load(spec_file, cache_dir)
+
+    with open(entry_path, "wb") as entry_file:
+        entry_file.write(b"\x00not marshal data")
+    assert "CACHE_VALUE_1" in _load(spec_file, cache_dir)._spec
+
+    stat = os.stat(spec_file)
+    raw = spec_file.read_bytes()
+    assert SpecCache(str(cache_dir)).load(str(spec_file), stat, raw) is not None
+
+
+@pytest.mark.parametrize("entry", [["not", "a", "tuple"], (1, 2, 3)])
+def test_unexpected_entry_layout_is_a_miss(spec_file, tmp_path, entry):
+    cache = SpecCache(str(tmp_path))
+    with open(cache.entry_path(str(spec_file)), "wb") as entry_file:
+        entry_file.write(marshal.dumps(entry))
+    assert cache.load(str(spec_file), os.stat(spec_file), spec_file.read_bytes()) is None
+
+
+def test_non_dict_spec_entry_is_a_miss(spec_file, tmp_path):
+    cache = SpecCache(str(tmp_path))
+    stat = os.stat(spec_file)
+    raw = spec_file.read_bytes()
+    cache.store(str(spec_file), stat, raw, {"CACHE_VALUE_1": True})
+    key = cache._key(str(spec_file), stat, raw, "json")
+    with open(cache.entry_path(str(spec_file)), "wb") as entry_file:
+        entry_file.write(marshal.dumps((key, ["CACHE_VALUE_1"])))
+    assert cache.load(str(spec_file), stat, raw) is None
+
+
+def test_entries_are_keyed_on_the_spec_format(tmp_path):
+    pyproject = tmp_path / "pyproject.toml"
+    pyproject.write_text("[tool.checkenv]\nCACHE_VALUE_1 = true\n")
+    cache_dir = str(tmp_path / "cache")
+    instance = CheckEnv(env_filename=str(pyproject), cache_dir=cache_dir)
+    instance.load_spec_file()
+    assert instance._spec == {"CACHE_VALUE_1": True}
+    # parsed as plain TOML, the file is a different (and invalid) spec, not a cache hit
+    instance = CheckEnv(env_filename=str(pyproject), cache_dir=cache_dir, spec_format="toml")
+    with pytest.raises(ValidationError):
+        instance.load_spec_file()
+    assert instance.stats.cache_hit is False
+
+
+def test_unwritable_cache_dir_is_ignored(spec_file, tmp_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    instance = _load(spec_file, not_a_dir)
+    assert "CACHE_VALUE_1" in instance._spec
+
+
+def test_failed_write_removes_temporary_file(spec_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+
+    def fail_replace(src, dst):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    _load(spec_file, cache_dir)
+    assert os.listdir(cache_dir) == []
+
+
+def test_failed_cleanup_is_ignored(spec_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+
+    def fail(*args):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(os, "replace", fail)
+    monkeypatch.setattr(os, "unlink", fail)
+    _load(spec_file, cache_dir)
+    monkeypatch.undo()
+    assert not os.path.exists(SpecCache(str(cache_dir)).entry_path(str(spec_file)))
+
+
+def test_invalid_spec_is_not_cached(tmp_path):
+    cache_dir = tmp_path / "cache"
+    with pytest.raises(ValidationError):
+        _load(os.path.join(dir_path, "fixtures/invalid.json"), cache_dir)
+    assert not os.path.exists(cache_dir)
+
+
+def test_check_uses_cache_dir(tmp_path):
+    cache_dir = tmp_path / "cache"
+    filename = os.path.join(dir_path, "fixtures/valid_no_mandatory.json")
+    check(filename=filename, no_output=True, cache_dir=str(cache_dir))
+    assert os.path.exists(SpecCache(str(cache_dir)).entry_path(filename))
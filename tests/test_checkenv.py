@@ -1,5 +1,6 @@
 import json
 import os
+from datetime import timedelta
 
 import pytest
 from jsonschema.exceptions import ValidationError
@@ -301,3 +302,188 @@ def test_envcheckresultrow_repr_default_desc():
 def test_handle_exit_raise_exception_without_exception():
     with pytest.raises(RuntimeError, match="checkenv exited without an exception"):
         _handle_exit(raise_exc=True)
+
+
+def test_envcheckresultrow_is_slotted_and_read_only():
+    instance = EnvCheckResultRow("FIELD_1", default="DEFAULT_1")
+    assert not hasattr(instance, "__dict__")
+    with pytest.raises(AttributeError):
+        instance.name = "FIELD_2"
+    with pytest.raises(AttributeError):
+        instance.extra = "value"
+
+
+def test_envcheckresults_rows_are_cached():
+    results = EnvCheckResults(
+        ["VALUE_1", "VALUE_2"],
+        {"VALUE_1": True, "VALUE_2": {"default": "default-value"}},
+        EnvCheckResults.OPTIONAL,
+    )
+    assert results.rows is results.rows
+    assert [row.default for row in results.rows] == [None, "default-value"]
+
+
+def test_envcheckresults_index():
+    results = EnvCheckResults(
+        ["VALUE_1", "VALUE_2"],
+        {"VALUE_1": True, "VALUE_2": {"description": "example description"}},
+        EnvCheckResults.MISSING,
+    )
+    assert list(results.index) == ["VALUE_1", "VALUE_2"]
+    assert results.index["VALUE_2"].description == "example description"
+    assert "VALUE_1" in results
+    assert "VALUE_3" not in results
+    assert len(results) == 2
+    with pytest.raises(TypeError):
+        results.index["VALUE_3"] = None
+
+
+def test_results_are_cached_until_next_apply(init_env):
+    instance = CheckEnv(env_filename=os.path.join(dir_path, "fixtures/valid2.json"))
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    results = instance.results
+    assert instance.results is results
+    assert [section.section for section in results] == ["missing", "optional"]
+    assert "VALUE1_NOT_SET" in results[0]
+
+    instance.apply_spec(dry_run=True)
+    assert instance.results is not results
+
+
+def test_print_console_color(capsys):
+    results = EnvCheckResults(["VALUE_1"], {"VALUE_1": True}, EnvCheckResults.MISSING)
+    results.print_console_color()
+    assert "VALUE_1" in capsys.readouterr().out
+
+
+def test_print_results(init_env, capsys):
+    instance = CheckEnv(env_filename=os.path.join(dir_path, "fixtures/valid2.json"))
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    instance.print_results([], EnvCheckResults.OPTIONAL)
+    assert capsys.readouterr().out == ""
+    instance.print_results(instance.missing, EnvCheckResults.MISSING)
+    assert "VALUE1_NOT_SET value1notset description" in capsys.readouterr().out
+
+
+def test_main_import_different_filename_doesnt_exist_no_output(init_env, capsys):
+    with pytest.raises(OSError):
+        check(raise_exception=True, no_output=True)
+    assert capsys.readouterr().out == ""
+
+
+@pytest.fixture
+def typed_env(init_env, clean_env, monkeypatch):
+    clean_env(["TYPED_PORT", "TYPED_DEBUG", "TYPED_MODE", "TYPED_TIMEOUT", "TYPED_UNTYPED"])
+    monkeypatch.setenv("TYPED_UNTYPED", "x")
+    return os.path.join(dir_path, "fixtures/typed.json")
+
+
+def test_typed_values_are_coerced(typed_env, monkeypatch):
+    monkeypatch.setenv("TYPED_MODE", "prod")
+    monkeypatch.setenv("TYPED_DEBUG", "yes")
+    env = check(filename=typed_env, no_output=True, overlay=True)
+    assert dict(env.values) == {
+        "TYPED_PORT": 8080,
+        "TYPED_DEBUG": True,
+        "TYPED_MODE": "prod",
+        "TYPED_TIMEOUT": timedelta(seconds=30),
+    }
+    assert env.config.values == env.values
+    assert env.invalid == {}
+    assert not env.check_failed
+    with pytest.raises(TypeError):
+        env.values["TYPED_PORT"] = 1
+
+
+def test_invalid_typed_values_fail_the_check(typed_env, monkeypatch, capsys):
+    monkeypatch.setenv("TYPED_MODE", "staging")
+    monkeypatch.setenv("TYPED_PORT", "70000")
+    with pytest.raises(CheckEnvException) as exc:
+        check(filename=typed_env, raise_exception=True, renderer="text")
+    assert exc.value.missing == []
+    assert exc.value.invalid == {
+        "TYPED_PORT": "greater than the maximum of 65535",
+        "TYPED_MODE": "not one of 'dev', 'prod'",
+    }
+    assert str(exc.value) == "Invalid environment variables: TYPED_PORT, TYPED_MODE"
+    out = capsys.readouterr().out
+    assert "The following 2 environment variables are invalid\n" in out
+    assert "TYPED_PORT (default=8080) (invalid: greater than the maximum of 65535) port" in out
+    assert "70000" not in out
+
+
+def test_invalid_section_only_for_typed_specs(typed_env, monkeypatch):
+    instance = CheckEnv(env_filename=typed_env)
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    assert [section.section for section in instance.results] == ["missing", "invalid", "optional"]
+    assert instance.config.check_failed
+    assert instance.config.invalid == {}
+
+    instance = CheckEnv(env_filename=os.path.join(dir_path, "fixtures/valid2.json"))
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    assert [section.section for section in instance.results] == ["missing", "optional"]
+
+
+def test_missing_and_invalid_exception_message():
+    exc = CheckEnvException(["A"], [], invalid={"B": "not an integer"})
+    assert str(exc) == "Missing required environment variables: A; invalid: B"
+    assert CheckEnvException(["A"], []).invalid == {}
+
+
+def test_pattern_keys_list_matches(init_env, monkeypatch, capsys):
+    for name in ("PATTERN_NAME", "PATTERN_SHARD_1_DSN", "PATTERN_SHARD_2_DSN"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("PATTERN_NAME", "x")
+    monkeypatch.setenv("PATTERN_SHARD_1_DSN", "db1")
+    filename = os.path.join(dir_path, "fixtures/patterns.json")
+    with pytest.raises(CheckEnvException) as exc:
+        check(filename=filename, raise_exception=True, renderer="text")
+    assert exc.value.invalid == {
+        "PATTERN_SHARD_*_DSN": "1 matching (PATTERN_SHARD_1_DSN), 2 required"
+    }
+    assert "PATTERN_SHARD_*_DSN (invalid: 1 matching" in capsys.readouterr().out
+
+    monkeypatch.setenv("PATTERN_SHARD_2_DSN", "db2")
+    env = check(filename=filename, no_output=True)
+    assert dict(env.matches) == {
+        "PATTERN_SHARD_*_DSN": ["PATTERN_SHARD_1_DSN", "PATTERN_SHARD_2_DSN"],
+        "/PATTERN_FEATURE_[A-Z]+/": [],
+    }
+    assert env.optional == ["/PATTERN_FEATURE_[A-Z]+/"]
+    assert [section.section for section in env.results] == ["missing", "invalid", "optional"]
+
+
+def test_missing_variables_suggest_similar_names(init_env, monkeypatch, capsys):
+    monkeypatch.setenv("VALUE_1", "x")
+    monkeypatch.setenv("VALUE2", "3000")
+    filename = os.path.join(dir_path, "fixtures/valid1.json")
+    with pytest.raises(CheckEnvException) as exc:
+        check(filename=filename, raise_exception=True, renderer="text")
+    # VALUE2 is part of the spec, so it is never suggested
+    assert exc.value.suggestions == {"VALUE1": ["VALUE_1"]}
+    assert str(exc.value) == (
+        "Missing required environment variables: VALUE1 (did you mean VALUE_1?), VALUE3"
+    )
+    assert "VALUE1 (did you mean VALUE_1?) This defines" in capsys.readouterr().out
+
+    instance = CheckEnv(env_filename=filename)
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    assert dict(instance.suggestions) == {"VALUE1": ["VALUE_1"]}
+    assert instance.results[0].index["VALUE1"].suggestions == ("VALUE_1",)
+    assert instance.results[0].index["VALUE3"].suggestions == ()
+
+
+def test_pattern_keys_get_no_suggestions(init_env, monkeypatch):
+    monkeypatch.setenv("PATTERN_NAME", "x")
+    monkeypatch.delenv("PATTERN_SHARD_1_DSN", raising=False)
+    monkeypatch.setenv("PATTERN_SHARD_DSN", "db")
+    instance = CheckEnv(env_filename=os.path.join(dir_path, "fixtures/patterns.json"))
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    assert instance.missing == ["PATTERN_SHARD_*_DSN"]
+    assert instance.suggestions == {}
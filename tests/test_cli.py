@@ -0,0 +1,64 @@
+import os
+import runpy
+import sys
+
+import pytest
+
+from checkenv.cli import _print_profile, main
+from checkenv.many import MultiCheckResult, SpecReport
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+VALID2 = os.path.join(dir_path, "fixtures/valid2.json")
+NO_MANDATORY = os.path.join(dir_path, "fixtures/valid_no_mandatory.json")
+
+
+def test_check_passes(capsys):
+    assert main(["check", NO_MANDATORY]) == 0
+    assert "OPTIONAL_1" in capsys.readouterr().out
+
+
+def test_check_fails(monkeypatch, capsys):
+    monkeypatch.delenv("VALUE1_NOT_SET", raising=False)
+    assert main(["check", "--workers", "2", NO_MANDATORY, VALID2]) == 1
+    assert "VALUE1_NOT_SET" in capsys.readouterr().out
+
+
+def test_check_quiet(monkeypatch, capsys):
+    monkeypatch.delenv("VALUE1_NOT_SET", raising=False)
+    assert main(["check", "-q", "--strict", VALID2]) == 1
+    assert capsys.readouterr().out == ""
+
+
+def test_check_defaults_to_env_json(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert main(["check"]) == 1
+    assert "env.json" in capsys.readouterr().out
+
+
+def test_command_is_required(capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([])
+    assert exc.value.code == 2
+
+
+def test_python_dash_m(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["checkenv", "check", NO_MANDATORY])
+    with pytest.raises(SystemExit) as exc:
+        runpy.run_module("checkenv", run_name="__main__")
+    assert exc.value.code == 0
+
+
+def test_check_profile(monkeypatch, capsys):
+    monkeypatch.delenv("VALUE1_NOT_SET", raising=False)
+    missing_file = os.path.join(dir_path, "fixtures/does_not_exist.json")
+    assert main(["check", "-q", "--profile", NO_MANDATORY, missing_file]) == 1
+    header, *rows = capsys.readouterr().err.splitlines()
+    assert header.split() == ["read", "parse", "validate", "apply", "total", "file"]
+    assert rows[0].endswith(f"  {NO_MANDATORY}")
+    assert rows[1].split()[1:4] == ["0.000", "0.000", "0.000"]
+
+
+def test_profile_without_stats(capsys):
+    report = SpecReport("env.json", [], [], {})
+    _print_profile(MultiCheckResult([report]))
+    assert capsys.readouterr().err.splitlines() == ["     total  file", "     0.000  env.json"]
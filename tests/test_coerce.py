@@ -0,0 +1,133 @@
+import json
+import os
+import re
+from datetime import timedelta
+
+import pytest
+
+from checkenv import CheckEnv
+from checkenv.coerce import compile_validator
+from checkenv.spec import CompiledSpec, compile_validators
+
+
+def _check(entry, value):
+    return compile_validator(entry)(value)
+
+
+@pytest.mark.parametrize(
+    "entry, value, expected",
+    [
+        ({"type": "string"}, " text ", " text "),
+        ({"type": "int"}, "8080", 8080),
+        ({"type": "int"}, "-3", -3),
+        ({"type": "float"}, "0.25", 0.25),
+        ({"type": "bool"}, "Yes", True),
+        ({"type": "bool"}, " off ", False),
+        ({"type": "bool"}, "0", False),
+        ({"type": "enum", "choices": ["dev", "prod"]}, "prod", "prod"),
+        ({"type": "url"}, "https://example.com/path?q=1", "https://example.com/path?q=1"),
+        ({"type": "duration"}, "90", timedelta(seconds=90)),
+        ({"type": "duration"}, "1.5", timedelta(seconds=1.5)),
+        ({"type": "duration"}, "250ms", timedelta(milliseconds=250)),
+        ({"type": "duration"}, "1h30m", timedelta(hours=1, minutes=30)),
+        ({"type": "duration"}, "2d", timedelta(days=2)),
+        ({"pattern": "[a-z]+"}, "abc", "abc"),
+        ({"choices": ["a"]}, "a", "a"),
+        ({"min": 2, "max": 3}, "abc", "abc"),
+        ({"type": "float", "min": 0.5, "max": 1}, "1", 1.0),
+        ({"type": "duration", "min": 1, "max": 60}, "1m", timedelta(minutes=1)),
+    ],
+)
+def test_valid_values(entry, value, expected):
+    assert _check(entry, value) == expected
+
+
+def test_regex_values_are_compiled():
+    assert _check({"type": "regex"}, "^a+$") == re.compile("^a+$")
+
+
+@pytest.mark.parametrize(
+    "entry, value, reason",
+    [
+        ({"type": "int"}, "8080.5", "not an integer"),
+        ({"type": "float"}, "fast", "not a number"),
+        ({"type": "bool"}, "maybe", "not a boolean"),
+        ({"type": "enum", "choices": ["dev", "prod"]}, "Prod", "not one of 'dev', 'prod'"),
+        ({"type": "regex"}, "a[", "not a valid regular expression"),
+        ({"type": "url"}, "example.com", "not a URL"),
+        ({"type": "url"}, "http://[::1", "not a URL"),
+        ({"type": "duration"}, "1x", "not a duration"),
+        ({"type": "duration"}, "inf", "not a duration"),
+        ({"type": "duration"}, "9" * 400 + "d", "too long a duration"),
+        ({"pattern": "[a-z]+"}, "abc1", "does not match the pattern '[a-z]+'"),
+        ({"type": "int", "min": 1}, "0", "less than the minimum of 1"),
+        ({"type": "int", "max": 65535}, "65536", "greater than the maximum of 65535"),
+        ({"type": "duration", "max": 60}, "2m", "greater than the maximum of 60"),
+        ({"min": 4}, "abc", "less than the minimum of 4"),
+    ],
+)
+def test_invalid_values(entry, value, reason):
+    with pytest.raises(ValueError) as exc:
+        _check(entry, value)
+    assert str(exc.value).startswith(reason)
+    # values may be secrets, so they are never part of the reason
+    assert value not in str(exc.value)
+
+
+def test_identical_patterns_are_compiled_once():
+    patterns = {}
+    compile_validator({"pattern": "[a-z]+"}, patterns)
+    compile_validator({"pattern": "[a-z]+"}, patterns)
+    assert list(patterns) == ["[a-z]+"]
+
+    validators = compile_validators(
+        {"A": {"pattern": "x"}, "B": True, "C": {"description": "d"}, "D": {"type": "int"}}
+    )
+    assert [name for name, _ in validators] == ["A", "D"]
+
+
+def test_untyped_specs_have_no_validators():
+    assert compile_validators({"A": True, "B": {"default": 1}}) == ()
+    compiled = CompiledSpec.from_spec({"A": True})
+    assert not compiled.typed
+    assert compiled.evaluate({}).values == {}
+
+
+def test_evaluate_typed_spec():
+    compiled = CompiledSpec.from_spec(
+        {
+            "PORT": {"type": "int", "default": 8080},
+            "DEBUG": {"type": "bool", "required": False},
+            "WORKERS": {"type": "int", "min": 1},
+            "NAME": True,
+        }
+    )
+    assert compiled.typed
+    evaluation = compiled.evaluate({"WORKERS": "0", "NAME": "x"})
+    assert evaluation.values == {"PORT": 8080}
+    assert evaluation.invalid == {"WORKERS": "less than the minimum of 1"}
+    assert evaluation.missing == []
+    assert evaluation.optional == ["PORT", "DEBUG"]
+
+
+def test_invalid_default_is_not_applied(tmp_path, clean_env):
+    spec = {"COERCE_PORT": {"type": "int", "default": "eighty"}, "COERCE_NAME": {"default": "x"}}
+    evaluation = CompiledSpec.from_spec(spec).evaluate({})
+    assert evaluation.invalid == {"COERCE_PORT": "not an integer"}
+    assert evaluation.optional == ["COERCE_NAME"]
+    assert evaluation.defaults == {"COERCE_NAME": "x"}
+
+    clean_env(spec)
+    spec_file = tmp_path / "env.json"
+    spec_file.write_text(json.dumps(spec))
+    env = CheckEnv(str(spec_file))
+    env.load_spec_file()
+    env.apply_spec()
+    assert env.check_failed
+    assert {section.section: list(section.index) for section in env.results} == {
+        "missing": [],
+        "invalid": ["COERCE_PORT"],
+        "optional": ["COERCE_NAME"],
+    }
+    assert "COERCE_PORT" not in os.environ
+    assert os.environ["COERCE_NAME"] == "x"
@@ -0,0 +1,249 @@
+import importlib.util
+import json
+import os
+import shutil
+import warnings
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import check
+from checkenv.cli import main
+from checkenv.compiler import StaleSpecWarning, _literal, compile_module, generate_module
+from checkenv.exceptions import CheckEnvException
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+VALID2 = os.path.join(dir_path, "fixtures/valid2.json")
+INVALID = os.path.join(dir_path, "fixtures/invalid.json")
+
+
+@pytest.fixture
+def init_env(clean_env):
+    clean_env(["VALUE1_NOT_SET", "VALUE2_NOT_SET_WITH_DEFAULT", "VALUE3_NOT_SET_NOT_REQUIRED"])
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    env_file = tmp_path / "env.json"
+    shutil.copy(VALID2, env_file)
+    return env_file
+
+
+def _import(path):
+    spec = importlib.util.spec_from_file_location(f"compiled_{abs(hash(str(path)))}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def compiled(spec_file, tmp_path):
+    output = tmp_path / "env_spec.py"
+    compile_module(str(spec_file), str(output))
+    return _import(output)
+
+
+def test_generated_module_holds_precomputed_tuples(compiled):
+    assert compiled.SOURCE == "env.json"
+    assert compiled.COMPILED.names == (
+        "VALUE1_NOT_SET",
+        "VALUE2_NOT_SET_WITH_DEFAULT",
+        "VALUE3_NOT_SET_NOT_REQUIRED",
+    )
+    with open(VALID2) as spec:
+        assert json.load(spec) == compiled.SPEC
+    assert not compiled.is_stale()
+
+
+def test_failure_output_and_exception_match_check(init_env, compiled, spec_file, capsys):
+    with pytest.raises(CheckEnvException) as expected:
+        check(str(spec_file), raise_exception=True)
+    expected_output = capsys.readouterr().out
+    os.environ.pop("VALUE2_NOT_SET_WITH_DEFAULT")
+    with pytest.raises(CheckEnvException) as actual:
+        compiled.check(raise_exception=True)
+    assert capsys.readouterr().out == expected_output
+    assert actual.value.missing == expected.value.missing
+    assert actual.value.optional == expected.value.optional
+    assert "read" not in actual.value.stats.durations_ns
+    assert actual.value.stats.keys == 3
+
+
+def test_failure_exits(init_env, compiled):
+    with pytest.raises(SystemExit) as exc:
+        compiled.check(no_output=True)
+    assert exc.value.code == 1
+
+
+def test_pass_applies_defaults(init_env, compiled, monkeypatch, capsys):
+    monkeypatch.setenv("VALUE1_NOT_SET", "set")
+    env = compiled.check(renderer="json")
+    assert os.environ["VALUE2_NOT_SET_WITH_DEFAULT"] == "3000"
+    assert env.defaults == {"VALUE2_NOT_SET_WITH_DEFAULT": "3000"}
+    # the original default value is rendered, just like check() does
+    assert json.loads(capsys.readouterr().out)["optional"][0]["default"] == 3000
+
+
+def test_stale_build_checks_spec_file(init_env, compiled, spec_file, monkeypatch):
+    monkeypatch.setenv("VALUE1_NOT_SET", "set")
+    spec_file.write_text(json.dumps({"VALUE1_NOT_SET": True, "COMPILER_NEW_VALUE": True}))
+    assert compiled.is_stale()
+    with pytest.warns(StaleSpecWarning), pytest.raises(CheckEnvException) as exc:
+        compiled.check(raise_exception=True, no_output=True)
+    assert exc.value.missing == ["COMPILER_NEW_VALUE"]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        env = compiled.check(no_output=True, check_stale=False)
+    assert env.missing == []
+
+
+def test_missing_spec_file_is_not_stale(init_env, compiled, spec_file, monkeypatch):
+    monkeypatch.setenv("VALUE1_NOT_SET", "set")
+    spec_file.unlink()
+    assert not compiled.is_stale()
+    assert compiled.check(no_output=True).missing == []
+
+
+def test_source_is_relative_to_output(spec_file, tmp_path):
+    output_dir = tmp_path / "build"
+    output_dir.mkdir()
+    module = compile_module(str(spec_file), str(output_dir / "env_spec.py"))
+    assert f"SOURCE = {os.path.join('..', 'env.json')!r}" in module
+
+
+def test_source_on_another_drive_is_absolute(spec_file, monkeypatch):
+    def relpath(path, start):
+        raise ValueError("path is on mount 'C:', start on mount 'D:'")
+
+    monkeypatch.setattr(os.path, "relpath", relpath)
+    assert f"SOURCE = {str(spec_file)!r}" in generate_module(str(spec_file))
+
+
+def test_literal_handles_non_finite_floats():
+    value = {"A": {"default": float("inf")}, "B": {"default": float("-inf")}}
+    assert eval(_literal(value)) == value
+
+
+def test_invalid_spec_is_rejected_with_reference_schema(tmp_path):
+    with pytest.raises(ValidationError):
+        generate_module(INVALID)
+
+
+def test_failed_write_leaves_no_temp_file(spec_file, tmp_path, monkeypatch):
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        compile_module(str(spec_file), str(tmp_path / "env_spec.py"))
+    assert sorted(os.listdir(tmp_path)) == ["env.json"]
+
+
+def test_cli_compile_and_check(spec_file, tmp_path, capsys):
+    output = str(tmp_path / "env_spec.py")
+    assert main(["compile", str(spec_file), "--check", "-o", output]) == 1
+    assert "out of date" in capsys.readouterr().err
+    assert main(["compile", str(spec_file), "-o", output]) == 0
+    assert main(["compile", str(spec_file), "--check", "-o", output]) == 0
+    spec_file.write_text('{"COMPILER_NEW_VALUE": true}')
+    assert main(["compile", str(spec_file), "--check", "-o", output]) == 1
+
+
+def test_cli_compile_errors(tmp_path, capsys):
+    bad_json = tmp_path / "bad.json"
+    bad_json.write_text("{")
+    output = str(tmp_path / "env_spec.py")
+    assert main(["compile", str(tmp_path / "missing.json"), "-o", output]) == 1
+    assert "missing.json" in capsys.readouterr().err
+    assert main(["compile", str(bad_json), "-o", output]) == 1
+    assert capsys.readouterr().err.startswith("Invalid spec file: ")
+    assert main(["compile", INVALID, "--check", "-o", output]) == 1
+    assert "123TEST" in capsys.readouterr().err
+    assert not os.path.exists(output)
+
+
+def test_cli_compile_reraises_unexpected_errors(spec_file, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr("checkenv.compiler.generate_module", fail)
+    with pytest.raises(RuntimeError):
+        main(["compile", str(spec_file), "--check"])
+
+
+def test_overlay_leaves_environ_untouched(init_env, compiled, monkeypatch):
+    monkeypatch.setenv("VALUE1_NOT_SET", "set")
+    env = compiled.check(no_output=True, overlay=True)
+    assert env.config["VALUE2_NOT_SET_WITH_DEFAULT"] == "3000"
+    assert "VALUE2_NOT_SET_WITH_DEFAULT" not in os.environ
+
+
+def test_typed_spec_compiles_validators(tmp_path, monkeypatch):
+    spec_file = tmp_path / "typed.json"
+    shutil.copy(os.path.join(dir_path, "fixtures/typed.json"), spec_file)
+    output = tmp_path / "typed_spec.py"
+    compile_module(str(spec_file), str(output))
+    module = _import(output)
+    assert module.COMPILED.typed
+    monkeypatch.setenv("TYPED_MODE", "dev")
+    monkeypatch.setenv("TYPED_UNTYPED", "x")
+    monkeypatch.setenv("TYPED_PORT", "not a port")
+    with pytest.raises(CheckEnvException) as exc:
+        module.check(raise_exception=True, no_output=True, overlay=True)
+    assert exc.value.invalid == {"TYPED_PORT": "not an integer"}
+
+
+def test_pattern_spec_compiles_rules(tmp_path, monkeypatch):
+    spec_file = tmp_path / "patterns.json"
+    shutil.copy(os.path.join(dir_path, "fixtures/patterns.json"), spec_file)
+    output = tmp_path / "patterns_spec.py"
+    compile_module(str(spec_file), str(output))
+    module = _import(output)
+    assert module.COMPILED.pattern_keys == ("PATTERN_SHARD_*_DSN", "/PATTERN_FEATURE_[A-Z]+/")
+    monkeypatch.setenv("PATTERN_NAME", "x")
+    monkeypatch.delenv("PATTERN_SHARD_1_DSN", raising=False)
+    with pytest.raises(CheckEnvException) as exc:
+        module.check(raise_exception=True, no_output=True, overlay=True)
+    assert exc.value.missing == ["PATTERN_SHARD_*_DSN"]
+
+
+def test_changed_fragment_makes_build_stale(init_env, tmp_path, monkeypatch):
+    (tmp_path / "shared").mkdir()
+    fragment = tmp_path / "shared" / "frag.json"
+    fragment.write_text(json.dumps({"VALUE1_NOT_SET": True}))
+    # a fragment whose only entry is overridden still counts
+    overridden = tmp_path / "shared" / "overridden.json"
+    overridden.write_text(json.dumps({"VALUE3_NOT_SET_NOT_REQUIRED": True}))
+    spec_file = tmp_path / "env.json"
+    spec_file.write_text(
+        json.dumps(
+            {
+                "$include": ["shared/frag.json", "shared/overridden.json"],
+                "VALUE3_NOT_SET_NOT_REQUIRED": False,
+            }
+        )
+    )
+    output = tmp_path / "out" / "env_spec.py"
+    output.parent.mkdir()
+    compile_module(str(spec_file), str(output))
+    compiled = _import(output)
+    assert sorted(compiled.FRAGMENTS) == [
+        os.path.join("..", "shared", "frag.json"),
+        os.path.join("..", "shared", "overridden.json"),
+    ]
+    assert not compiled.is_stale()
+
+    monkeypatch.setenv("VALUE1_NOT_SET", "set")
+    fragment.write_text(json.dumps({"VALUE1_NOT_SET": True, "VALUE2_NOT_SET_WITH_DEFAULT": True}))
+    assert compiled.is_stale()
+    with pytest.warns(StaleSpecWarning), pytest.raises(CheckEnvException) as exc:
+        compiled.check(raise_exception=True, no_output=True)
+    assert exc.value.missing == ["VALUE2_NOT_SET_WITH_DEFAULT"]
+
+    fragment.write_text(json.dumps({"VALUE1_NOT_SET": True}))
+    overridden.write_text("{}")
+    assert compiled.is_stale()
+    # fragments that are not deployed are not stale, like the spec file itself
+    overridden.unlink()
+    assert not compiled.is_stale()
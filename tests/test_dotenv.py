@@ -0,0 +1,49 @@
+import pytest
+
+from checkenv.dotenv import parse_dotenv, parse_environ_dump, read_dotenv, read_environ_dump
+
+
+def test_parse_dotenv_bare_values():
+    text = (
+        "A=1\n  export B = two words  \n# comment\nnot an assignment\nC=\nD=url#frag\nE=x # note\n"
+    )
+    assert parse_dotenv(text) == {"A": "1", "B": "two words", "C": "", "D": "url#frag", "E": "x"}
+
+
+def test_parse_dotenv_quoted_values():
+    text = 'S=\'single # x\nline\'\nD="dq \\"esc\\" \\n\\t \\\\ \\$x"\nM="multi\nline"\nN="plain"\n'
+    assert parse_dotenv(text) == {
+        "S": "single # x\nline",
+        "D": 'dq "esc" \n\t \\ $x',
+        "M": "multi\nline",
+        "N": "plain",
+    }
+
+
+def test_parse_dotenv_later_assignments_win():
+    assert parse_dotenv("A=1\nA=2\n") == {"A": "2"}
+
+
+def test_parse_environ_dump():
+    assert parse_environ_dump(b"A=1\0B=x=y\0NOEQUALS\0\0C=\0") == {"A": "1", "B": "x=y", "C": ""}
+    assert parse_environ_dump(b"K=\xff") == {"K": "\udcff"}
+
+
+def test_read_files(tmp_path):
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("A=1\n", encoding="utf-8")
+    dump_file = tmp_path / "environ"
+    dump_file.write_bytes(b"B=2\0")
+    assert read_dotenv(str(dotenv_file)) == {"A": "1"}
+    assert read_environ_dump(str(dump_file)) == {"B": "2"}
+    with pytest.raises(OSError):
+        read_dotenv(str(tmp_path / "missing"))
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_large_files_are_memory_mapped(tmp_path, monkeypatch, newline):
+    text = "A=1\nexport B = \"x\\ny\" # note\nC='multi\nline'\nD=é # x\nE=a#b\n" * 3
+    path = tmp_path / ".env"
+    path.write_text(text.replace("\n", newline), encoding="utf-8", newline="")
+    monkeypatch.setattr("checkenv.dotenv.MMAP_THRESHOLD", 1)
+    assert read_dotenv(str(path)) == parse_dotenv(text)
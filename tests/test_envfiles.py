@@ -0,0 +1,168 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from checkenv import CheckEnv, check, check_async
+from checkenv.envfiles import load_env
+from checkenv.exceptions import CheckEnvException
+
+NAMES = ["LOADED_A", "LOADED_B", "LOADED_SECRET", "LOADED_SECRET_FILE", "LOADED_OTHER"]
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_precedence_of_dotenv_files(tmp_path):
+    first = write(tmp_path / "first.env", "A=first\nB=first\nC=first\n")
+    second = write(tmp_path / "second.env", "B=second\nC=second\n")
+    env = {"C": "environ"}
+    loaded = load_env(env, [first, second])
+    assert loaded.values == {"A": "first", "B": "second"}
+    assert loaded.sources == {"A": first, "B": second}
+    assert loaded.layer(env) == {"A": "first", "B": "second", "C": "environ"}
+
+    loaded = load_env(env, [first, second], override=True)
+    assert loaded.values == {"A": "first", "B": "second", "C": "second"}
+    assert loaded.layer(env)["C"] == "second"
+
+
+def test_secret_files(tmp_path):
+    missing = str(tmp_path / "missing")
+    password = write(tmp_path / "password", "hunter2\n")
+    token = write(tmp_path / "token", "abc")
+    dotenv = write(tmp_path / ".env", f"TOKEN_FILE={token}\n")
+    env = {
+        "PASSWORD_FILE": password,
+        "USER": "set",
+        "USER_FILE": password,
+        "UNDECLARED_FILE": password,
+        "BROKEN_FILE": missing,
+    }
+    names = ["PASSWORD", "TOKEN", "USER", "UNDECLARED_X", "BROKEN", "PLAIN"]
+    loaded = load_env(env, [dotenv], names, secret_files=True)
+    assert loaded.values == {"TOKEN_FILE": token, "PASSWORD": "hunter2", "TOKEN": "abc"}
+    assert loaded.sources == {"TOKEN_FILE": dotenv, "PASSWORD": password, "TOKEN": token}
+    assert loaded.errors == {
+        "BROKEN": f"cannot read BROKEN_FILE {missing!r}: No such file or directory"
+    }
+
+    # secrets are only resolved on request, and a single one is read without a pool
+    assert load_env(env, names=names).values == {}
+    assert load_env(env, names=["PASSWORD"], secret_files=True).values == {"PASSWORD": "hunter2"}
+
+
+def test_undecodable_secret_file(tmp_path):
+    (tmp_path / "binary").write_bytes(b"\xff\xfe")
+    loaded = load_env({"KEY_FILE": str(tmp_path / "binary")}, names=["KEY"], secret_files=True)
+    assert loaded.errors["KEY"].startswith("cannot read KEY_FILE")
+    assert "can't decode byte 0xff" in loaded.errors["KEY"]
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    spec = {"LOADED_A": True, "LOADED_B": {"default": "b"}, "LOADED_SECRET": True}
+    return write(tmp_path / "env.json", json.dumps(spec))
+
+
+def test_check_loads_files_in_one_batch(tmp_path, spec_file, monkeypatch):
+    secret = write(tmp_path / "secret", "s3cret\n")
+    dotenv = write(tmp_path / ".env", f"LOADED_A=a\nLOADED_SECRET_FILE={secret}\n")
+    env = check(filename=spec_file, no_output=True, dotenv_files=[dotenv], secret_files=True)
+    assert not env.check_failed
+    assert dict(env.value_sources) == {
+        "LOADED_A": dotenv,
+        "LOADED_SECRET_FILE": dotenv,
+        "LOADED_SECRET": secret,
+    }
+    assert env.config["LOADED_SECRET"] == "s3cret"
+    assert os.environ["LOADED_A"] == "a"
+    assert os.environ["LOADED_SECRET"] == "s3cret"
+    assert os.environ["LOADED_B"] == "b"
+
+
+def test_overlay_leaves_environ_untouched(tmp_path, spec_file):
+    dotenv = write(tmp_path / ".env", "LOADED_A=a\nLOADED_SECRET=s\n")
+    env = check(filename=spec_file, no_output=True, dotenv_files=[dotenv], overlay=True)
+    assert env.config["LOADED_A"] == "a"
+    assert "LOADED_A" not in os.environ
+    # committing writes the loaded variables along with the defaults
+    assert env.config.commit() == {"LOADED_B": "b"}
+    assert os.environ["LOADED_A"] == "a"
+    assert os.environ["LOADED_SECRET"] == "s"
+    assert os.environ["LOADED_B"] == "b"
+
+
+def test_commit_keeps_variables_set_since_the_check(tmp_path, spec_file, monkeypatch):
+    dotenv = write(tmp_path / ".env", "LOADED_A=a\nLOADED_SECRET=s\n")
+    config = check(filename=spec_file, no_output=True, dotenv_files=[dotenv], overlay=True).config
+    monkeypatch.setenv("LOADED_A", "exported")
+    config.commit()
+    # the environment takes precedence over .env files
+    assert os.environ["LOADED_A"] == "exported"
+    assert os.environ["LOADED_SECRET"] == "s"
+
+    monkeypatch.setenv("LOADED_SECRET", "exported")
+    config = check(
+        filename=spec_file,
+        no_output=True,
+        dotenv_files=[dotenv],
+        dotenv_override=True,
+        overlay=True,
+    ).config
+    monkeypatch.setenv("LOADED_A", "exported again")
+    config.commit()
+    assert os.environ["LOADED_A"] == "a"
+    assert os.environ["LOADED_SECRET"] == "s"
+
+
+def test_unreadable_secrets_are_invalid(tmp_path, spec_file, monkeypatch, capsys):
+    monkeypatch.setenv("LOADED_A", "a")
+    monkeypatch.setenv("LOADED_B_FILE", str(tmp_path / "missing"))
+    monkeypatch.setenv("LOADED_SECRET_FILE", str(tmp_path / "missing"))
+    with pytest.raises(CheckEnvException) as exc:
+        check(
+            filename=spec_file,
+            raise_exception=True,
+            renderer="text",
+            secret_files=True,
+        )
+    assert exc.value.missing == []
+    assert list(exc.value.invalid) == ["LOADED_B", "LOADED_SECRET"]
+    out = capsys.readouterr().out
+    assert "The following 2 environment variables are invalid" in out
+    assert "missing (but optional)" not in out
+    # the default of a variable whose secret cannot be read is not applied
+    assert "LOADED_B" not in os.environ
+    env = CheckEnv(spec_file, secret_files=True)
+    env.load_spec_file()
+    env.apply_spec(dry_run=True)
+    assert env.defaults == {}
+
+
+def test_missing_dotenv_file_is_reported(tmp_path, spec_file, capsys):
+    missing = str(tmp_path / "missing.env")
+    with pytest.raises(SystemExit):
+        check(filename=spec_file, renderer="text", dotenv_files=[missing])
+    assert capsys.readouterr().out == (
+        f'Unable to find checkenv configuration file "{missing}" - exiting\n'
+    )
+
+
+def test_check_async_loads_files(tmp_path, spec_file):
+    dotenv = write(tmp_path / ".env", "LOADED_A=a\nLOADED_SECRET=s\n")
+    env = asyncio.run(
+        check_async(filename=spec_file, no_output=True, dotenv_files=[dotenv], overlay=True)
+    )
+    assert env.value_sources == {"LOADED_A": dotenv, "LOADED_SECRET": dotenv}
+
+    instance = CheckEnv(env_filename=spec_file)
+    assert instance.value_sources == {}
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+# generous enough for slow CI runners; importing jsonschema alone takes ~100ms
+IMPORT_TIME_BUDGET_US = 50_000
+
+# modules that must only be imported on the code paths that need them
+LAZY_MODULES = ["colorama", "jsonschema", "json", "checkenv.cache"]
+
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def _cumulative_import_time_us(stderr, module):
+    # lines look like "import time:   self [us] | cumulative | imported package"
+    for line in stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1])
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+
+def test_import_does_not_load_lazy_modules():
+    result = _run(
+        "import sys, checkenv; "
+        f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_import_does_not_wrap_stdout():
+    result = _run("import sys; stdout = sys.stdout; import checkenv; print(sys.stdout is stdout)")
+    assert result.stdout.strip() == "True"
+
+
+def test_import_time_budget():
+    result = _run("import checkenv")
+    assert _cumulative_import_time_us(result.stderr, "checkenv") < IMPORT_TIME_BUDGET_US
+
+
+def test_passing_check_does_not_import_jsonschema_or_colorama(tmp_path):
+    env_file = tmp_path / "env.json"
+    env_file.write_text('{"IMPORT_TIME_OPTIONAL": false}')
+    cache_dir = tmp_path / "cache"
+    code = (
+        "import sys, checkenv; "
+        f"checkenv.check({str(env_file)!r}, no_output=True, cache_dir={str(cache_dir)!r}); "
+        "print(','.join(name for name in ('colorama', 'json', 'jsonschema') "
+        "if name in sys.modules))"
+    )
+    assert _run(code).stdout.strip() == "json"
+    assert _run(code).stdout.strip() == ""
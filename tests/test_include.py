@@ -0,0 +1,208 @@
+import json
+import os
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import CheckEnv, check, check_many
+from checkenv.exceptions import CheckEnvException, MultiCheckEnvException
+from checkenv.include import clear_fragment_cache, compose, load_fragment, split_includes
+from checkenv.validator import validate_spec
+
+NAMES = ["INCLUDE_A", "INCLUDE_B", "INCLUDE_C", "INCLUDE_D"]
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+    clear_fragment_cache()
+    yield
+    clear_fragment_cache()
+
+
+def write(path, spec):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(spec))
+    return str(path)
+
+
+class CountingValidator:
+    def __init__(self):
+        self.specs = []
+
+    def __call__(self, spec):
+        self.specs.append(spec)
+        validate_spec(spec)
+
+
+@pytest.fixture
+def service(tmp_path):
+    write(tmp_path / "common/base.json", {"INCLUDE_A": True, "INCLUDE_B": {"default": "1"}})
+    write(tmp_path / "common/db.json", {"INCLUDE_B": {"default": "2"}, "INCLUDE_C": False})
+    return write(
+        tmp_path / "service/env.json",
+        {
+            "$include": ["../common/base.json", "../common/db.json"],
+            "INCLUDE_C": {"description": "required here"},
+            "INCLUDE_D": False,
+        },
+    )
+
+
+def test_includes_are_merged_with_overrides(service, tmp_path):
+    instance = CheckEnv(env_filename=service)
+    instance.load_spec_file()
+    assert instance.spec == {
+        "INCLUDE_A": True,
+        "INCLUDE_B": {"default": "2"},
+        "INCLUDE_C": {"description": "required here"},
+        "INCLUDE_D": False,
+    }
+    base = os.path.join(tmp_path, "common", "base.json")
+    db = os.path.join(tmp_path, "common", "db.json")
+    assert dict(instance.sources) == {
+        "INCLUDE_A": base,
+        "INCLUDE_B": db,
+        "INCLUDE_C": service,
+        "INCLUDE_D": service,
+    }
+    assert instance.stats.keys == 4
+    assert "include" in instance.stats.durations_ns
+
+
+def test_rows_name_the_included_file(service, tmp_path, capsys):
+    with pytest.raises(CheckEnvException) as exc:
+        check(filename=service, raise_exception=True, renderer="text")
+    assert exc.value.missing == ["INCLUDE_A", "INCLUDE_C"]
+    base = os.path.join(tmp_path, "common", "base.json")
+    out = capsys.readouterr().out.splitlines()
+    assert f"INCLUDE_A (from {base})" in out
+    assert "INCLUDE_C required here" in out
+    assert f"INCLUDE_B (default=2) (from {os.path.join(tmp_path, 'common', 'db.json')})" in out
+    instance = CheckEnv(env_filename=service)
+    instance.load_spec_file()
+    instance.apply_spec(dry_run=True)
+    assert instance.results[0].index["INCLUDE_A"].source == base
+    assert instance.results[0].index["INCLUDE_C"].source is None
+
+
+def test_specs_without_includes_have_no_sources(tmp_path):
+    instance = CheckEnv(env_filename=write(tmp_path / "env.json", {"INCLUDE_A": False}))
+    instance.load_spec_file()
+    assert instance.sources == {}
+    assert "include" not in instance.stats.durations_ns
+
+
+def test_shared_fragments_are_loaded_once(tmp_path):
+    common = write(tmp_path / "common.json", {"INCLUDE_A": True})
+    write(tmp_path / "left.json", {"$include": "common.json", "INCLUDE_B": True})
+    write(tmp_path / "right.json", {"$include": ["common.json"], "INCLUDE_C": True})
+    root = {"$include": ["left.json", "right.json"], "INCLUDE_D": True}
+    validate = CountingValidator()
+    composed = compose(str(tmp_path / "env.json"), root, validate)
+    assert list(composed.spec) == ["INCLUDE_A", "INCLUDE_B", "INCLUDE_C", "INCLUDE_D"]
+    assert sorted(map(sorted, validate.specs)) == [["INCLUDE_A"], ["INCLUDE_B"], ["INCLUDE_C"]]
+
+    # memoized for other specs in the process, until the fragment changes
+    validate.specs.clear()
+    compose(str(tmp_path / "other.json"), {"$include": "common.json"}, validate)
+    assert validate.specs == []
+    compose(str(tmp_path / "other.json"), {"$include": "common.json"}, validate, strict=True)
+    assert validate.specs == [{"INCLUDE_A": True}]
+    os.utime(common, ns=(1_000_000_000, 1_000_000_000))
+    assert load_fragment(common, validate).entries == {"INCLUDE_A": True}
+    assert load_fragment(common, validate).entries == {"INCLUDE_A": True}
+    assert len(validate.specs) == 2
+
+
+def test_other_validator_errors_pass_through(tmp_path):
+    def validate(spec):
+        raise RuntimeError("broken validator")
+
+    with pytest.raises(RuntimeError, match="^broken validator$"):
+        load_fragment(write(tmp_path / "base.json", {}), validate)
+
+
+@pytest.mark.parametrize(
+    ("fragments", "cycle"),
+    [
+        ({"env.json": "env.json"}, "env.json -> env.json"),
+        (
+            {"env.json": "a.json", "a.json": "b.json", "b.json": "a.json"},
+            "a.json -> b.json -> a.json",
+        ),
+    ],
+)
+def test_include_cycles_are_rejected(tmp_path, fragments, cycle):
+    for name, include in fragments.items():
+        write(tmp_path / name, {"$include": include})
+    with pytest.raises(ValidationError) as exc:
+        CheckEnv(env_filename=str(tmp_path / "env.json")).load_spec_file()
+    expected = " -> ".join(os.path.join(tmp_path, name) for name in cycle.split(" -> "))
+    assert exc.value.message == f"$['$include']: include cycle: {expected}"
+
+
+def test_malformed_includes(tmp_path):
+    with pytest.raises(ValidationError, match=r"^\$\['\$include'\]: \[1\] is not a path or a"):
+        split_includes({"$include": [1]})
+    assert split_includes([]) == ([], ())
+
+    spec_file = write(tmp_path / "env.json", {"$include": "", "1NVALID": True})
+    with pytest.raises(ValidationError, match="is not a path"):
+        CheckEnv(env_filename=spec_file).load_spec_file()
+    write(tmp_path / "env.json", {"$include": "base.json", "1NVALID": True})
+    with pytest.raises(ValidationError, match="'1NVALID' is not a valid environment variable"):
+        CheckEnv(env_filename=spec_file).load_spec_file()
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_invalid_fragments_are_named(tmp_path, strict):
+    base = write(tmp_path / "base.json", {"INCLUDE_A": "yes"})
+    spec_file = write(tmp_path / "env.json", {"$include": "base.json"})
+    with pytest.raises(ValidationError) as exc:
+        CheckEnv(env_filename=spec_file, strict=strict).load_spec_file()
+    assert exc.value.message.startswith(f"{base}: ")
+
+    (tmp_path / "base.json").write_text("{")
+    with pytest.raises(ValueError, match=f"^{base}: Expecting"):
+        CheckEnv(env_filename=spec_file, strict=strict).load_spec_file()
+
+
+def test_missing_fragment_is_reported(tmp_path, capsys):
+    spec_file = write(tmp_path / "env.json", {"$include": "missing.json"})
+    with pytest.raises(SystemExit):
+        check(filename=spec_file, renderer="text")
+    missing = os.path.join(tmp_path, "missing.json")
+    assert (
+        capsys.readouterr().out
+        == f'Unable to find checkenv configuration file "{missing}" - exiting\n'
+    )
+
+    with pytest.raises(MultiCheckEnvException) as exc:
+        check_many([spec_file], raise_exception=True, no_output=True)
+    assert exc.value.errors == {
+        spec_file: f'Unable to find checkenv configuration file "{missing}"'
+    }
+
+
+def test_cached_spec_picks_up_changed_fragments(tmp_path, service, capsys):
+    cache_dir = str(tmp_path / "cache")
+    first = CheckEnv(env_filename=service, cache_dir=cache_dir)
+    first.load_spec_file()
+    base = write(tmp_path / "common/base.json", {"INCLUDE_A": False})
+    os.utime(base, ns=(1_000_000_000, 1_000_000_000))
+    second = CheckEnv(env_filename=service, cache_dir=cache_dir)
+    second.load_spec_file()
+    assert second.stats.cache_hit
+    assert second.spec["INCLUDE_A"] is False
+
+    with pytest.raises(SystemExit):
+        check(filename=service, renderer="jsonl", overlay=True)
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert rows[0] == {
+        "section": "missing",
+        "name": "INCLUDE_C",
+        "default": None,
+        "description": "required here",
+    }
+    assert rows[1]["source"] == base
@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+from checkenv import CheckEnv, check
+from checkenv.exceptions import CheckEnvException
+from checkenv.instrument import CheckHook, CheckStats, add_hook, remove_hook
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+SPEC = {
+    "STATS_SET": True,
+    "STATS_MISSING": True,
+    "STATS_DEFAULT": {"default": 1},
+    "STATS_OPTIONAL": False,
+}
+
+
+class RecordingHook(CheckHook):
+    def __init__(self):
+        self.events = []
+
+    def on_phase_start(self, phase, stats):
+        self.events.append(("start", phase))
+
+    def on_phase_end(self, phase, duration_ns, stats):
+        assert duration_ns >= 0
+        self.events.append(("end", phase))
+
+
+@pytest.fixture
+def hook():
+    hook = RecordingHook()
+    add_hook(hook)
+    yield hook
+    remove_hook(hook)
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env, monkeypatch):
+    clean_env(["STATS_MISSING", "STATS_DEFAULT", "STATS_OPTIONAL"])
+    monkeypatch.setenv("STATS_SET", "1")
+
+
+def test_check_records_every_phase(spec_file, hook, capsys):
+    with pytest.raises(CheckEnvException) as exc:
+        check(str(spec_file), raise_exception=True)
+    stats = exc.value.stats
+    assert list(stats.durations_ns) == ["read", "parse", "validate", "apply", "render"]
+    assert stats.total_ns == sum(stats.durations_ns.values())
+    assert stats.as_dict() == {
+        "durations_ns": stats.durations_ns,
+        "total_ns": stats.total_ns,
+        "keys": 4,
+        "defaults_applied": 1,
+        "missing": 1,
+        "optional": 2,
+        "cache_hit": None,
+        "outcome_hit": None,
+    }
+    assert hook.events == [
+        (event, phase)
+        for phase in ("read", "parse", "validate", "apply", "render")
+        for event in ("start", "end")
+    ]
+
+
+def test_check_returns_checkenv_with_stats(spec_file, monkeypatch):
+    monkeypatch.setenv("STATS_MISSING", "1")
+    env = check(str(spec_file), no_output=True)
+    assert isinstance(env, CheckEnv)
+    assert "render" not in env.stats.durations_ns
+    assert env.stats.missing == 0
+
+
+def test_dry_run_applies_no_defaults(spec_file):
+    env = CheckEnv(str(spec_file))
+    env.load_spec_file()
+    env.apply_spec(dry_run=True)
+    assert env.stats.defaults_applied == 0
+    assert env.defaults == {"STATS_DEFAULT": "1"}
+
+
+def test_cache_hit_skips_parse_and_validate(spec_file, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cold = CheckEnv(str(spec_file), cache_dir=cache_dir)
+    cold.load_spec_file()
+    assert cold.stats.cache_hit is False
+    warm = CheckEnv(str(spec_file), cache_dir=cache_dir)
+    warm.load_spec_file()
+    assert warm.stats.cache_hit is True
+    assert list(warm.stats.durations_ns) == ["read"]
+    assert warm.stats.keys == 4
+
+
+def test_failed_phase_is_still_recorded(tmp_path, hook):
+    env_file = tmp_path / "env.json"
+    env_file.write_text("{not json")
+    env = CheckEnv(str(env_file))
+    with pytest.raises(ValueError):
+        env.load_spec_file()
+    assert list(env.stats.durations_ns) == ["read", "parse"]
+    assert hook.events[-1] == ("end", "parse")
+
+
+def test_load_resets_stats(spec_file):
+    env = CheckEnv(str(spec_file))
+    env.load_spec_file()
+    env.apply_spec(dry_run=True)
+    first = env.stats
+    env.load_spec_file()
+    assert env.stats is not first
+    assert "apply" not in env.stats.durations_ns
+
+
+def test_repeated_phase_accumulates():
+    stats = CheckStats()
+    stats.stop("apply", stats.start("apply"))
+    first = stats.durations_ns["apply"]
+    stats.stop("apply", stats.start("apply"))
+    assert stats.durations_ns["apply"] >= first
+    assert repr(stats).startswith("CheckStats({'durations_ns': {'apply': ")
+
+
+def test_remove_unknown_hook_raises():
+    with pytest.raises(ValueError):
+        remove_hook(CheckHook())
+
+
+def test_base_hook_is_a_no_op(spec_file):
+    base = CheckHook()
+    add_hook(base)
+    try:
+        CheckEnv(str(spec_file)).load_spec_file()
+    finally:
+        remove_hook(base)
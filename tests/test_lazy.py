@@ -0,0 +1,118 @@
+import os
+import re
+from datetime import timedelta
+
+import pytest
+
+from checkenv import CheckEnv, lazy_config
+from checkenv.exceptions import CheckEnvException
+from checkenv.lazy import LazyConfig
+
+NAMES = ["LAZY_URL", "LAZY_PORT", "LAZY_TIMEOUT", "LAZY_DEBUG", "LAZY_TOKEN", "LAZY_TOKNE"]
+
+SPEC = {
+    "LAZY_URL": {"description": "required"},
+    "LAZY_PORT": {"type": "int", "min": 1, "max": 65535, "default": 8000},
+    "LAZY_TIMEOUT": {"type": "duration", "required": False},
+    "LAZY_DEBUG": False,
+    "LAZY_TOKEN": True,
+    "LAZY_FEATURE_*": {"min_count": 1},
+}
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES + ["LAZY_FEATURE_A"])
+
+
+def test_values_are_resolved_on_first_access(spec_file, monkeypatch):
+    monkeypatch.setenv("LAZY_URL", "https://example.com")
+    monkeypatch.setenv("LAZY_TIMEOUT", "1m30s")
+    config = lazy_config(spec_file)
+    assert config.resolved == []
+    assert config["LAZY_URL"] == "https://example.com"
+    assert config["LAZY_PORT"] == 8000
+    assert config["LAZY_TIMEOUT"] == timedelta(seconds=90)
+    assert config["LAZY_DEBUG"] is None
+    assert config.get("LAZY_DEBUG", "off") is None
+    assert config.resolved == ["LAZY_URL", "LAZY_PORT", "LAZY_TIMEOUT", "LAZY_DEBUG"]
+    # defaults are not written to os.environ
+    assert "LAZY_PORT" not in os.environ
+
+    # memoized until invalidated
+    monkeypatch.setenv("LAZY_PORT", "9000")
+    monkeypatch.setenv("LAZY_URL", "https://example.org")
+    assert config["LAZY_PORT"] == 8000
+    config.invalidate(["LAZY_PORT", "LAZY_UNKNOWN"])
+    assert config["LAZY_PORT"] == 9000
+    assert config["LAZY_URL"] == "https://example.com"
+    config.invalidate()
+    assert config.resolved == []
+    assert config["LAZY_URL"] == "https://example.org"
+
+
+def test_mapping(spec_file):
+    config = lazy_config(spec_file)
+    assert list(config) == ["LAZY_URL", "LAZY_PORT", "LAZY_TIMEOUT", "LAZY_DEBUG", "LAZY_TOKEN"]
+    assert len(config) == 5
+    assert "LAZY_PORT" in config
+    assert "LAZY_FEATURE_*" not in config
+    assert 1 not in config
+    assert repr(config) == f"LazyConfig({spec_file!r}, resolved=[])"
+
+
+@pytest.mark.parametrize("name", ["LAZY_UNKNOWN", "LAZY_FEATURE_*"])
+def test_undeclared_names_raise(spec_file, name):
+    config = lazy_config(spec_file)
+    with pytest.raises(KeyError, match=f"{re.escape(name)} is not declared in the spec"):
+        config[name]  # noqa: B018
+    assert config.get(name) is None
+
+
+def test_missing_and_invalid_variables_raise(spec_file, monkeypatch):
+    monkeypatch.setenv("LAZY_TOKNE", "secret")
+    monkeypatch.setenv("LAZY_PORT", "0")
+    config = lazy_config(spec_file)
+    with pytest.raises(CheckEnvException) as exc:
+        config["LAZY_TOKEN"]  # noqa: B018
+    assert exc.value.missing == ["LAZY_TOKEN"]
+    assert str(exc.value) == (
+        "Missing required environment variables: LAZY_TOKEN (did you mean LAZY_TOKNE?)"
+    )
+    with pytest.raises(CheckEnvException) as exc:
+        config["LAZY_PORT"]  # noqa: B018
+    assert exc.value.invalid == {"LAZY_PORT": "less than the minimum of 1"}
+    # failures are not memoized
+    monkeypatch.setenv("LAZY_PORT", "80")
+    assert config["LAZY_PORT"] == 80
+    assert config.resolved == ["LAZY_PORT"]
+
+
+def test_verify_all(spec_file, monkeypatch, capsys):
+    monkeypatch.setenv("LAZY_URL", "https://example.com")
+    monkeypatch.setenv("LAZY_TOKEN", "secret")
+    config = lazy_config(spec_file)
+    # pattern keys are only checked by verify_all
+    with pytest.raises(CheckEnvException, match="Missing required environment variables: LAZY_FE"):
+        config.verify_all(raise_exception=True, renderer="text")
+    assert "LAZY_FEATURE_*" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        config.verify_all(no_output=True)
+
+    monkeypatch.setenv("LAZY_FEATURE_A", "on")
+    env = config.verify_all(no_output=True)
+    assert not env.check_failed
+    assert os.environ["LAZY_PORT"] == "8000"
+    assert config.resolved == list(config)
+    assert dict(config) == {
+        "LAZY_URL": "https://example.com",
+        "LAZY_PORT": 8000,
+        "LAZY_TIMEOUT": None,
+        "LAZY_DEBUG": None,
+        "LAZY_TOKEN": "secret",
+    }
+
+
+def test_spec_must_be_loaded():
+    with pytest.raises(RuntimeError, match="before loading a spec file"):
+        LazyConfig(CheckEnv("env.json"))
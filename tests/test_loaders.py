@@ -0,0 +1,151 @@
+import json
+import sys
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import CheckEnv, check
+from checkenv.exceptions import CheckEnvException
+from checkenv.loaders import (
+    LOADERS,
+    SUFFIXES,
+    _orjson_loads,
+    load_json,
+    parse_spec,
+    register_loader,
+    spec_format_for,
+)
+
+NAMES = ["LOADER_REQUIRED", "LOADER_DEFAULT", "LOADER_OPTIONAL"]
+
+SPEC = {
+    "LOADER_REQUIRED": {"description": "required"},
+    "LOADER_DEFAULT": {"default": 5, "description": "has a default"},
+    "LOADER_OPTIONAL": False,
+}
+
+TOML_SPEC = """\
+LOADER_OPTIONAL = false
+
+[LOADER_REQUIRED]
+description = "required"
+
+[LOADER_DEFAULT]
+default = 5
+description = "has a default"
+"""
+
+PYPROJECT = '[project]\nname = "app"\n\n[tool.checkenv]\n' + TOML_SPEC.replace(
+    "[LOADER", "[tool.checkenv.LOADER"
+)
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+
+
+@pytest.fixture
+def without_orjson(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    _orjson_loads.cache_clear()
+    yield
+    _orjson_loads.cache_clear()
+
+
+@pytest.mark.parametrize(
+    ("filename", "spec_format", "expected"),
+    [
+        ("env.json", None, "json"),
+        ("env", None, "json"),
+        ("env.spec", None, "json"),
+        ("conf/env.toml", None, "toml"),
+        ("conf/ENV.TOML", None, "toml"),
+        ("pyproject.toml", None, "pyproject"),
+        ("/srv/app/pyproject.toml", None, "pyproject"),
+        ("env.json", "toml", "toml"),
+    ],
+)
+def test_spec_format_for(filename, spec_format, expected):
+    assert spec_format_for(filename, spec_format) == expected
+
+
+def test_unknown_spec_format():
+    with pytest.raises(ValueError, match="Unknown checkenv spec format 'yaml'"):
+        spec_format_for("env.json", "yaml")
+
+
+@pytest.mark.parametrize("orjson", [True, False])
+def test_load_json(orjson, request):
+    if not orjson:
+        request.getfixturevalue("without_orjson")
+        assert _orjson_loads() is None
+    raw = json.dumps(SPEC).encode()
+    assert load_json(raw) == SPEC
+    # a byte order mark and NaN are accepted like json.loads does
+    assert load_json(b"\xef\xbb\xbf" + raw) == SPEC
+    assert load_json(b'{"A": {"default": NaN}}')["A"]["default"] != 0
+    with pytest.raises(json.JSONDecodeError, match="Expecting ',' delimiter"):
+        load_json(b'{"A": true "B": true}')
+
+
+def test_toml_and_pyproject():
+    assert parse_spec(TOML_SPEC.encode(), "env.toml") == SPEC
+    assert parse_spec(PYPROJECT.encode(), "pyproject.toml") == SPEC
+
+    with pytest.raises(ValueError, match=r"No \[tool.checkenv\] table found"):
+        parse_spec(b'[project]\nname = "app"\n', "pyproject.toml")
+    with pytest.raises(ValueError, match="Invalid"):
+        parse_spec(b"LOADER_OPTIONAL = ", "env.toml")
+
+
+def test_register_loader(monkeypatch):
+    monkeypatch.setattr("checkenv.loaders.LOADERS", dict(LOADERS))
+    monkeypatch.setattr("checkenv.loaders.SUFFIXES", dict(SUFFIXES))
+    register_loader("lines", lambda raw: dict.fromkeys(raw.decode().split(), True), [".lines"])
+    assert spec_format_for("env.lines") == "lines"
+    assert parse_spec(b"A\nB\n", "env.lines") == {"A": True, "B": True}
+
+
+@pytest.mark.parametrize("filename", ["env.toml", "pyproject.toml"])
+def test_check_toml_specs(tmp_path, filename, capsys):
+    path = tmp_path / filename
+    path.write_text(PYPROJECT if filename == "pyproject.toml" else TOML_SPEC)
+    with pytest.raises(CheckEnvException) as exc:
+        check(str(path), raise_exception=True, renderer="text", cache_dir=str(tmp_path / "cache"))
+    assert exc.value.missing == ["LOADER_REQUIRED"]
+    assert "has a default" in capsys.readouterr().out
+
+    # the cache holds the parsed spec, whatever the format
+    env = CheckEnv(str(path), cache_dir=str(tmp_path / "cache"))
+    env.load_spec_file()
+    assert env.stats.cache_hit is True
+    assert env.spec == SPEC
+
+
+def test_explicit_format_and_validation(tmp_path):
+    path = tmp_path / "env.conf"
+    path.write_text('LOADER_OPTIONAL = "yes"\n')
+    with pytest.raises(ValidationError, match="'yes' is not a boolean or an object"):
+        check(str(path), raise_exception=True, no_output=True, spec_format="toml")
+    with pytest.raises(ValueError, match="Expecting value"):
+        check(str(path), raise_exception=True, no_output=True)
+
+    # streaming mode only streams JSON specs
+    path.write_text(TOML_SPEC)
+    env = CheckEnv(str(path), streaming=True, spec_format="toml")
+    env.load_spec_file()
+    assert env.spec == SPEC
+
+
+def test_toml_includes(tmp_path):
+    (tmp_path / "shared.toml").write_text("LOADER_OPTIONAL = false\n")
+    path = tmp_path / "env.json"
+    path.write_text(json.dumps({"$include": "shared.toml", "LOADER_DEFAULT": {"default": 1}}))
+    env = CheckEnv(str(path))
+    env.load_spec_file()
+    assert env.spec == {"LOADER_OPTIONAL": False, "LOADER_DEFAULT": {"default": 1}}
+
+    (tmp_path / "shared.toml").write_text("LOADER_OPTIONAL = \n")
+    with pytest.raises(ValueError, match="shared.toml: Invalid"):
+        env.load_spec_file()
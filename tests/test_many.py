@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from checkenv import check_many, many
+from checkenv.exceptions import CheckEnvException, MultiCheckEnvException
+from checkenv.many import evaluate_many_specs
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+VALID1 = os.path.join(dir_path, "fixtures/valid1.json")
+VALID2 = os.path.join(dir_path, "fixtures/valid2.json")
+NO_MANDATORY = os.path.join(dir_path, "fixtures/valid_no_mandatory.json")
+INVALID = os.path.join(dir_path, "fixtures/invalid.json")
+
+
+@pytest.fixture
+def spec_files(tmp_path):
+    paths = []
+    for index in range(8):
+        env_file = tmp_path / f"service{index}.json"
+        env_file.write_text(json.dumps({f"MANY_SERVICE_{index}": True, "MANY_SHARED": False}))
+        paths.append(str(env_file))
+    return paths
+
+
+def test_reports_follow_input_order(spec_files, monkeypatch):
+    original = many._check_one
+
+    def slow_first(path, **kwargs):
+        # make earlier paths finish last
+        time.sleep(0.01 * (len(spec_files) - spec_files.index(path)))
+        return original(path, **kwargs)
+
+    monkeypatch.setattr(many, "_check_one", slow_first)
+    result = evaluate_many_specs(spec_files, env={}, max_workers=8)
+    assert [report.path for report in result.reports] == spec_files
+    assert [report.missing for report in result.reports] == [
+        [f"MANY_SERVICE_{index}"] for index in range(8)
+    ]
+
+
+def test_specs_run_concurrently(spec_files, monkeypatch):
+    original = many._check_one
+    threads = set()
+
+    def record_thread(path, **kwargs):
+        threads.add(threading.get_ident())
+        time.sleep(0.05)
+        return original(path, **kwargs)
+
+    monkeypatch.setattr(many, "_check_one", record_thread)
+    evaluate_many_specs(spec_files, env={}, max_workers=4)
+    assert len(threads) > 1
+
+
+def test_process_pool(spec_files):
+    env = {f"MANY_SERVICE_{index}": "set" for index in range(8)}
+    result = evaluate_many_specs(spec_files, env=env, max_workers=2, use_processes=True)
+    assert not result.check_failed
+    assert [report.optional for report in result.reports] == [["MANY_SHARED"]] * 8
+
+
+def test_shared_snapshot_and_no_environ_writes(monkeypatch):
+    monkeypatch.delenv("VALUE2_NOT_SET_WITH_DEFAULT", raising=False)
+    monkeypatch.setenv("VALUE1_NOT_SET", "set")
+    result = evaluate_many_specs([VALID2, VALID2], max_workers=1)
+    assert [report.missing for report in result.reports] == [[], []]
+    assert "VALUE2_NOT_SET_WITH_DEFAULT" not in os.environ
+
+
+def test_load_errors_are_reported_per_file(tmp_path):
+    bad_json = tmp_path / "bad.json"
+    bad_json.write_text("{")
+    bad_toml = tmp_path / "bad.toml"
+    bad_toml.write_text("[")
+    missing_file = str(tmp_path / "missing.json")
+    paths = [INVALID, str(bad_json), missing_file, NO_MANDATORY, str(bad_toml)]
+    result = evaluate_many_specs(paths, env={})
+    errors = [report.error for report in result.reports]
+    assert "123TEST" in errors[0]
+    assert errors[1].startswith("Invalid spec file: ")
+    assert errors[2] == f'Unable to find checkenv configuration file "{missing_file}"'
+    assert errors[3] is None
+    assert errors[4].startswith("Invalid spec file: ")
+    assert result.check_failed
+
+
+def test_unexpected_worker_errors_propagate(monkeypatch):
+    def fail(self):
+        raise KeyError("boom")
+
+    monkeypatch.setattr("checkenv.CheckEnv.load_spec_file", fail)
+    with pytest.raises(KeyError):
+        evaluate_many_specs([VALID1], env={})
+
+
+def test_check_many_raises_aggregated_exception():
+    with pytest.raises(MultiCheckEnvException) as exc:
+        check_many(
+            [VALID1, NO_MANDATORY, INVALID, VALID2],
+            raise_exception=True,
+            no_output=True,
+            env={"VALUE1": "1"},
+        )
+    assert isinstance(exc.value, CheckEnvException)
+    assert exc.value.per_file_missing == {
+        VALID1: ["VALUE3"],
+        NO_MANDATORY: [],
+        INVALID: [],
+        VALID2: ["VALUE1_NOT_SET"],
+    }
+    assert exc.value.per_file_optional[NO_MANDATORY] == ["OPTIONAL_1", "OPTIONAL_2"]
+    assert list(exc.value.errors) == [INVALID]
+    assert exc.value.missing == ["VALUE3", "VALUE1_NOT_SET"]
+    assert str(exc.value) == (
+        f"Environment check failed for spec files: {VALID1}, {INVALID}, {VALID2}"
+    )
+
+
+def test_check_many_exits_on_failure():
+    with pytest.raises(SystemExit) as exc:
+        check_many([VALID2], no_output=True, env={})
+    assert exc.value.code == 1
+
+
+def test_check_many_passes(capsys):
+    result = check_many([NO_MANDATORY], env={"OPTIONAL_1": "", "OPTIONAL_2": ""})
+    assert not result.check_failed
+    assert capsys.readouterr().out == ""
+
+
+def test_check_many_prints_report_in_input_order(capsys):
+    with pytest.raises(SystemExit):
+        check_many([VALID2, INVALID, NO_MANDATORY], env={})
+    out = capsys.readouterr().out
+    assert out.index(VALID2) < out.index("VALUE1_NOT_SET") < out.index(INVALID)
+    assert out.index(INVALID) < out.index("123TEST") < out.index(NO_MANDATORY)
+    assert "OPTIONAL_1" in out
+
+
+def test_invalid_typed_values_fail_their_spec_file(capsys):
+    typed = os.path.join(dir_path, "fixtures/typed.json")
+    env = {"TYPED_MODE": "staging", "TYPED_UNTYPED": "x", "VALUE1_NOT_SET": "1"}
+    with pytest.raises(MultiCheckEnvException) as exc:
+        check_many([VALID2, typed], raise_exception=True, env=env, renderer="json")
+    assert exc.value.per_file_invalid == {typed: {"TYPED_MODE": "not one of 'dev', 'prod'"}}
+    assert exc.value.invalid == {"TYPED_MODE": "not one of 'dev', 'prod'"}
+    assert str(exc.value) == f"Environment check failed for spec files: {typed}"
+    files = json.loads(capsys.readouterr().out)["files"]
+    assert "invalid" not in files[0]
+    assert files[1]["invalid"] == [
+        {
+            "name": "TYPED_MODE",
+            "default": None,
+            "description": None,
+            "error": "not one of 'dev', 'prod'",
+        }
+    ]
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import random
+import re
+
+import pytest
+
+from checkenv import CheckEnv, EnvCheckResults, check, check_async
+from checkenv.exceptions import CheckEnvException
+from checkenv.namespaces import NamespaceIndex
+
+NAMES = [
+    "NS_APP_URL",
+    "NS_APP_PORT",
+    "NS_APP_PROT",
+    "NS_APP_OLD_FLAG",
+    "NS_APP_FEATURE_A",
+    "NS_APP_URL_FILE",
+    "NS_WORKER_3_DSN",
+    "NS_OTHER",
+]
+
+SPEC = {
+    "NS_APP_URL": {"description": "the app's URL"},
+    "NS_APP_PORT": {"default": "8000"},
+    "NS_APP_FEATURE_*": False,
+}
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+
+
+@pytest.mark.parametrize(
+    ("namespaces", "expected"),
+    [
+        (["APP_"], ["APP_URL", "APP_DB_HOST"]),
+        (["APP_", "APP_DB_"], ["APP_URL", "APP_DB_HOST"]),
+        (["APP_DB_", "DB"], ["APP_DB_HOST", "DB_HOST", "DB"]),
+        (["APP_*_HOST"], ["APP_DB_HOST"]),
+        (["/[A-Z]+_HOST/", "AP"], ["APP_URL", "APP_DB_HOST", "DB_HOST"]),
+        ([""], ["APP_URL", "APP_DB_HOST", "DB_HOST", "DB", "HOME"]),
+        ([], []),
+    ],
+)
+def test_match(namespaces, expected):
+    names = ["APP_URL", "APP_DB_HOST", "DB_HOST", "DB", "HOME"]
+    assert NamespaceIndex(namespaces).match(names) == expected
+
+
+def test_match_agrees_with_startswith():
+    rng = random.Random(7)
+    prefixes = ["".join(rng.choices("AB_", k=rng.randint(1, 4))) for _ in range(200)]
+    names = ["".join(rng.choices("AB_", k=rng.randint(0, 8))) for _ in range(2000)]
+    expected = [name for name in names if name.startswith(tuple(prefixes))]
+    assert NamespaceIndex(prefixes).match(names) == expected
+
+
+def test_undeclared():
+    index = NamespaceIndex(["APP_"])
+    assert index.undeclared(["APP_Z", "HOME", "APP_URL", "APP_A"], {"APP_URL"}) == [
+        "APP_A",
+        "APP_Z",
+    ]
+
+
+def test_invalid_regular_expression():
+    with pytest.raises(re.error):
+        NamespaceIndex(["/APP_(/"])
+
+
+def test_check_reports_undeclared(spec_file, monkeypatch):
+    for name in ["NS_APP_URL", "NS_APP_PROT", "NS_APP_OLD_FLAG", "NS_APP_FEATURE_A", "NS_OTHER"]:
+        monkeypatch.setenv(name, "1")
+    env = check(spec_file, no_output=True, namespaces=["NS_APP_", "/NS_WORKER_[0-9]+_DSN/"])
+    assert not env.check_failed
+    assert env.undeclared == ["NS_APP_OLD_FLAG", "NS_APP_PROT"]
+    assert env.suggestions == {"NS_APP_PROT": ["NS_APP_PORT"]}
+
+    monkeypatch.setenv("NS_WORKER_3_DSN", "postgres://")
+    env = CheckEnv(spec_file, namespaces=["NS_APP_", "/NS_WORKER_[0-9]+_DSN/"])
+    env.load_spec_file()
+    env.apply_spec(dry_run=True)
+    assert env.undeclared == ["NS_APP_OLD_FLAG", "NS_APP_PROT", "NS_WORKER_3_DSN"]
+    section = env.results[-1]
+    assert section.section == EnvCheckResults.UNDECLARED
+    assert section.header == "The following 3 environment variables are not declared in the spec"
+    assert [str(row) for row in section.rows] == [
+        "NS_APP_OLD_FLAG",
+        "NS_APP_PROT (did you mean NS_APP_PORT?)",
+        "NS_WORKER_3_DSN",
+    ]
+
+
+def test_secret_files_are_declared(spec_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("NS_APP_URL", "https://example.com")
+    secret = tmp_path / "url"
+    secret.write_text("https://example.com")
+    monkeypatch.setenv("NS_APP_URL_FILE", str(secret))
+    env = check(spec_file, raise_exception=True, no_output=True, overlay=True, namespaces=["NS_"])
+    assert env.undeclared == ["NS_APP_URL_FILE"]
+    env = check(spec_file, no_output=True, overlay=True, namespaces=["NS_"], secret_files=True)
+    assert env.undeclared == []
+    assert env.config["NS_APP_URL"] == "https://example.com"
+
+
+def test_fail_on_undeclared(spec_file, monkeypatch, capsys):
+    monkeypatch.setenv("NS_APP_URL", "https://example.com")
+    monkeypatch.setenv("NS_APP_PROT", "80")
+    with pytest.raises(CheckEnvException) as exc:
+        check(
+            spec_file,
+            raise_exception=True,
+            renderer="text",
+            namespaces=["NS_APP_"],
+            fail_on_undeclared=True,
+        )
+    assert exc.value.undeclared == ["NS_APP_PROT"]
+    assert str(exc.value) == (
+        "Undeclared environment variables: NS_APP_PROT (did you mean NS_APP_PORT?)"
+    )
+    out = capsys.readouterr().out
+    assert "The following 1 environment variable is not declared in the spec" in out
+
+    with pytest.raises(CheckEnvException, match="Undeclared environment variables: NS_APP_PROT"):
+        asyncio.run(
+            check_async(spec_file, no_output=True, namespaces=["NS_APP_"], fail_on_undeclared=True)
+        )
+
+
+def test_results_without_namespaces(spec_file, monkeypatch):
+    monkeypatch.setenv("NS_APP_URL", "https://example.com")
+    monkeypatch.setenv("NS_APP_OLD_FLAG", "1")
+    env = check(spec_file, no_output=True, overlay=True)
+    assert env.undeclared == []
+    assert EnvCheckResults.UNDECLARED not in [section.section for section in env.results]
+
+
+def test_reported_with_outcome_cache(tmp_path, monkeypatch):
+    # without pattern keys, the outcome only depends on the values of the spec's variables
+    spec_file = tmp_path / "env.json"
+    spec_file.write_text(json.dumps({"NS_APP_URL": True}))
+    spec_file = str(spec_file)
+    monkeypatch.setenv("NS_APP_URL", "https://example.com")
+    cache_file = str(tmp_path / "outcomes")
+    check(spec_file, no_output=True, overlay=True, outcome_cache=cache_file, namespaces=["NS_"])
+    # undeclared variables are found again on a hit, since the outcome does not cover them
+    monkeypatch.setenv("NS_OTHER", "1")
+    env = check(
+        spec_file, no_output=True, overlay=True, outcome_cache=cache_file, namespaces=["NS_"]
+    )
+    assert env.stats.outcome_hit is True
+    assert env.undeclared == ["NS_OTHER"]
+
+
+@pytest.mark.parametrize(
+    ("missing", "invalid", "expected"),
+    [
+        ([], {}, "Undeclared environment variables: A_X"),
+        (["A"], {}, "Missing required environment variables: A; undeclared: A_X"),
+        ([], {"B": "bad"}, "Invalid environment variables: B; undeclared: A_X"),
+    ],
+)
+def test_exception_message(missing, invalid, expected):
+    exc = CheckEnvException(missing, [], invalid=invalid, undeclared=["A_X"])
+    assert str(exc) == expected
+    assert CheckEnvException(["A"], []).undeclared == []
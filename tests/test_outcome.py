@@ -0,0 +1,199 @@
+import asyncio
+import json
+import marshal
+import os
+
+import pytest
+
+from checkenv import check, check_async
+from checkenv.exceptions import CheckEnvException
+from checkenv.outcome import MAX_OUTCOMES, Outcome, OutcomeCache, clear_memory, env_fingerprint
+
+NAMES = ["OUTCOME_REQUIRED", "OUTCOME_DEFAULT", "OUTCOME_OPTIONAL", "OUTCOME_PORT", "OUTCOME_X"]
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+    clear_memory()
+    yield
+    clear_memory()
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    path = tmp_path / "env.json"
+    path.write_text(
+        json.dumps(
+            {
+                "OUTCOME_REQUIRED": True,
+                "OUTCOME_DEFAULT": {"default": "fallback"},
+                "OUTCOME_OPTIONAL": False,
+            }
+        )
+    )
+    return str(path)
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / "cache" / "checkenv.outcome")
+
+
+def test_fingerprint():
+    names = ["A", "B"]
+    assert env_fingerprint(names, {"A": "1"}) == env_fingerprint(names, {"A": "1", "C": "x"})
+    assert env_fingerprint(names, {"A": "1"}) != env_fingerprint(names, {"A": "1", "B": ""})
+    assert env_fingerprint(names, {"A": "1"}) != env_fingerprint(names, {"A": "2"})
+    assert env_fingerprint(names, {"A": "1"}, True) != env_fingerprint(
+        names, {"A": "1", "C": "x"}, True
+    )
+
+
+def test_passing_check_reuses_outcome(spec_file, cache_file, monkeypatch, capsys):
+    monkeypatch.setenv("OUTCOME_REQUIRED", "yes")
+    first = check(spec_file, renderer="text", outcome_cache=cache_file)
+    assert first.stats.outcome_hit is False
+    assert "OUTCOME_DEFAULT" in capsys.readouterr().out
+    assert os.environ["OUTCOME_DEFAULT"] == "fallback"
+
+    # a worker forked after the defaults were applied, and one started from the file
+    for forget in (False, True):
+        if forget:
+            clear_memory()
+        env = check(spec_file, renderer="text", outcome_cache=cache_file)
+        assert env.stats.outcome_hit is True
+        assert list(env.stats.durations_ns) == ["read", "apply"]
+        assert env.optional == ["OUTCOME_OPTIONAL"]
+        assert env.defaults == {}
+        assert capsys.readouterr().out == ""
+
+    # a worker started without the defaults gets them from the cached outcome
+    monkeypatch.delenv("OUTCOME_DEFAULT")
+    env = check(spec_file, no_output=True, overlay=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is True
+    assert env.defaults == {"OUTCOME_DEFAULT": "fallback"}
+    assert env.config["OUTCOME_DEFAULT"] == "fallback"
+    assert "OUTCOME_DEFAULT" not in os.environ
+
+
+def test_changed_variable_invalidates(spec_file, cache_file, monkeypatch, capsys):
+    monkeypatch.setenv("OUTCOME_REQUIRED", "yes")
+    check(spec_file, no_output=True, outcome_cache=cache_file)
+    monkeypatch.setenv("OUTCOME_REQUIRED", "no")
+    assert check(spec_file, no_output=True, outcome_cache=cache_file).stats.outcome_hit is False
+    monkeypatch.setenv("OUTCOME_X", "unrelated")
+    assert check(spec_file, no_output=True, outcome_cache=cache_file).stats.outcome_hit is True
+
+    # failed checks are printed and raised every time, with suggestions
+    monkeypatch.delenv("OUTCOME_REQUIRED")
+    monkeypatch.setenv("OUTCOME_REQUIRE", "typo")
+    for outcome_hit in (False, True):
+        with pytest.raises(CheckEnvException) as exc:
+            check(spec_file, raise_exception=True, renderer="text", outcome_cache=cache_file)
+        assert exc.value.stats.outcome_hit is outcome_hit
+        assert exc.value.suggestions == {"OUTCOME_REQUIRED": ["OUTCOME_REQUIRE"]}
+        assert "OUTCOME_REQUIRED" in capsys.readouterr().out
+
+
+def test_changed_spec_invalidates(tmp_path, cache_file, monkeypatch):
+    fragment = tmp_path / "shared.json"
+    fragment.write_text(json.dumps({"OUTCOME_OPTIONAL": False}))
+    spec = tmp_path / "env.json"
+    spec.write_text(json.dumps({"$include": "shared.json", "OUTCOME_X": False}))
+    env = check(str(spec), no_output=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is False
+    env = check(str(spec), no_output=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is True
+    assert env.optional == ["OUTCOME_OPTIONAL", "OUTCOME_X"]
+    assert env.sources == {"OUTCOME_OPTIONAL": str(fragment), "OUTCOME_X": str(spec)}
+
+    fragment.write_text(json.dumps({"OUTCOME_OPTIONAL": False, "OUTCOME_DEFAULT": False}))
+    env = check(str(spec), no_output=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is False
+    assert env.optional == ["OUTCOME_OPTIONAL", "OUTCOME_DEFAULT", "OUTCOME_X"]
+
+    spec.write_text(json.dumps({"$include": "shared.json"}))
+    env = check(str(spec), no_output=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is False
+    assert env.optional == ["OUTCOME_OPTIONAL", "OUTCOME_DEFAULT"]
+    assert check(str(spec), no_output=True, outcome_cache=cache_file).stats.outcome_hit is True
+
+
+def test_typed_values_and_pattern_keys(tmp_path, cache_file, monkeypatch):
+    spec = tmp_path / "env.json"
+    spec.write_text(json.dumps({"OUTCOME_PORT": {"type": "int"}, "OUTCOME_*": {"min_count": 1}}))
+    monkeypatch.setenv("OUTCOME_PORT", "80")
+    check(str(spec), no_output=True, outcome_cache=cache_file)
+    env = check(str(spec), no_output=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is True
+    assert env.values == {"OUTCOME_PORT": 80}
+    assert env.matches == {"OUTCOME_*": ["OUTCOME_PORT"]}
+
+    # with pattern keys, every variable is relevant
+    monkeypatch.setenv("OUTCOME_X", "1")
+    env = check(str(spec), no_output=True, outcome_cache=cache_file)
+    assert env.stats.outcome_hit is False
+    assert env.matches == {"OUTCOME_*": ["OUTCOME_PORT", "OUTCOME_X"]}
+
+
+def test_async_check(spec_file, cache_file, monkeypatch, capsys):
+    monkeypatch.setenv("OUTCOME_REQUIRED", "yes")
+    for outcome_hit in (False, True):
+        env = asyncio.run(check_async(spec_file, renderer="text", outcome_cache=cache_file))
+        assert env.stats.outcome_hit is outcome_hit
+        assert bool(capsys.readouterr().out) is not outcome_hit
+
+
+def test_not_used_with_env_files(spec_file, cache_file, tmp_path, monkeypatch):
+    dotenv = tmp_path / ".env"
+    dotenv.write_text("OUTCOME_REQUIRED=yes\n")
+    for _ in range(2):
+        env = check(spec_file, no_output=True, dotenv_files=[str(dotenv)], outcome_cache=cache_file)
+        assert env.stats.outcome_hit is None
+    assert not os.path.exists(cache_file)
+
+
+def test_unusable_cache_files(spec_file, cache_file, tmp_path, monkeypatch):
+    monkeypatch.setenv("OUTCOME_REQUIRED", "yes")
+    os.makedirs(os.path.dirname(cache_file))
+    for content in (b"", b"garbage", marshal.dumps([1, 2])):
+        with open(cache_file, "wb") as corrupt:
+            corrupt.write(content)
+        clear_memory()
+        assert check(spec_file, no_output=True, outcome_cache=cache_file).stats.outcome_hit is False
+        clear_memory()
+        assert check(spec_file, no_output=True, outcome_cache=cache_file).stats.outcome_hit is True
+
+    # an unwritable cache only keeps the outcome in memory
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    unwritable = str(blocker / "checkenv.outcome")
+    assert check(spec_file, no_output=True, outcome_cache=unwritable).stats.outcome_hit is False
+    assert check(spec_file, no_output=True, outcome_cache=unwritable).stats.outcome_hit is True
+    assert not os.path.exists(unwritable)
+
+
+def test_store(tmp_path, cache_file):
+    cache = OutcomeCache(cache_file)
+    key = cache.spec_key(str(tmp_path / "env.json"), b"{}")
+    outcome = Outcome([], [], {}, {}, {})
+    cache.store(key, {}, {}, [str(tmp_path / "removed.json")], {"fp": outcome})
+    assert cache.load(key) is None
+
+    cache.store(key, {}, {}, [], {str(index): outcome for index in range(MAX_OUTCOMES + 2)})
+    clear_memory()
+    outcomes = cache.load(key)["outcomes"]
+    assert list(outcomes) == [str(index) for index in range(2, MAX_OUTCOMES + 2)]
+    assert cache.path == os.path.abspath(cache_file)
+
+
+def test_failed_write_removes_temporary_file(tmp_path, cache_file, monkeypatch):
+    def fail_replace(src, dst):
+        raise OSError("read-only")
+
+    monkeypatch.setattr(os, "replace", fail_replace)
+    cache = OutcomeCache(cache_file)
+    key = cache.spec_key(str(tmp_path / "env.json"), b"{}")
+    cache.store(key, {}, {}, [], {"fp": Outcome([], [], {}, {}, {})})
+    assert os.listdir(os.path.dirname(cache_file)) == []
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+
+import pytest
+
+from checkenv import CheckEnv, check
+from checkenv.exceptions import CheckEnvException
+from checkenv.overlay import ENVIRON_LOCK, ResolvedConfig, snapshot_environ
+
+THREADS = 16
+ITERATIONS = 50
+
+
+@pytest.fixture
+def spec_file(tmp_path, monkeypatch, clean_env):
+    clean_env(["OVERLAY_DEFAULT", "OVERLAY_MISSING"])
+    monkeypatch.setenv("OVERLAY_SET", "from env")
+    env_file = tmp_path / "env.json"
+    env_file.write_text(
+        json.dumps(
+            {
+                "OVERLAY_SET": {"default": "ignored"},
+                "OVERLAY_DEFAULT": {"default": 8080},
+                "OVERLAY_MISSING": {"required": False},
+            }
+        )
+    )
+    return env_file
+
+
+def test_overlay_leaves_environ_untouched(spec_file):
+    env = check(str(spec_file), no_output=True, overlay=True)
+    config = env.config
+    assert "OVERLAY_DEFAULT" not in os.environ
+    assert config["OVERLAY_DEFAULT"] == "8080"
+    assert config["OVERLAY_SET"] == "from env"
+    assert "OVERLAY_DEFAULT" in config
+    assert "OVERLAY_MISSING" not in config
+    assert config.get("OVERLAY_MISSING") is None
+    assert dict(config.defaults) == {"OVERLAY_DEFAULT": "8080"}
+    assert config.optional == ["OVERLAY_DEFAULT", "OVERLAY_MISSING"]
+    assert config.missing == []
+    assert not config.check_failed
+    assert env.stats.defaults_applied == 0
+    assert repr(config) == "ResolvedConfig(defaults={'OVERLAY_DEFAULT': '8080'}, missing=[])"
+
+
+def test_config_iterates_snapshot_and_defaults():
+    config = ResolvedConfig({"A": "1", "B": "2"}, {"B": "default", "C": "3"}, [], ["C"])
+    assert list(config) == ["B", "C", "A"]
+    assert len(config) == 3
+    assert dict(config) == {"A": "1", "B": "default", "C": "3"}
+    with pytest.raises(KeyError):
+        config["D"]
+
+
+def test_windows_snapshot_is_a_case_insensitive_copy(monkeypatch):
+    monkeypatch.setenv("OVERLAY_SET", "from env")
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "name", "nt")
+        snapshot = snapshot_environ()
+    assert snapshot["overlay_set"] == snapshot["OVERLAY_SET"] == "from env"
+    assert "Overlay_Set" in snapshot
+    assert 1 not in snapshot
+    assert "OVERLAY_SET" in list(snapshot)
+    assert len(snapshot) == len(os.environ)
+    monkeypatch.setenv("OVERLAY_SET", "set meanwhile")
+    assert snapshot["OVERLAY_SET"] == "from env"
+
+
+def test_commit_skips_variables_set_since_snapshot(spec_file, monkeypatch):
+    config = check(str(spec_file), no_output=True, overlay=True).config
+    assert config.commit() == {"OVERLAY_DEFAULT": "8080"}
+    assert os.environ["OVERLAY_DEFAULT"] == "8080"
+    monkeypatch.setenv("OVERLAY_DEFAULT", "set meanwhile")
+    assert config.commit() == {}
+    assert os.environ["OVERLAY_DEFAULT"] == "set meanwhile"
+
+
+def test_apply_still_writes_defaults(spec_file):
+    env = check(str(spec_file), no_output=True)
+    assert os.environ["OVERLAY_DEFAULT"] == "8080"
+    assert env.config["OVERLAY_DEFAULT"] == "8080"
+    assert env.stats.defaults_applied == 1
+
+
+def test_config_before_apply_is_none(spec_file):
+    env = CheckEnv(str(spec_file))
+    env.load_spec_file()
+    assert env.config is None
+
+
+def test_overlay_failure_raises(spec_file, monkeypatch):
+    spec_file.write_text('{"OVERLAY_MISSING": true}')
+    with pytest.raises(CheckEnvException) as exc:
+        check(str(spec_file), raise_exception=True, no_output=True, overlay=True)
+    assert exc.value.missing == ["OVERLAY_MISSING"]
+
+
+def test_concurrent_checks_with_different_specs(tmp_path, clean_env):
+    # every thread checks its own spec file; half of them in overlay mode, the other half
+    # applying defaults to os.environ while the others snapshot it
+    clean_env([f"OVERLAY_STRESS_{index}" for index in range(THREADS)])
+    for index in range(THREADS):
+        (tmp_path / f"env{index}.json").write_text(
+            json.dumps(
+                {
+                    f"OVERLAY_STRESS_{index}": {"default": index},
+                    "OVERLAY_STRESS_MISSING": {"required": False},
+                }
+            )
+        )
+    barrier = threading.Barrier(THREADS)
+    errors = []
+
+    def worker(index):
+        try:
+            barrier.wait()
+            spec = str(tmp_path / f"env{index}.json")
+            for _ in range(ITERATIONS):
+                env = check(spec, no_output=True, overlay=index % 2 == 0)
+                assert env.config[f"OVERLAY_STRESS_{index}"] == str(index)
+                assert env.config.optional[-1] == "OVERLAY_STRESS_MISSING"
+                with ENVIRON_LOCK:
+                    os.environ.pop(f"OVERLAY_STRESS_{index}", None)
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not any(f"OVERLAY_STRESS_{index}" in os.environ for index in range(THREADS))
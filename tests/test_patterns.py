@@ -0,0 +1,123 @@
+import pytest
+
+from checkenv.patterns import PatternMatcher, PatternRule, pattern_regex
+from checkenv.spec import CompiledSpec, is_pattern_key
+
+
+@pytest.mark.parametrize(
+    ("key", "expected"),
+    [
+        ("FEATURE_*", ("FEATURE_", ".*")),
+        ("SHARD_?_DSN", ("SHARD_", r"._DSN")),
+        ("*", ("", ".*")),
+        ("/SHARD_[0-9]+_DSN/", ("SHARD_", "[0-9]+_DSN")),
+        ("/SHARDS?/", ("SHARD", "S?")),
+        ("/SHARD/", ("SHARD", "")),
+        ("/A|B/", ("", "A|B")),
+        ("/(?i)x/", ("", "(?i)x")),
+    ],
+)
+def test_pattern_regex_splits_literal_prefix(key, expected):
+    assert pattern_regex(key) == expected
+    assert is_pattern_key(key)
+
+
+def test_rules_from_entries():
+    assert PatternRule.from_entry("A_*", True) == PatternRule("A_*", 1, False)
+    assert PatternRule.from_entry("A_*", False) == PatternRule("A_*", 0, False)
+    assert PatternRule.from_entry("A_*", {"required": False}) == PatternRule("A_*", 0, False)
+    assert PatternRule.from_entry("A_*", {"min_count": 3.0, "require_value": True}) == (
+        PatternRule("A_*", 3, True)
+    )
+
+
+def test_matcher_lists_every_match_in_key_order():
+    keys = ["FEATURE_*", "FEATURE_?", "/FEATURE_[A-Z]+/", "*_DSN", "/A|B/", "NONE_*"]
+    matcher = PatternMatcher(keys)
+    names = ["FEATURE_X", "FEATURE_XY", "FEATURE_1", "SHARD_DSN", "A", "B", "AB", "OTHER"]
+    assert matcher.keys == tuple(keys)
+    assert matcher.match(names) == [
+        ["FEATURE_X", "FEATURE_XY", "FEATURE_1"],
+        ["FEATURE_X", "FEATURE_1"],
+        ["FEATURE_X", "FEATURE_XY"],
+        ["SHARD_DSN"],
+        ["A", "B"],
+        [],
+    ]
+
+
+def test_patterns_with_groups_or_flags_are_matched_separately():
+    matcher = PatternMatcher(["/(A)\\1/", "/(?i)b_.*/", "C_*"])
+    assert matcher.match(["AA", "AB", "B_1", "b_2", "C_1"]) == [["AA"], ["B_1", "b_2"], ["C_1"]]
+
+    matcher = PatternMatcher(["/(A)\\1/"])
+    assert matcher.match(["AA", "A"]) == [["AA"]]
+
+
+def test_matcher_matches_whole_names():
+    matcher = PatternMatcher(["/SHARD_[0-9]/", "X?", "/XY/"])
+    assert matcher.match(["SHARD_1", "SHARD_12", "XSHARD_1", "X", "XY", "XYZ"]) == [
+        ["SHARD_1"],
+        ["XY"],
+        ["XY"],
+    ]
+
+
+def test_many_patterns_against_large_environment():
+    keys = [f"SERVICE_{index}_*" for index in range(2000)]
+    keys += [f"/APP_{index}_[A-Z]+_[0-9]+/" for index in range(2000)]
+    env = [f"SERVICE_{index}_URL" for index in range(0, 2000, 7)]
+    env += [f"UNRELATED_{index}" for index in range(30000)]
+    env += ["APP_42_SHARD_3", "APP_42_SHARD_X"]
+    matches = PatternMatcher(keys).match(env)
+    assert matches[7] == ["SERVICE_7_URL"]
+    assert matches[8] == []
+    assert matches[2042] == ["APP_42_SHARD_3"]
+    assert sum(map(len, matches)) == len(range(0, 2000, 7)) + 1
+
+
+def test_evaluate_applies_pattern_rules():
+    spec = {
+        "NAME": True,
+        "SHARD_*_DSN": {"min_count": 2, "require_value": True},
+        "FEATURE_*": False,
+        "/REPLICA_[0-9]+/": True,
+        "FLAG_?": {"required": False, "require_value": True},
+    }
+    compiled = CompiledSpec.from_spec(spec)
+    assert compiled.names == ("NAME",)
+    assert compiled.pattern_keys == ("SHARD_*_DSN", "FEATURE_*", "/REPLICA_[0-9]+/", "FLAG_?")
+
+    evaluation = compiled.evaluate({"NAME": "x", "SHARD_1_DSN": "a", "FLAG_A": ""})
+    assert evaluation.missing == ["/REPLICA_[0-9]+/"]
+    assert evaluation.optional == ["FEATURE_*"]
+    assert evaluation.invalid == {
+        "SHARD_*_DSN": "1 matching (SHARD_1_DSN), 2 required",
+        "FLAG_?": "no value for FLAG_A",
+    }
+    assert evaluation.matches == {
+        "SHARD_*_DSN": ["SHARD_1_DSN"],
+        "FEATURE_*": [],
+        "/REPLICA_[0-9]+/": [],
+        "FLAG_?": ["FLAG_A"],
+    }
+
+    env = {"NAME": "x", "SHARD_1_DSN": "a", "SHARD_2_DSN": "b", "REPLICA_1": "", "FEATURE_X": "1"}
+    evaluation = compiled.evaluate(env)
+    assert (evaluation.missing, evaluation.optional, evaluation.invalid) == ([], ["FLAG_?"], {})
+
+
+def test_patterns_match_defaults():
+    compiled = CompiledSpec.from_spec(
+        {"SHARD_1_DSN": {"default": "db"}, "SHARD_*_DSN": {"require_value": True}}
+    )
+    evaluation = compiled.evaluate({})
+    assert evaluation.matches == {"SHARD_*_DSN": ["SHARD_1_DSN"]}
+    assert evaluation.invalid == {}
+
+
+def test_specs_without_patterns_skip_matching():
+    compiled = CompiledSpec.from_spec({"NAME": True, "OTHER": {"default": "/x"}})
+    assert compiled.pattern_keys == ()
+    assert compiled.evaluate({}).matches == {}
+    assert not is_pattern_key("NAME")
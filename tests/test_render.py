@@ -0,0 +1,278 @@
+import io
+import json
+import logging
+import os
+
+import pytest
+
+from checkenv import EnvCheckResults, check, check_many
+from checkenv.render import (
+    ColorConsoleRenderer,
+    JsonLinesRenderer,
+    JsonRenderer,
+    PlainTextRenderer,
+    Renderer,
+    get_renderer,
+)
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+SPEC = {
+    "RENDER_1": True,
+    "RENDER_2": {"default": 3000, "description": "port"},
+    "RENDER_3": {"required": False, "description": "debug"},
+}
+SECTIONS = [
+    EnvCheckResults(["RENDER_1"], SPEC, EnvCheckResults.MISSING),
+    EnvCheckResults(["RENDER_2", "RENDER_3"], SPEC, EnvCheckResults.OPTIONAL),
+]
+
+
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class CountingStream(io.StringIO):
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_color_output_matches_classic_layout():
+    stream = TtyStream()
+    ColorConsoleRenderer(stream=stream).render(SECTIONS)
+    assert stream.getvalue() == (
+        "\033[41m\033[37m\nThe following 1 environment variable is required\033[0m\n"
+        "\033[34mRENDER_1\033[0m\033[0m\n"
+        "\033[43m\033[30m\nThe following 2 environment variables are missing (but optional)"
+        "\033[0m\n"
+        "\033[34mRENDER_2\033[0m\033[33m (default=3000)\033[0m port\033[0m\n"
+        "\033[34mRENDER_3\033[0m debug\033[0m\n"
+    )
+
+
+def test_color_output_of_invalid_rows():
+    stream = TtyStream()
+    section = EnvCheckResults(
+        ["RENDER_2"], SPEC, EnvCheckResults.INVALID, {"RENDER_2": "not an integer"}
+    )
+    ColorConsoleRenderer(stream=stream).render([section])
+    assert stream.getvalue() == (
+        "\033[41m\033[37m\nThe following 1 environment variable is invalid\033[0m\n"
+        "\033[34mRENDER_2\033[0m\033[33m (default=3000)\033[0m"
+        "\033[31m (invalid: not an integer)\033[0m port\033[0m\n"
+    )
+
+
+def test_suggestions_in_color_text_and_json():
+    section = EnvCheckResults(
+        ["RENDER_1", "RENDER_3"],
+        SPEC,
+        EnvCheckResults.MISSING,
+        suggestions={"RENDER_1": ["RENDER_ONE", "RENDER_10"]},
+    )
+    stream = TtyStream()
+    ColorConsoleRenderer(stream=stream).render([section])
+    assert stream.getvalue().splitlines()[2:] == [
+        "\033[34mRENDER_1\033[0m\033[32m (did you mean RENDER_ONE, RENDER_10?)\033[0m\033[0m",
+        "\033[34mRENDER_3\033[0m debug\033[0m",
+    ]
+    assert str(section).splitlines()[1] == "RENDER_1 (did you mean RENDER_ONE, RENDER_10?)"
+    stream = io.StringIO()
+    JsonRenderer(stream=stream).render([section])
+    assert json.loads(stream.getvalue())["missing"][0]["suggestions"] == ["RENDER_ONE", "RENDER_10"]
+
+
+def test_color_output_names_included_spec_files():
+    section = EnvCheckResults(
+        ["RENDER_3"], SPEC, EnvCheckResults.OPTIONAL, sources={"RENDER_3": "common/debug.json"}
+    )
+    stream = TtyStream()
+    ColorConsoleRenderer(stream=stream).render([section])
+    assert stream.getvalue().splitlines()[2] == (
+        "\033[34mRENDER_3\033[0m (from common/debug.json) debug\033[0m"
+    )
+
+
+def test_color_output_is_stripped_when_not_a_terminal():
+    stream = io.StringIO()
+    ColorConsoleRenderer(stream=stream).render(SECTIONS)
+    assert "\033[" not in stream.getvalue()
+    assert "RENDER_2 (default=3000) port" in stream.getvalue()
+
+
+@pytest.mark.parametrize("renderer_class", [ColorConsoleRenderer, PlainTextRenderer])
+def test_single_write_per_render(renderer_class):
+    stream = CountingStream()
+    renderer_class(stream=stream).render(SECTIONS * 50)
+    assert stream.writes == 1
+
+
+def test_plain_text():
+    stream = io.StringIO()
+    PlainTextRenderer(stream=stream).render(SECTIONS + [EnvCheckResults([], SPEC, "missing")])
+    assert stream.getvalue() == (
+        "\nThe following 1 environment variable is required\nRENDER_1\n"
+        "\nThe following 2 environment variables are missing (but optional)\n"
+        "RENDER_2 (default=3000) port\nRENDER_3 debug\n"
+    )
+
+
+def test_json():
+    stream = io.StringIO()
+    JsonRenderer(stream=stream).render(SECTIONS)
+    assert json.loads(stream.getvalue()) == {
+        "missing": [{"name": "RENDER_1", "default": None, "description": None}],
+        "optional": [
+            {"name": "RENDER_2", "default": 3000, "description": "port"},
+            {"name": "RENDER_3", "default": None, "description": "debug"},
+        ],
+    }
+
+
+def test_json_lines():
+    stream = io.StringIO()
+    JsonLinesRenderer(stream=stream).render(SECTIONS)
+    rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(row["section"], row["name"]) for row in rows] == [
+        ("missing", "RENDER_1"),
+        ("optional", "RENDER_2"),
+        ("optional", "RENDER_3"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "renderer_class, expected",
+    [
+        (PlainTextRenderer, "bad spec\n"),
+        (JsonRenderer, '{"error": "bad spec"}\n'),
+        (JsonLinesRenderer, '{"error": "bad spec"}\n'),
+    ],
+)
+def test_errors(renderer_class, expected):
+    stream = io.StringIO()
+    renderer_class(stream=stream).render_error("bad spec")
+    assert stream.getvalue() == expected
+
+
+def test_logger(caplog):
+    logger = logging.getLogger("checkenv.test")
+    with caplog.at_level(logging.INFO, logger="checkenv.test"):
+        PlainTextRenderer(logger=logger, level=logging.INFO).render(SECTIONS)
+    assert len(caplog.records) == 1
+    assert caplog.records[0].levelno == logging.INFO
+    assert caplog.records[0].getMessage().endswith("RENDER_3 debug")
+
+
+def test_nothing_written_for_empty_output():
+    stream = CountingStream()
+    PlainTextRenderer(stream=stream).render([EnvCheckResults([], SPEC, "missing")])
+    assert stream.writes == 0
+
+
+def test_base_renderer_is_abstract():
+    with pytest.raises(TypeError, match="abstract"):
+        Renderer()
+
+    class ErrorsOnly(Renderer):
+        def format_error(self, message):
+            return message
+
+    with pytest.raises(TypeError, match="format_sections"):
+        ErrorsOnly()
+
+
+def test_get_renderer():
+    renderer = JsonRenderer()
+    assert get_renderer(renderer) is renderer
+    assert isinstance(get_renderer("jsonl"), JsonLinesRenderer)
+    with pytest.raises(ValueError, match="Unknown checkenv output format 'xml'"):
+        get_renderer("xml")
+
+
+def _file_reports():
+    return [
+        ("a.json", SECTIONS, None),
+        ("b.json", [], "bad spec"),
+        ("c.json", [EnvCheckResults([], SPEC, "missing")], None),
+    ]
+
+
+def test_text_report():
+    stream = io.StringIO()
+    PlainTextRenderer(stream=stream).render_report(_file_reports())
+    out = stream.getvalue()
+    assert out.startswith("\na.json\n\nThe following 1 environment variable is required")
+    assert out.endswith("\nb.json\nbad spec\n")
+
+
+def test_json_report():
+    stream = io.StringIO()
+    JsonRenderer(stream=stream).render_report(_file_reports())
+    files = json.loads(stream.getvalue())["files"]
+    assert [file["path"] for file in files] == ["a.json", "b.json", "c.json"]
+    assert files[1] == {"path": "b.json", "error": "bad spec"}
+    assert files[2] == {"path": "c.json", "missing": []}
+
+
+def test_json_lines_report():
+    stream = io.StringIO()
+    JsonLinesRenderer(stream=stream).render_report(_file_reports())
+    rows = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(row["path"], row.get("name", row.get("error"))) for row in rows] == [
+        ("a.json", "RENDER_1"),
+        ("a.json", "RENDER_2"),
+        ("a.json", "RENDER_3"),
+        ("b.json", "bad spec"),
+    ]
+
+
+def test_check_with_json_renderer(monkeypatch):
+    monkeypatch.delenv("OPTIONAL_1", raising=False)
+    monkeypatch.delenv("OPTIONAL_2", raising=False)
+    stream = io.StringIO()
+    check(
+        filename=os.path.join(dir_path, "fixtures/valid_no_mandatory.json"),
+        renderer=JsonRenderer(stream=stream),
+    )
+    document = json.loads(stream.getvalue())
+    assert document["missing"] == []
+    assert [row["name"] for row in document["optional"]] == ["OPTIONAL_1", "OPTIONAL_2"]
+
+
+def test_check_errors_use_renderer(capsys):
+    with pytest.raises(SystemExit):
+        check(filename=os.path.join(dir_path, "fixtures/invalid.json"), renderer="json")
+    assert "123TEST" in json.loads(capsys.readouterr().out)["error"]
+
+
+def test_check_many_with_renderer(capsys):
+    check_many(
+        [os.path.join(dir_path, "fixtures/valid_no_mandatory.json")], renderer="jsonl", env={}
+    )
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [row["name"] for row in rows] == ["OPTIONAL_1", "OPTIONAL_2"]
+
+
+def test_color_output_on_legacy_windows_console(monkeypatch):
+    import colorama
+
+    written = []
+
+    class ConvertingWrapper:
+        convert = True
+
+        def __init__(self, stream):
+            self.stream = stream
+
+        def write(self, text):
+            written.append(text)
+
+    monkeypatch.setattr(colorama, "AnsiToWin32", ConvertingWrapper)
+    stream = io.StringIO()
+    ColorConsoleRenderer(stream=stream).render(SECTIONS)
+    assert written[0].startswith("\033[41m")
+    assert stream.getvalue() == ""
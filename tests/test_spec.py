@@ -0,0 +1,190 @@
+import json
+import os
+import random
+from collections.abc import Mapping
+
+import pytest
+
+from checkenv import CheckEnv, compile_spec
+from checkenv.spec import CompiledSpec, SpecEvaluation
+
+SPEC = {
+    "SPEC_SET": True,
+    "SPEC_MISSING": True,
+    "SPEC_OPTIONAL": False,
+    "SPEC_DEFAULT": {"default": 3000, "description": "port"},
+    "SPEC_DEFAULT_SET": {"default": "unused"},
+    "SPEC_OBJECT_OPTIONAL": {"required": False},
+    "SPEC_OBJECT_REQUIRED": {"description": "required object"},
+}
+SPEC_ENV = {"SPEC_SET": "1", "SPEC_DEFAULT_SET": ""}
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env([*SPEC, *(f"SPEC_RANDOM_{index}" for index in range(200))])
+
+
+def _legacy_apply(spec, env):
+    """The per-key apply_spec implementation that CompiledSpec replaced"""
+    missing, optional, defaults = [], [], {}
+    for name, value in spec.items():
+        if isinstance(value, bool):
+            required, default = value, None
+        else:
+            required, default = value.get("required", True), value.get("default", None)
+        if env.get(name) is None:
+            if default is not None:
+                defaults[name] = str(default)
+                optional.append(name)
+            elif required:
+                missing.append(name)
+            else:
+                optional.append(name)
+    return missing, optional, defaults
+
+
+def test_from_spec():
+    compiled = CompiledSpec.from_spec(SPEC)
+    assert len(compiled) == 7
+    assert compiled.names == tuple(SPEC)
+    assert compiled.required == (True, True, False, True, True, False, True)
+    assert compiled.defaults == (None, None, None, "3000", "unused", None, None)
+    assert compiled.descriptions == (None, None, None, "port", None, None, "required object")
+
+
+def test_evaluate_does_not_modify_env():
+    env = dict(SPEC_ENV)
+    evaluation = CompiledSpec.from_spec(SPEC).evaluate(env)
+    assert evaluation == SpecEvaluation(
+        missing=["SPEC_MISSING", "SPEC_OBJECT_REQUIRED"],
+        optional=["SPEC_OPTIONAL", "SPEC_DEFAULT", "SPEC_OBJECT_OPTIONAL"],
+        defaults={"SPEC_DEFAULT": "3000"},
+    )
+    assert env == SPEC_ENV
+
+
+def test_evaluate_matches_legacy_ordering():
+    rng = random.Random(42)
+    entries = [True, False, {"required": False}, {"default": 0}, {"default": False}, {}]
+    for _ in range(50):
+        spec = {f"SPEC_RANDOM_{index}": rng.choice(entries) for index in rng.sample(range(200), 40)}
+        env = {name: "x" for name in spec if rng.random() < 0.3}
+        evaluation = CompiledSpec.from_spec(spec).evaluate(env)
+        assert tuple(evaluation[:3]) == _legacy_apply(spec, env)
+
+
+def _instance(tmp_path, spec=SPEC):
+    env_file = tmp_path / "env.json"
+    env_file.write_text(json.dumps(spec))
+    instance = CheckEnv(env_filename=str(env_file))
+    instance.load_spec_file()
+    return instance
+
+
+def test_apply_spec_commits_defaults_in_one_batch(tmp_path, monkeypatch):
+    instance = _instance(tmp_path)
+    updates = []
+    original_update = os.environ.update
+    monkeypatch.setattr(
+        os.environ, "update", lambda values: updates.append(values) or original_update(values)
+    )
+    instance.apply_spec()
+    assert updates == [{"SPEC_DEFAULT": "3000", "SPEC_DEFAULT_SET": "unused"}]
+    assert os.environ["SPEC_DEFAULT"] == "3000"
+    assert instance.defaults == {"SPEC_DEFAULT": "3000", "SPEC_DEFAULT_SET": "unused"}
+
+
+def test_apply_spec_dry_run(tmp_path):
+    instance = _instance(tmp_path)
+    instance.apply_spec(dry_run=True)
+    assert instance.missing == ["SPEC_SET", "SPEC_MISSING", "SPEC_OBJECT_REQUIRED"]
+    assert instance.defaults == {"SPEC_DEFAULT": "3000", "SPEC_DEFAULT_SET": "unused"}
+    assert "SPEC_DEFAULT" not in os.environ
+
+
+def test_apply_spec_twice_does_not_duplicate_results(tmp_path):
+    instance = _instance(tmp_path)
+    instance.apply_spec(dry_run=True)
+    instance.apply_spec(dry_run=True)
+    assert instance.missing == ["SPEC_SET", "SPEC_MISSING", "SPEC_OBJECT_REQUIRED"]
+
+
+def test_apply_spec_without_defaults_does_not_touch_environ(tmp_path, monkeypatch):
+    instance = _instance(tmp_path, {"SPEC_SET": True})
+
+    def fail(values):
+        raise AssertionError("nothing to commit")
+
+    monkeypatch.setattr(os.environ, "update", fail)
+    instance.apply_spec()
+    assert instance.missing == ["SPEC_SET"]
+    assert instance.defaults == {}
+
+
+def test_reload_resets_results(tmp_path):
+    instance = _instance(tmp_path)
+    instance.apply_spec(dry_run=True)
+    instance.load_spec_file()
+    assert instance.missing == []
+    assert instance.defaults == {}
+
+
+def test_evaluate_many_bitsets():
+    compiled = CompiledSpec.from_spec(SPEC)
+    envs = [{}, dict(SPEC_ENV), {name: "" for name in SPEC}, {"UNRELATED": "1"}]
+    results = list(compiled.evaluate_many(envs))
+
+    assert compiled.names_for(results[0][0]) == ["SPEC_SET", "SPEC_MISSING", "SPEC_OBJECT_REQUIRED"]
+    assert compiled.names_for(results[0][1]) == [
+        "SPEC_OPTIONAL",
+        "SPEC_DEFAULT",
+        "SPEC_DEFAULT_SET",
+        "SPEC_OBJECT_OPTIONAL",
+    ]
+    assert results[2] == (0, 0)
+    assert results[3] == results[0]
+    assert list(compiled.evaluate_many(envs)) == results
+    for env, (missing, optional) in zip(envs, results, strict=True):
+        evaluation = compiled.evaluate(env)
+        assert compiled.names_for(missing) == evaluation.missing
+        assert compiled.names_for(optional) == evaluation.optional
+
+
+def test_evaluate_many_is_lazy_and_accepts_any_mapping():
+    class ReadOnlyEnv(Mapping):
+        def __init__(self, data):
+            self._data = data
+
+        def __getitem__(self, key):
+            return self._data[key]
+
+        def __iter__(self):
+            return iter(self._data)
+
+        def __len__(self):
+            return len(self._data)
+
+    def envs():
+        yield ReadOnlyEnv({"SPEC_SET": "1"})
+        raise AssertionError("only one result was requested")
+
+    results = CompiledSpec.from_spec(SPEC).evaluate_many(envs())
+    missing, _ = next(results)
+    assert CompiledSpec.from_spec(SPEC).names_for(missing) == [
+        "SPEC_MISSING",
+        "SPEC_OBJECT_REQUIRED",
+    ]
+
+
+def test_compiled_spec_before_load_raises_runtime_error():
+    with pytest.raises(RuntimeError, match="Cannot compile checkenv spec before loading"):
+        _ = CheckEnv().compiled_spec
+
+
+def test_compile_spec_does_not_touch_environ(tmp_path):
+    env_file = tmp_path / "env.json"
+    env_file.write_text(json.dumps(SPEC))
+    compiled = compile_spec(str(env_file))
+    assert compiled.evaluate(SPEC_ENV).defaults == {"SPEC_DEFAULT": "3000"}
+    assert "SPEC_DEFAULT" not in os.environ
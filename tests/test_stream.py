@@ -0,0 +1,157 @@
+import io
+import json
+import os
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import CheckEnv, check
+from checkenv.exceptions import CheckEnvException
+from checkenv.stream import iter_entries, load_spec_stream
+
+NAMES = ["STREAM_REQUIRED", "STREAM_DEFAULT", "STREAM_OPTIONAL", "STREAM_PORT"]
+
+SPEC = {
+    "STREAM_REQUIRED": {"description": "required, with a long description " * 50},
+    "STREAM_DEFAULT": {"default": 8, "description": "défaut ☃ \U0001f600"},
+    "STREAM_OPTIONAL": False,
+    "STREAM_PORT": {"type": "int", "required": False},
+}
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_entries(chunk_size, indent):
+    document = {**SPEC, "NUMBER": 1234567890, "NESTED": {"a": [1, {"b": "}"}]}, "EMPTY": {}}
+    raw = json.dumps(document, indent=indent, ensure_ascii=False).encode("utf-8")
+    entries = list(iter_entries(io.BytesIO(raw), chunk_size))
+    assert {name: value for name, value, _, _ in entries} == document
+    for _, value, start, end in entries:
+        assert json.loads(raw[start:end]) == value
+    assert list(iter_entries(io.BytesIO(b" { } \n"), chunk_size)) == []
+
+
+@pytest.mark.parametrize(
+    ("raw", "message"),
+    [
+        (b'{"A" true}', "Expecting ':' delimiter: byte 5"),
+        (b'{"A": true "B": true}', "Expecting ',' delimiter: byte 11"),
+        (b'{"A": true, }', "Expecting property name enclosed in double quotes: byte 12"),
+        (b'{"A": tru}', "Expecting value: byte 6"),
+        (b'{"A": "unterminated', "Unterminated string starting at: byte 6"),
+        (b'{"A": true', "Expecting ',' delimiter: byte 10"),
+        (b'{"A": true} {}', "Extra data: byte 12"),
+        (b"[]", "Expecting '{': byte 0"),
+    ],
+)
+def test_iter_entries_errors(raw, message):
+    with pytest.raises(ValueError, match=f"^{message}$"):
+        list(iter_entries(io.BytesIO(raw), 4))
+
+
+def test_load_spec_stream(tmp_path):
+    path = write(tmp_path / "env.json", json.dumps(SPEC, indent=1))
+    streamed = load_spec_stream(path, chunk_size=16)
+    assert streamed.spec == {
+        "STREAM_REQUIRED": {},
+        "STREAM_DEFAULT": {"default": 8},
+        "STREAM_OPTIONAL": False,
+        "STREAM_PORT": {"type": "int", "required": False},
+    }
+    assert dict(streamed.descriptions) == {
+        name: SPEC[name]["description"] for name in ("STREAM_REQUIRED", "STREAM_DEFAULT")
+    }
+
+    # duplicate keys keep the first position and the last value, like json.load
+    path = write(tmp_path / "dup.json", '{"A": {"description": "a"}, "B": true, "A": false}')
+    streamed = load_spec_stream(path)
+    assert streamed.spec == {"A": False, "B": True}
+    assert len(streamed.descriptions) == 0
+
+
+def test_stale_descriptions(tmp_path):
+    spec_file = tmp_path / "env.json"
+    streamed = load_spec_stream(write(spec_file, json.dumps(SPEC)))
+    spec_file.write_text(json.dumps({"STREAM_DEFAULT": {"description": "changed"}}))
+    os.utime(spec_file, ns=(0, 0))
+    assert streamed.descriptions.get("STREAM_DEFAULT") is None
+
+
+def test_validation_errors(tmp_path):
+    spec = {"bad-name": True, "STREAM_PORT": {"type": "nope"}, "STREAM_OPTIONAL": {"x": 1}}
+    path = write(tmp_path / "env.json", json.dumps(spec))
+    with pytest.raises(ValidationError) as exc:
+        load_spec_stream(path)
+    assert exc.value.message.startswith("3 errors found in checkenv spec:")
+
+    # the strict validator stops at the first invalid entry
+    with pytest.raises(ValidationError, match="'bad-name'"):
+        CheckEnv(path, strict=True, streaming=True).load_spec_file()
+
+
+def test_files_that_are_not_objects(tmp_path):
+    path = write(tmp_path / "list.json", "[]")
+    with pytest.raises(ValidationError, match="is not of type 'object'"):
+        load_spec_stream(path)
+
+    path = tmp_path / "bom.json"
+    path.write_bytes(
+        b"\xef\xbb\xbf" + json.dumps({"$include": [], "STREAM_OPTIONAL": False}).encode()
+    )
+    assert load_spec_stream(str(path)).spec == {"$include": [], "STREAM_OPTIONAL": False}
+
+
+def test_check_streaming(tmp_path, monkeypatch, capsys):
+    path = write(tmp_path / "env.json", json.dumps(SPEC))
+    with pytest.raises(CheckEnvException):
+        check(path, raise_exception=True, renderer="text", streaming=True)
+    out = capsys.readouterr().out
+    assert SPEC["STREAM_REQUIRED"]["description"] in out
+    assert SPEC["STREAM_DEFAULT"]["description"] in out
+
+    monkeypatch.delenv("STREAM_DEFAULT")  # applied by the failed check
+    monkeypatch.setenv("STREAM_REQUIRED", "set")
+    monkeypatch.setenv("STREAM_PORT", "80")
+    env = check(
+        path,
+        renderer="json",
+        streaming=True,
+        cache_dir=str(tmp_path / "cache"),
+        outcome_cache=str(tmp_path / "outcome"),
+    )
+    assert list(env.stats.durations_ns) == ["parse", "apply", "render"]
+    assert env.stats.cache_hit is None and env.stats.outcome_hit is None
+    assert env.values == {"STREAM_PORT": 80}
+    assert os.environ["STREAM_DEFAULT"] == "8"
+    rows = [row for rows in json.loads(capsys.readouterr().out).values() for row in rows]
+    assert {row["name"]: row["description"] for row in rows} == {
+        "STREAM_DEFAULT": SPEC["STREAM_DEFAULT"]["description"],
+        "STREAM_OPTIONAL": None,
+    }
+    assert not os.path.exists(tmp_path / "cache")
+
+
+def test_streaming_with_includes(tmp_path):
+    write(
+        tmp_path / "shared.json",
+        json.dumps({"STREAM_OPTIONAL": {"required": False, "description": "shared"}}),
+    )
+    spec = {"$include": "shared.json", "STREAM_PORT": {"required": False, "description": "port"}}
+    path = write(tmp_path / "env.json", json.dumps(spec))
+    env = CheckEnv(path, streaming=True)
+    env.load_spec_file()
+    env.apply_spec(dry_run=True)
+    rows = {row.name: row for row in env.results[-1].rows}
+    assert rows["STREAM_OPTIONAL"].description == "shared"
+    assert rows["STREAM_OPTIONAL"].source == str(tmp_path / "shared.json")
+    assert rows["STREAM_PORT"].description == "port"
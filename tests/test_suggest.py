@@ -0,0 +1,45 @@
+import pytest
+
+from checkenv.suggest import SuggestionIndex, suggest_names
+
+NAMES = ["DATABASE_URL", "APP_DB_URL", "DB_HOST", "PATH", "HOME", "X"]
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("DATABSE_URL", ["DATABASE_URL"]),
+        ("DB_URL", ["APP_DB_URL"]),
+        ("database_url", ["DATABASE_URL"]),
+        ("x", ["X"]),
+        ("DB_PORT", []),
+        ("QQQ", []),
+    ],
+)
+def test_suggestions(name, expected):
+    assert SuggestionIndex(NAMES).suggest(name) == expected
+
+
+def test_suggestions_are_ranked_and_bounded():
+    index = SuggestionIndex(["SERVICE_URL_1", "SERVICE_URL", "SERVICE_URLS", "SERVICE_URL_12"])
+    assert len(index) == 4
+    assert index.suggest("SERVICE_UR") == ["SERVICE_URL", "SERVICE_URLS", "SERVICE_URL_1"]
+    assert index.suggest("SERVICE_UR", limit=1) == ["SERVICE_URL"]
+    assert index.suggest("SERVICE_UR", cutoff=0.99) == []
+    assert SuggestionIndex(["URL_SERVICE"]).suggest("SERVICE_URL") == []
+
+
+def test_prefix_drift_is_suggested_below_cutoff():
+    index = SuggestionIndex(["MYAPP_DB", "DB_HOST"])
+    assert index.suggest("DB") == ["MYAPP_DB"]
+    assert index.suggest("LEGACY_DB_HOST") == ["DB_HOST"]
+
+
+def test_suggestions_in_large_environment():
+    names = [f"UNRELATED_{index}_URL" for index in range(30000)] + ["DATABASE_URL"]
+    assert SuggestionIndex(names).suggest("DATABSE_URL") == ["DATABASE_URL"]
+
+
+def test_suggest_names_excludes_names():
+    assert suggest_names(["DATABSE_URL", "DB_PORT"], NAMES) == {"DATABSE_URL": ["DATABASE_URL"]}
+    assert suggest_names(["DATABSE_URL"], NAMES, exclude={"DATABASE_URL"}) == {}
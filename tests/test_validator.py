@@ -0,0 +1,212 @@
+import itertools
+import json
+import os
+import random
+
+import jsonschema
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv import CheckEnv, check
+from checkenv.coerce import _PARSERS
+from checkenv.validator import (
+    ENV_NAME_PATTERN,
+    PATTERN_KEY_FORMAT,
+    PATTERN_KEY_PATTERN,
+    TYPE_NAMES,
+    SpecError,
+    iter_spec_errors,
+    strict_format_checker,
+    validate_spec,
+)
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+
+NAMES = ["VALUE", "_", "__X1", "value_2", "123TEST", "  SPACES", "DASH-NAME", "", "É", "TRAIL\n"]
+PATTERN_KEYS = ["FEATURE_*", "SHARD_?_DSN", "*", "/SHARD_[0-9]+_DSN/", "/(/", "//", "/x", "A-*"]
+SCALARS = [True, False, None, 0, 1, -2.5, "", "text", [], ["a"], {}]
+ENTRIES = (
+    SCALARS
+    + [{"required": value} for value in SCALARS]
+    + [{"description": value} for value in SCALARS]
+    + [{"default": value} for value in SCALARS]
+    + [{prop: value} for prop in ("type", "min", "max", "pattern", "choices") for value in SCALARS]
+    + [
+        {"required": False, "description": "text", "default": 3000},
+        {"description": "text", "extra": 1},
+        {"requried": False},
+        {"type": "int", "min": 1, "max": 65535.5},
+        {"type": "duration", "min": True},
+        {"type": "enum"},
+        {"type": "enum", "choices": ["a", "b"]},
+        {"type": "enum", "choices": []},
+        {"type": "enum", "choices": ["a", 1, None]},
+        {"type": "text"},
+        {"type": "url", "pattern": "^https://"},
+        {"pattern": "(unclosed"},
+        {"choices": ["a"], "required": False},
+    ]
+    + [{"min_count": value} for value in [*SCALARS, 2.0, 2.5, -1]]
+    + [{"require_value": value} for value in SCALARS]
+    + [{"min_count": 3, "require_value": True, "required": False, "description": "shards"}]
+)
+
+
+def _jsonschema_valid(spec):
+    return jsonschema.Draft202012Validator(
+        CheckEnv._schema, format_checker=strict_format_checker()
+    ).is_valid(spec)
+
+
+def _corpus():
+    for name, entry in itertools.product(NAMES + PATTERN_KEYS, ENTRIES):
+        yield {name: entry}
+    rng = random.Random(1234)
+    for _ in range(300):
+        keys = rng.sample(NAMES + PATTERN_KEYS, rng.randint(0, 4))
+        yield {key: rng.choice(ENTRIES) for key in keys}
+    yield from [[], "spec", 1, None, True]
+
+
+@pytest.mark.parametrize("spec", list(_corpus()), ids=repr)
+def test_differential_against_jsonschema(spec):
+    errors = list(iter_spec_errors(spec))
+    assert (not errors) == _jsonschema_valid(spec)
+
+    if isinstance(spec, dict):
+        # every entry jsonschema rejects on its own is reported, and nothing else
+        invalid_keys = {error.path[0] for error in errors}
+        assert invalid_keys == {
+            key for key, value in spec.items() if not _jsonschema_valid({key: value})
+        }
+
+
+def test_pattern_matches_schema():
+    assert list(CheckEnv._schema["patternProperties"]) == [ENV_NAME_PATTERN, PATTERN_KEY_PATTERN]
+    assert CheckEnv._schema["propertyNames"] == {"format": PATTERN_KEY_FORMAT}
+
+
+def test_type_names_match_schema_and_coercion():
+    entry_schema = CheckEnv._schema["patternProperties"][ENV_NAME_PATTERN]["oneOf"][0]
+    assert entry_schema["properties"]["type"]["enum"] == TYPE_NAMES
+    assert list(_PARSERS) == TYPE_NAMES
+
+
+def test_typed_errors_reported_with_paths():
+    spec = {
+        "A": {"type": "enum"},
+        "B": {"type": "text", "min": False, "pattern": "(", "choices": ["a", 1]},
+        "C": {"choices": []},
+    }
+    assert list(iter_spec_errors(spec)) == [
+        SpecError(("A",), "'choices' is a required property"),
+        SpecError(("B", "type"), f"'text' is not one of {TYPE_NAMES!r}"),
+        SpecError(("B", "min"), "False is not of type 'number'"),
+        SpecError(("B", "pattern"), "'(' is not a 'regex'"),
+        SpecError(("B", "choices", 1), "1 is not of type 'string'"),
+        SpecError(("C", "choices"), "[] should be non-empty"),
+    ]
+
+
+def test_pattern_entry_errors_reported_with_paths():
+    spec = {
+        "FEATURE_*": {"min_count": -1, "default": "x"},
+        "/(/": True,
+        "/SHARD_[0-9]+_DSN/": {"min_count": 1.5, "require_value": "yes"},
+    }
+    assert list(iter_spec_errors(spec)) == [
+        SpecError(("FEATURE_*", "min_count"), "-1 is less than the minimum of 0"),
+        SpecError(
+            ("FEATURE_*", "default"),
+            "Additional properties are not allowed ('default' was unexpected)",
+        ),
+        SpecError(("/(/",), "'/(/' is not a valid regular expression"),
+        SpecError(("/SHARD_[0-9]+_DSN/", "min_count"), "1.5 is not of type 'integer'"),
+        SpecError(("/SHARD_[0-9]+_DSN/", "require_value"), "'yes' is not of type 'boolean'"),
+    ]
+
+
+def test_all_errors_reported_with_paths():
+    spec = {
+        "123TEST": True,
+        "VALUE_1": {"requried": False, "default": None},
+        "VALUE_2": "yes",
+        "VALUE_3": True,
+    }
+    assert list(iter_spec_errors(spec)) == [
+        SpecError(("123TEST",), "'123TEST' is not a valid environment variable name"),
+        SpecError(
+            ("VALUE_1", "requried"),
+            "Additional properties are not allowed ('requried' was unexpected)",
+        ),
+        SpecError(("VALUE_1", "default"), "None is not of type 'string', 'number', 'boolean'"),
+        SpecError(("VALUE_2",), "'yes' is not a boolean or an object"),
+    ]
+
+
+def test_validation_error_carries_every_violation():
+    with pytest.raises(ValidationError) as exc:
+        validate_spec({"123TEST": True, "  INVALID_NAME": {"required": "no"}})
+
+    assert [list(error.path) for error in exc.value.context] == [
+        ["123TEST"],
+        ["  INVALID_NAME"],
+        ["  INVALID_NAME", "required"],
+    ]
+    assert exc.value.message.splitlines() == [
+        "3 errors found in checkenv spec:",
+        "$['123TEST']: '123TEST' is not a valid environment variable name",
+        "$['  INVALID_NAME']: '  INVALID_NAME' is not a valid environment variable name",
+        "$['  INVALID_NAME'].required: 'no' is not of type 'boolean'",
+    ]
+
+
+def test_single_violation_message():
+    with pytest.raises(ValidationError, match=r"^\$\.PORT\.default: \[\] is not of type"):
+        validate_spec({"PORT": {"default": []}})
+
+
+def test_non_object_spec():
+    with pytest.raises(ValidationError, match=r"^\$: \[\] is not of type 'object'$"):
+        validate_spec([])
+
+
+def test_valid_spec_passes():
+    with open(os.path.join(dir_path, "fixtures/valid1.json"), encoding="utf-8") as spec_file:
+        validate_spec(json.load(spec_file))
+
+
+@pytest.mark.parametrize("strict", [False, True])
+def test_invalid_spec_file_raises_in_both_modes(strict):
+    instance = CheckEnv(env_filename=os.path.join(dir_path, "fixtures/invalid.json"), strict=strict)
+    with pytest.raises(ValidationError):
+        instance.load_spec_file()
+
+
+def test_strict_mode_uses_jsonschema(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        jsonschema,
+        "validate",
+        lambda spec, schema, format_checker: calls.append((schema, format_checker)),
+    )
+    instance = CheckEnv(env_filename=os.path.join(dir_path, "fixtures/valid1.json"), strict=True)
+    instance.load_spec_file()
+    assert calls == [(CheckEnv._schema, strict_format_checker())]
+
+
+def test_check_prints_every_violation(capsys):
+    with pytest.raises(SystemExit):
+        check(filename=os.path.join(dir_path, "fixtures/invalid.json"))
+    captured = capsys.readouterr()
+    assert "123TEST" in captured.out
+    assert "INVALID_NAME" in captured.out
+
+
+def test_check_strict_mode():
+    with pytest.raises(ValidationError):
+        check(
+            filename=os.path.join(dir_path, "fixtures/invalid.json"),
+            raise_exception=True,
+            strict=True,
+        )
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from checkenv.watch import ChangeSource, SpecDelta, SpecWatcher, StatChangeSource
+
+NAMES = ["WATCH_REQUIRED", "WATCH_DEFAULT", "WATCH_OPTIONAL", "WATCH_NEW"]
+
+
+@pytest.fixture(autouse=True)
+def init_env(clean_env):
+    clean_env(NAMES)
+
+
+def write_spec(path, spec, mtime_ns):
+    path.write_text(json.dumps(spec))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def spec_file(tmp_path):
+    env_file = tmp_path / "env.json"
+    write_spec(
+        env_file,
+        {"WATCH_REQUIRED": True, "WATCH_DEFAULT": {"default": 1}, "WATCH_OPTIONAL": False},
+        1_000_000_000,
+    )
+    return env_file
+
+
+@pytest.fixture
+def deltas():
+    return []
+
+
+@pytest.fixture
+def watcher(spec_file, deltas):
+    return SpecWatcher(str(spec_file), on_change=deltas.append)
+
+
+def test_first_poll_evaluates_everything(watcher, deltas):
+    delta = watcher.poll()
+    assert delta == SpecDelta(
+        ["WATCH_REQUIRED", "WATCH_DEFAULT", "WATCH_OPTIONAL"],
+        [],
+        [],
+        ["WATCH_REQUIRED"],
+        [],
+        {"WATCH_DEFAULT": "1"},
+    )
+    assert deltas == [delta]
+    assert os.environ["WATCH_DEFAULT"] == "1"
+    assert watcher.missing == ["WATCH_REQUIRED"]
+    assert watcher.optional == ["WATCH_DEFAULT", "WATCH_OPTIONAL"]
+    assert watcher.defaults == {"WATCH_DEFAULT": "1"}
+    assert watcher.check_failed
+    assert watcher.spec["WATCH_REQUIRED"] is True
+
+
+def test_unchanged_spec_is_not_reloaded(watcher, deltas, monkeypatch):
+    watcher.poll()
+    monkeypatch.setattr(json, "loads", None)  # any reload would fail
+    assert watcher.poll() is None
+    assert len(deltas) == 1
+
+
+def test_only_changed_entries_are_revalidated(watcher, spec_file, monkeypatch):
+    watcher.poll()
+    validated = []
+    original = watcher._validator._validate
+    monkeypatch.setattr(
+        watcher._validator, "_validate", lambda spec: (validated.append(spec), original(spec))
+    )
+    write_spec(
+        spec_file,
+        {"WATCH_REQUIRED": False, "WATCH_DEFAULT": {"default": 1}, "WATCH_NEW": True},
+        2_000_000_000,
+    )
+    delta = watcher.poll()
+    assert validated == [{"WATCH_REQUIRED": False, "WATCH_NEW": True}]
+    assert delta == SpecDelta(
+        ["WATCH_NEW"],
+        ["WATCH_REQUIRED"],
+        ["WATCH_OPTIONAL"],
+        ["WATCH_NEW"],
+        ["WATCH_REQUIRED"],
+        {},
+    )
+    assert list(watcher.spec) == ["WATCH_REQUIRED", "WATCH_DEFAULT", "WATCH_NEW"]
+    assert watcher.missing == ["WATCH_NEW"]
+
+
+def test_default_changes_are_applied_and_withdrawn(watcher, spec_file):
+    watcher.poll()
+    write_spec(spec_file, {"WATCH_DEFAULT": {"default": True}}, 2_000_000_000)
+    delta = watcher.poll()
+    # a bool default that equals the previous numeric one still counts as a change
+    assert delta.changed == ["WATCH_DEFAULT"]
+    assert delta.defaults_changed == {"WATCH_DEFAULT": "True"}
+    assert delta.newly_satisfied == ["WATCH_REQUIRED"]
+    assert os.environ["WATCH_DEFAULT"] == "True"
+
+    write_spec(spec_file, {"WATCH_DEFAULT": True}, 3_000_000_000)
+    delta = watcher.poll()
+    assert delta.defaults_changed == {"WATCH_DEFAULT": None}
+    assert delta.newly_missing == ["WATCH_DEFAULT"]
+    assert "WATCH_DEFAULT" not in os.environ
+
+    write_spec(spec_file, {"WATCH_DEFAULT": {"default": "x"}}, 4_000_000_000)
+    watcher.poll()
+    write_spec(spec_file, {}, 5_000_000_000)
+    assert watcher.poll().defaults_changed == {"WATCH_DEFAULT": None}
+    assert "WATCH_DEFAULT" not in os.environ
+
+
+def test_env_changes_reevaluate_named_variables(watcher, deltas):
+    watcher.poll()
+    os.environ["WATCH_REQUIRED"] = "set"
+    os.environ["WATCH_DEFAULT"] = "overridden"
+    delta = watcher.notify_env_changed(["WATCH_REQUIRED", "WATCH_DEFAULT", "NOT_IN_SPEC"])
+    assert delta == SpecDelta([], [], [], [], ["WATCH_REQUIRED"], {"WATCH_DEFAULT": None})
+    assert os.environ["WATCH_DEFAULT"] == "overridden"
+    assert not watcher.check_failed
+
+    del os.environ["WATCH_DEFAULT"]
+    delta = watcher.notify_env_changed(["WATCH_DEFAULT"])
+    assert delta.defaults_changed == {"WATCH_DEFAULT": "1"}
+    assert os.environ["WATCH_DEFAULT"] == "1"
+
+    # a default unset behind the watcher's back is applied again, without a delta
+    del os.environ["WATCH_DEFAULT"]
+    assert watcher.notify_env_changed(["WATCH_DEFAULT"]).empty
+    assert os.environ["WATCH_DEFAULT"] == "1"
+    assert len(deltas) == 3
+
+
+def test_defaults_are_not_applied_when_disabled(spec_file):
+    watcher = SpecWatcher(str(spec_file), apply_defaults=False)
+    watcher.poll()
+    assert watcher.defaults == {"WATCH_DEFAULT": "1"}
+    assert "WATCH_DEFAULT" not in os.environ
+
+
+def test_invalid_change_keeps_previous_spec(watcher, spec_file):
+    watcher.poll()
+    write_spec(spec_file, {"WATCH_REQUIRED": "yes"}, 2_000_000_000)
+    with pytest.raises(ValidationError):
+        watcher.poll()
+    assert watcher.missing == ["WATCH_REQUIRED"]
+    write_spec(spec_file, ["not", "an", "object"], 3_000_000_000)
+    with pytest.raises(ValidationError):
+        watcher.poll()
+
+
+def test_strict_validation(spec_file):
+    write_spec(spec_file, {"WATCH_REQUIRED": "yes"}, 2_000_000_000)
+    with pytest.raises(ValidationError):
+        SpecWatcher(str(spec_file), strict=True).poll()
+
+
+def test_missing_spec_file(tmp_path):
+    source = StatChangeSource(str(tmp_path / "missing.json"))
+    assert source.token() is None
+    with pytest.raises(OSError):
+        SpecWatcher(str(tmp_path / "missing.json")).poll()
+
+
+def test_pluggable_change_source(spec_file, deltas):
+    class ManualSource(ChangeSource):
+        version = 0
+
+        def token(self):
+            return self.version
+
+    source = ManualSource()
+    watcher = SpecWatcher(str(spec_file), on_change=deltas.append, source=source)
+    watcher.poll()
+    write_spec(spec_file, {}, 2_000_000_000)
+    assert watcher.poll() is None
+    source.version = 1
+    assert watcher.poll().removed == ["WATCH_REQUIRED", "WATCH_DEFAULT", "WATCH_OPTIONAL"]
+    write_spec(spec_file, {"WATCH_NEW": False}, 3_000_000_000)
+    assert watcher.notify_spec_changed().added == ["WATCH_NEW"]
+    assert watcher.poll() is None
+    with pytest.raises(TypeError, match="abstract"):
+        ChangeSource()
+
+
+def test_run_until_stopped(watcher, spec_file):
+    stop = threading.Event()
+    errors = []
+
+    def on_change(delta):
+        if delta.removed:
+            stop.set()
+        else:
+            write_spec(spec_file, ["invalid"], 2_000_000_000)
+
+    def on_error(exc):
+        errors.append(exc)
+        write_spec(spec_file, {}, 3_000_000_000)
+
+    watcher._on_change = on_change
+    watcher._interval = 0.001
+    watcher.run(stop, on_error)
+    assert [type(error) for error in errors] == [ValidationError]
+
+
+def test_run_raises_without_error_handler(tmp_path):
+    with pytest.raises(OSError):
+        SpecWatcher(str(tmp_path / "missing.json")).run()
+
+
+def test_run_async_until_stopped(watcher, spec_file):
+    async def main():
+        stop = asyncio.Event()
+        polls = []
+        original = watcher.poll
+
+        def poll():
+            polls.append(original())
+            if len(polls) == 2:
+                write_spec(spec_file, {}, 2_000_000_000)
+            if len(polls) == 3:
+                stop.set()
+
+        watcher.poll = poll
+        watcher._interval = 0.001
+        await watcher.run_async(stop)
+        return polls
+
+    polls = asyncio.run(main())
+    assert polls[1] is None
+    assert polls[2].removed == ["WATCH_REQUIRED", "WATCH_DEFAULT", "WATCH_OPTIONAL"]
+
+
+def test_run_async_default_stop_event(tmp_path):
+    with pytest.raises(OSError):
+        asyncio.run(SpecWatcher(str(tmp_path / "missing.json")).run_async())
+
+
+def test_description_change_keeps_applied_default(watcher, spec_file):
+    watcher.poll()
+    write_spec(
+        spec_file,
+        {
+            "WATCH_REQUIRED": True,
+            "WATCH_DEFAULT": {"default": 1, "description": "now described"},
+            "WATCH_OPTIONAL": False,
+        },
+        2_000_000_000,
+    )
+    delta = watcher.poll()
+    assert delta.changed == ["WATCH_DEFAULT"]
+    assert delta.defaults_changed == {}
+    assert os.environ["WATCH_DEFAULT"] == "1"
+
+
+def test_pattern_keys_are_validated_but_not_watched(watcher, spec_file, deltas):
+    watcher.poll()
+    spec = {"WATCH_REQUIRED": True, "WATCH_*": {"min_count": 1}}
+    write_spec(spec_file, spec, 2_000_000_000)
+    watcher.poll()
+    assert watcher.missing == ["WATCH_REQUIRED"]
+    write_spec(spec_file, {**spec, "WATCH_*": {"min_count": -1}}, 3_000_000_000)
+    with pytest.raises(ValidationError):
+        watcher.poll()
+
+
+def test_included_spec_files_are_composed_and_watched(tmp_path, deltas):
+    fragment = tmp_path / "shared.json"
+    write_spec(fragment, {"WATCH_REQUIRED": True, "WATCH_DEFAULT": {"default": 1}}, 1_000_000_000)
+    root = tmp_path / "env.json"
+    write_spec(root, {"$include": "shared.json", "WATCH_OPTIONAL": False}, 1_000_000_000)
+    watcher = SpecWatcher(str(root), on_change=deltas.append)
+    delta = watcher.poll()
+    assert delta.added == ["WATCH_REQUIRED", "WATCH_DEFAULT", "WATCH_OPTIONAL"]
+    assert watcher.missing == ["WATCH_REQUIRED"]
+    assert watcher.poll() is None
+
+    # a change to the included file alone is picked up
+    write_spec(fragment, {"WATCH_REQUIRED": True, "WATCH_NEW": True}, 2_000_000_000)
+    delta = watcher.poll()
+    assert (delta.added, delta.removed) == (["WATCH_NEW"], ["WATCH_DEFAULT"])
+    assert watcher.missing == ["WATCH_REQUIRED", "WATCH_NEW"]
+    assert watcher.poll() is None
+
+    write_spec(fragment, {"WATCH_NEW": {"type": "nope"}}, 3_000_000_000)
+    with pytest.raises(ValidationError, match="shared.json"):
+        watcher.poll()
+    assert watcher.missing == ["WATCH_REQUIRED", "WATCH_NEW"]
+
+    # without includes, the former fragment is no longer watched
+    write_spec(root, {"WATCH_OPTIONAL": False}, 4_000_000_000)
+    assert watcher.poll().removed == ["WATCH_REQUIRED", "WATCH_NEW"]
+    write_spec(fragment, {"WATCH_REQUIRED": True}, 5_000_000_000)
+    assert watcher.poll() is None